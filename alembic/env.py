@@ -6,12 +6,21 @@ from sqlalchemy import pool
 from alembic import context
 
 # Import our models and database configuration
+from app.core.config import settings
 from app.core.database import Base
+from app.models.daily_plan import DailyPlan  # noqa: F401
+from app.models.job_run import JobRun  # noqa: F401
+from app.models.task import Task  # noqa: F401
+from app.models.task_counter import TaskCounter  # noqa: F401
+from app.models.user import User  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# Migrate the database the app is configured for (DATABASE_URL)
+config.set_main_option("sqlalchemy.url", settings.database_url)
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
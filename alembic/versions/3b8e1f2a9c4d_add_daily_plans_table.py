@@ -0,0 +1,47 @@
+"""add daily plans table
+
+Revision ID: 3b8e1f2a9c4d
+Revises: 9a4d6e2b7c15
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8e1f2a9c4d"
+down_revision: Union[str, None] = "9a4d6e2b7c15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The app also creates the table via create_all on startup
+    if sa.inspect(op.get_bind()).has_table("daily_plans"):
+        return
+    op.create_table(
+        "daily_plans",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id"),
+            primary_key=True,
+            autoincrement=False,
+        ),
+        sa.Column("plan_date", sa.Date(), nullable=False),
+        sa.Column("snapshot_hash", sa.String(length=64), nullable=False),
+        sa.Column("plan", sa.Text(), nullable=False),
+        sa.Column(
+            "generated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_plans")
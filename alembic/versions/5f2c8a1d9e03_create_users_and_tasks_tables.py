@@ -0,0 +1,68 @@
+"""create users and tasks tables
+
+Revision ID: 5f2c8a1d9e03
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f2c8a1d9e03"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all already have the
+    # baseline schema; only create what is missing
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("is_admin", sa.Boolean()),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index(
+            "ix_users_username", "users", ["username"], unique=True
+        )
+
+    if "tasks" not in existing:
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("status", sa.String()),
+            sa.Column("total_minutes", sa.Integer()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_tasks_id", "tasks", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,37 @@
+"""add task access path indexes
+
+Revision ID: 7d5c16becf57
+Revises: 5f2c8a1d9e03
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d5c16becf57"
+down_revision: Union[str, None] = "5f2c8a1d9e03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, columns) of the indexes declared on Task.__table_args__.
+# The app also creates them via create_all on startup, hence if_not_exists.
+TASK_INDEXES = (
+    ("ix_tasks_user_id_status", ["user_id", "status"]),
+    ("ix_tasks_user_id_created_at_id", ["user_id", "created_at", "id"]),
+    ("ix_tasks_created_at_id", ["created_at", "id"]),
+    ("ix_tasks_status", ["status"]),
+    ("ix_tasks_updated_at", ["updated_at"]),
+)
+
+
+def upgrade() -> None:
+    for name, columns in TASK_INDEXES:
+        op.create_index(name, "tasks", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(TASK_INDEXES):
+        op.drop_index(name, table_name="tasks", if_exists=True)
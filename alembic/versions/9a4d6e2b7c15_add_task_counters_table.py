@@ -0,0 +1,36 @@
+"""add task counters table
+
+Revision ID: 9a4d6e2b7c15
+Revises: 7d5c16becf57
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4d6e2b7c15"
+down_revision: Union[str, None] = "7d5c16becf57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The app also creates the table via create_all on startup, and
+    # fills it from the tasks table (TaskCounterService.ensure_initialized)
+    if sa.inspect(op.get_bind()).has_table("task_counters"):
+        return
+    op.create_table(
+        "task_counters",
+        sa.Column("user_id", sa.Integer(), autoincrement=False),
+        sa.Column("status", sa.String()),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "status"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_counters")
@@ -0,0 +1,41 @@
+"""add job runs table
+
+Revision ID: c7e2a5b1f806
+Revises: 3b8e1f2a9c4d
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2a5b1f806"
+down_revision: Union[str, None] = "3b8e1f2a9c4d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The app also creates the table via create_all on startup
+    if sa.inspect(op.get_bind()).has_table("job_runs"):
+        return
+    op.create_table(
+        "job_runs",
+        sa.Column("name", sa.String()),
+        sa.Column("run_date", sa.Date()),
+        sa.Column("worker_pid", sa.Integer(), nullable=False),
+        sa.Column(
+            "claimed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name", "run_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_runs")
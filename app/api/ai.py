@@ -1,11 +1,16 @@
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+import json
+from typing import List
 from sqlalchemy.orm import Session
 from app.core.security import get_current_user_web
 from app.core.database import get_db
 from app.models.user import User
 from app.services.ai_service import ai_service
+from app.services.plan_service import daily_plan_events, get_daily_plan
 
 load_dotenv()
 
@@ -25,6 +30,30 @@ class SuggestResponse(BaseModel):
     )
 
 
+class BatchSuggestRequest(BaseModel):
+    titles: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        example=["Write unit tests", "Fix login bug"],
+    )
+
+
+class BatchSuggestion(BaseModel):
+    title: str
+    suggestion: str
+    source: str = Field(
+        ..., example="ai", description="'cache', 'ai' or 'fallback'"
+    )
+
+
+class BatchSuggestResponse(BaseModel):
+    suggestions: List[BatchSuggestion]
+    batches: int = Field(
+        ..., example=1, description="Gemini calls made for uncached titles"
+    )
+
+
 class ErrorResponse(BaseModel):
     detail: str = Field(..., example="Failed to generate AI suggestion: ...")
 
@@ -43,7 +72,13 @@ async def suggest_task(
     current_user: User = Depends(get_current_user_web),
     db: Session = Depends(get_db),
 ):
-    """AI-powered task suggestion endpoint."""
+    """AI-powered task suggestion endpoint.
+
+    Plans are served from the daily_plans table while the user's tasks
+    match the stored snapshot. Gemini is called asynchronously with a
+    deadline, falling back to canned text on timeouts, errors or an
+    open circuit breaker.
+    """
     try:
         if req.mode not in ["draft", "plan"]:
             raise HTTPException(
@@ -56,19 +91,9 @@ async def suggest_task(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Title is required for draft mode.",
                 )
-            suggestion = ai_service.generate_task_description(req.title)
+            suggestion = await ai_service.agenerate_task_description(req.title)
         else:
-            from app.services.task_service import TaskService
-
-            task_service = TaskService(db)
-            user_tasks = task_service.get_user_tasks(current_user.id)
-            tasks_data = [
-                {"title": task.title, "status": task.status}
-                for task in user_tasks
-            ]
-            suggestion = ai_service.generate_daily_plan(
-                current_user.username, tasks_data
-            )
+            suggestion = await get_daily_plan(db, current_user)
         return SuggestResponse(suggestion=suggestion)
     except HTTPException as e:
         raise e
@@ -77,3 +102,86 @@ async def suggest_task(
             status_code=500,
             detail=f"Failed to generate AI suggestion: {str(e)}",
         )
+
+
+@router.post(
+    "/suggest/batch",
+    response_model=BatchSuggestResponse,
+    responses={401: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
+)
+async def suggest_tasks_batch(
+    req: BatchSuggestRequest,
+    current_user: User = Depends(get_current_user_web),
+):
+    """Draft descriptions for many titles, batching the Gemini calls.
+
+    Each item reports whether it came from the cache, Gemini or the
+    fallback text.
+    """
+    titles = [title.strip() for title in req.titles]
+    if not all(titles):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Titles must not be empty.",
+        )
+    return await ai_service.agenerate_task_descriptions(titles)
+
+
+def _sse(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _sse_stream(events):
+    async for event in events:
+        if event.pop("done", False):
+            yield _sse(event, "done")
+        else:
+            yield _sse(event)
+
+
+@router.post(
+    "/suggest/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        401: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+    },
+)
+async def suggest_task_stream(
+    req: SuggestRequest,
+    current_user: User = Depends(get_current_user_web),
+    db: Session = Depends(get_db),
+):
+    """Streaming /ai/suggest: Server-Sent Events as Gemini writes.
+
+    Each message event carries {"text": chunk} to append. A final "done"
+    event carries {"source", "text"} with the complete suggestion, which
+    replaces the streamed text (it differs only if Gemini failed part
+    way and the fallback was used).
+    """
+    if req.mode not in ["draft", "plan"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid mode. Must be 'draft' or 'plan'.",
+        )
+    if req.mode == "draft":
+        if not req.title:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Title is required for draft mode.",
+            )
+        events = ai_service.astream_task_description(req.title)
+    else:
+        events = await daily_plan_events(db, current_user)
+
+    # The session is closed by its dependency only after the stream
+    # ends; give its pooled connection back before waiting on Gemini
+    await run_in_threadpool(db.close)
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
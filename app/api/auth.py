@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.concurrency import PoolFullError
+from app.core.config import settings
+from app.core.database import get_db, get_service_db
+from app.core.memory import (
+    memory_report,
+    snapshot_diff,
+    start_tracemalloc,
+    stop_tracemalloc,
+    tracemalloc_status,
+)
+from app.core.profiler import ProfilerBusyError, profile_for
 from app.core.security import create_access_token, get_current_user_web
+from app.core.timing import TimedJinja2Templates
+from app.core.tracing import InMemoryExporter, get_exporter
 from app.models.user import UserCreate, UserLogin, UserRead
-from app.services.user_service import UserService
-from typing import List
+from app.services.stats_service import StatsService
+from app.services.user_service import AsyncUserService
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
-templates = Jinja2Templates(directory="app/templates")
+templates = TimedJinja2Templates(directory="app/templates")
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
@@ -16,31 +30,51 @@ class ErrorResponse(BaseModel):
     detail: str = Field(..., example="Invalid credentials")
 
 
-@router.post("/signup", responses={400: {"model": ErrorResponse}})
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+def _busy(exc: PoolFullError) -> HTTPException:
+    """Map a full password-hash pool to 503 with a retry hint."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
+
+
+@router.post(
+    "/signup",
+    responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
+)
+async def signup(user_data: UserCreate, db=Depends(get_service_db)):
     """Register a new user."""
-    user_service = UserService(db)
+    user_service = AsyncUserService(db)
     try:
-        user = user_service.create_user(user_data)
+        user = await user_service.create_user(user_data)
         return {"username": user.username, "user_id": user.id}
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         )
+    except PoolFullError as e:
+        raise _busy(e)
 
 
-@router.post("/login", responses={401: {"model": ErrorResponse}})
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+@router.post(
+    "/login",
+    responses={401: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
+)
+async def login(user_data: UserLogin, db=Depends(get_service_db)):
     """Login user and return access token."""
     if not user_data.username or not user_data.password:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Username and password are required.",
         )
-    user_service = UserService(db)
-    user = user_service.authenticate_user(
-        user_data.username, user_data.password
-    )
+    user_service = AsyncUserService(db)
+    try:
+        user = await user_service.authenticate_user(
+            user_data.username, user_data.password
+        )
+    except PoolFullError as e:
+        raise _busy(e)
 
     if not user:
         raise HTTPException(
@@ -49,7 +83,13 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(
+        data={
+            "sub": user.username,
+            "user_id": user.id,
+            "is_admin": user.is_admin,
+        }
+    )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -58,9 +98,9 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     response_model=List[UserRead],
     responses={403: {"model": ErrorResponse}},
 )
-def list_users(
+async def list_users(
     current_user: UserRead = Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """List all users (admin only)."""
     if not current_user.is_admin:
@@ -69,74 +109,190 @@ def list_users(
             detail="Admin access required",
         )
 
-    user_service = UserService(db)
-    return user_service.get_all_users()
+    user_service = AsyncUserService(db)
+    return await user_service.get_all_users()
 
 
-@router.get("/admin/stats", responses={403: {"model": ErrorResponse}})
+@router.get(
+    "/admin/stats",
+    responses={403: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
+)
 def get_admin_stats(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort_by: str = Query("username"),
+    order: str = Query("asc"),
     current_user: UserRead = Depends(get_current_user_web),
     db: Session = Depends(get_db),
 ):
-    """Get system statistics (admin only)."""
+    """Get system statistics (admin only).
+
+    User activity is paged with limit and offset; pagination.has_more
+    says whether users remain after this page.
+    """
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
 
-    from app.models.user import User
-    from app.models.task import Task
+    stats_service = StatsService(db)
+    try:
+        user_stats = stats_service.get_user_activity(
+            limit=limit, offset=offset, sort_by=sort_by, order=order
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    system_overview = stats_service.get_system_overview()
+    total = system_overview["total_users"]
+
+    return {
+        "system_overview": system_overview,
+        "user_activity": user_stats,
+        "pagination": {
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "has_more": offset + len(user_stats) < total,
+        },
+    }
 
-    # Get basic stats
-    total_users = db.query(User).count()
-    total_tasks = db.query(Task).count()
-    active_tasks = (
-        db.query(Task).filter(Task.status.in_(["todo", "in_progress"])).count()
-    )
-    completed_tasks = db.query(Task).filter(Task.status == "done").count()
 
-    # Get user activity stats
-    user_stats = []
-    users = db.query(User).all()
-    for user in users:
-        user_task_count = (
-            db.query(Task).filter(Task.user_id == user.id).count()
+@router.get(
+    "/admin/profile",
+    response_class=PlainTextResponse,
+    responses={403: {"model": ErrorResponse}, 409: {"model": ErrorResponse}},
+)
+async def profile_worker(
+    seconds: float = Query(5, gt=0, le=settings.profiler_max_seconds),
+    interval_ms: float = Query(settings.profiler_interval_ms, ge=1, le=1000),
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """Sample this worker's stacks for a while (admin only).
+
+    Returns collapsed stacks, ready for flamegraph.pl or speedscope.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    try:
+        collapsed = await run_in_threadpool(
+            profile_for, seconds, interval_ms / 1000
         )
-        user_completed_count = (
-            db.query(Task)
-            .filter(Task.user_id == user.id, Task.status == "done")
-            .count()
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=str(e)
         )
+    return PlainTextResponse(collapsed)
 
-        completion_rate = 0
-        if user_task_count > 0:
-            completion_rate = round(
-                (user_completed_count / user_task_count * 100), 1
-            )
 
-        user_stats.append(
-            {
-                "username": user.username,
-                "is_admin": user.is_admin,
-                "total_tasks": user_task_count,
-                "completed_tasks": user_completed_count,
-                "completion_rate": completion_rate,
-            }
+@router.get(
+    "/admin/traces",
+    responses={403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+)
+async def recent_traces(
+    limit: int = Query(20, ge=1, le=settings.trace_memory_limit),
+    trace_id: Optional[str] = None,
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """Recent sampled traces from the in-memory exporter (admin only)."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
         )
 
-    return {
-        "system_overview": {
-            "total_users": total_users,
-            "total_tasks": total_tasks,
-            "active_tasks": active_tasks,
-            "completed_tasks": completed_tasks,
-            "completion_rate": round(
-                (completed_tasks / total_tasks * 100)
-                if total_tasks > 0
-                else 0,
-                1,
-            ),
-        },
-        "user_activity": user_stats,
-    }
+    exporter = get_exporter()
+    if not isinstance(exporter, InMemoryExporter):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="In-memory trace exporter is not enabled",
+        )
+    traces = list(exporter.traces)
+    if trace_id:
+        traces = [t for t in traces if t[0]["trace_id"] == trace_id]
+    return {"traces": traces[::-1][:limit]}
+
+
+@router.get("/admin/memory", responses={403: {"model": ErrorResponse}})
+async def memory_usage(
+    limit: int = Query(10, ge=1, le=100),
+    types: bool = False,
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """This worker's RSS, GC state and top allocation sites (admin only).
+
+    ``types=true`` also counts live objects by type, which pauses the
+    worker for as long as it takes to walk every object.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    return await run_in_threadpool(memory_report, limit, types)
+
+
+@router.post(
+    "/admin/memory/snapshot",
+    responses={403: {"model": ErrorResponse}, 409: {"model": ErrorResponse}},
+)
+async def memory_snapshot(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """Take a tracemalloc snapshot and diff it against the previous one."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    try:
+        growth = await run_in_threadpool(snapshot_diff, limit)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=str(e)
+        )
+    return {"baseline": growth is None, "growth": growth or []}
+
+
+@router.post(
+    "/admin/memory/tracemalloc", responses={403: {"model": ErrorResponse}}
+)
+async def enable_tracemalloc(
+    frames: int = Query(1, ge=1, le=50),
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """Start tracing allocations in this worker."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    start_tracemalloc(frames)
+    return tracemalloc_status()
+
+
+@router.delete(
+    "/admin/memory/tracemalloc", responses={403: {"model": ErrorResponse}}
+)
+async def disable_tracemalloc(
+    current_user: UserRead = Depends(get_current_user_web),
+):
+    """Stop tracing allocations in this worker."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    stop_tracemalloc()
+    return tracemalloc_status()
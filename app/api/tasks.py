@@ -1,14 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from typing import List, Optional
 from app.models.task import TaskCreate, TaskRead
 from app.core.security import get_current_user_web
-from app.core.database import get_db
-from app.services.task_service import TaskService
+from app.core.database import get_service_db
+from app.core.timing import TimedJinja2Templates
+from app.services.task_service import AsyncTaskService
 from pydantic import BaseModel, Field
 
-templates = Jinja2Templates(directory="app/templates")
+templates = TimedJinja2Templates(directory="app/templates")
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -22,10 +22,10 @@ class ErrorResponse(BaseModel):
     response_model=TaskRead,
     responses={401: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
 )
-def create_task(
+async def create_task(
     task: TaskCreate,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Create a new task."""
     if not task.title or not task.status:
@@ -33,21 +33,46 @@ def create_task(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Title and status are required.",
         )
-    task_service = TaskService(db)
-    return task_service.create_task(task, current_user)
+    task_service = AsyncTaskService(db)
+    return await task_service.create_task(task, current_user)
 
 
 @router.get(
     "/",
     response_model=List[TaskRead],
-    responses={401: {"model": ErrorResponse}},
+    responses={401: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
 )
-def list_tasks(
-    current_user=Depends(get_current_user_web), db: Session = Depends(get_db)
+async def list_tasks(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    updated_since: Optional[datetime] = None,
+    sort: str = "-created_at",
+    current_user=Depends(get_current_user_web),
+    db=Depends(get_service_db),
 ):
-    """Get all tasks for the current user."""
-    task_service = TaskService(db)
-    return task_service.get_user_tasks(current_user.id)
+    """Get a page of tasks for the current user.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    task_service = AsyncTaskService(db)
+    try:
+        tasks, next_cursor = await task_service.list_tasks(
+            current_user.id,
+            limit=limit,
+            cursor=cursor,
+            status=status_filter,
+            updated_since=updated_since,
+            sort=sort,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return tasks
 
 
 @router.get(
@@ -55,14 +80,14 @@ def list_tasks(
     response_model=TaskRead,
     responses={404: {"model": ErrorResponse}, 401: {"model": ErrorResponse}},
 )
-def get_task(
+async def get_task(
     task_id: int,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Get a specific task by ID."""
-    task_service = TaskService(db)
-    task = task_service.get_task_by_id(task_id, current_user.id)
+    task_service = AsyncTaskService(db)
+    task = await task_service.get_task_by_id(task_id, current_user.id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -77,11 +102,11 @@ def get_task(
         422: {"model": ErrorResponse},
     },
 )
-def update_task(
+async def update_task(
     task_id: int,
     task: TaskCreate,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Update a task."""
     if not task.title or not task.status:
@@ -89,8 +114,10 @@ def update_task(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Title and status are required.",
         )
-    task_service = TaskService(db)
-    updated_task = task_service.update_task(task_id, current_user.id, task)
+    task_service = AsyncTaskService(db)
+    updated_task = await task_service.update_task(
+        task_id, current_user.id, task
+    )
     if not updated_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return updated_task
@@ -100,14 +127,14 @@ def update_task(
     "/{task_id}",
     responses={404: {"model": ErrorResponse}, 401: {"model": ErrorResponse}},
 )
-def delete_task(
+async def delete_task(
     task_id: int,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Delete a task."""
-    task_service = TaskService(db)
-    success = task_service.delete_task(task_id, current_user.id)
+    task_service = AsyncTaskService(db)
+    success = await task_service.delete_task(task_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"success": True}
@@ -131,11 +158,11 @@ class TaskAssignment(BaseModel):
         422: {"model": ErrorResponse},
     },
 )
-def change_status(
+async def change_status(
     task_id: int,
     status_update: StatusUpdate,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Change task status."""
     if status_update.status not in ["todo", "in_progress", "done"]:
@@ -143,8 +170,8 @@ def change_status(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Invalid status value.",
         )
-    task_service = TaskService(db)
-    task = task_service.update_task_status(
+    task_service = AsyncTaskService(db)
+    task = await task_service.update_task_status(
         task_id, current_user.id, status_update.status
     )
     if not task:
@@ -162,11 +189,11 @@ def change_status(
         422: {"model": ErrorResponse},
     },
 )
-def assign_task(
+async def assign_task(
     task_id: int,
     assignment: TaskAssignment,
     current_user=Depends(get_current_user_web),
-    db: Session = Depends(get_db),
+    db=Depends(get_service_db),
 ):
     """Assign a task to a different user (admin only)."""
     if not current_user.is_admin:
@@ -175,8 +202,8 @@ def assign_task(
             detail="Only admins can assign tasks to users.",
         )
 
-    task_service = TaskService(db)
-    task = task_service.assign_task_to_user(task_id, assignment.user_id)
+    task_service = AsyncTaskService(db)
+    task = await task_service.assign_task_to_user(task_id, assignment.user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task or user not found")
 
@@ -0,0 +1,160 @@
+"""
+In-process caches shared by the services.
+"""
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """Bounded, thread-safe mapping whose entries expire after ttl seconds.
+
+    When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Entries dropped for space, and found expired on lookup
+        self.evictions = 0
+        self.expirations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return a live entry, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        """Store value, evicting the least recently used entry if full.
+
+        ttl overrides the cache's default lifetime for this entry.
+        """
+        if self.maxsize <= 0:
+            return
+        lifetime = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + lifetime)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop one entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls that share a key.
+
+    The first caller starts the call as a task; callers arriving while it
+    runs await the same task. A caller being cancelled does not cancel
+    the shared call, so the others still get its result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return True if a call for key is running."""
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class SQLiteCacheStore:
+    """Write-behind persistence of string cache entries in a SQLite file.
+
+    Entries are written by a background thread so callers never wait on
+    the disk; load() reads the unexpired ones back at startup.
+    """
+
+    def __init__(self, path: str, table: str = "cache_entries"):
+        self.path = path
+        self.table = table
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+        conn.close()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-writer", daemon=True
+        )
+        self._thread.start()
+
+    def load(self) -> List[tuple]:
+        """Drop expired rows; return (key, value, expires_at) for the rest.
+
+        expires_at is a time.time() timestamp.
+        """
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?",
+                (time.time(),),
+            )
+            rows = conn.execute(
+                f"SELECT key, value, expires_at FROM {self.table}"
+            ).fetchall()
+        conn.close()
+        return rows
+
+    def save(self, key: str, value: str, expires_at: float) -> None:
+        """Queue an entry for writing."""
+        self._queue.put((key, value, expires_at))
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path)
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} "
+                    "(key, value, expires_at) VALUES (?, ?, ?)",
+                    entry,
+                )
+                conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,73 @@
+"""
+Circuit breaker for calls to a flaky upstream.
+
+After ``failure_threshold`` consecutive failures the breaker opens and
+callers skip the upstream (serving a fallback) for ``reset_timeout``
+seconds. Then one trial call is let through: success closes the breaker,
+failure opens it again for another full timeout.
+"""
+import time
+import structlog
+
+logger = structlog.get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding for the state gauge on /metrics
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker; use from a single event loop."""
+
+    def __init__(
+        self, name: str, failure_threshold: int, reset_timeout: float
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_total = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the upstream now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        # Half-open: a single trial call at a time
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Circuit closed", breaker=self.name)
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Forget an allowed call that ended without reaching upstream."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened_total += 1
+                logger.warning(
+                    "Circuit opened", breaker=self.name, failures=self.failures
+                )
+            self.state = OPEN
+            self._opened_at = time.monotonic()
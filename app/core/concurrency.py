@@ -0,0 +1,62 @@
+"""
+Bounded thread pools for blocking work reached from the event loop.
+
+Sync endpoints and dependencies run in AnyIO's default thread pool, sized
+by ``settings.thread_pool_size``. (Gemini is called with the async
+client on the event loop and needs no threads.) Password hashing has a
+bounded executor that rejects work once its queue is full, so a login
+burst fails fast instead of piling up behind the CPU.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from anyio import to_thread
+from app.core.config import settings
+
+
+class PoolFullError(RuntimeError):
+    """Raised when a bounded executor has no room for more work."""
+
+
+class BoundedExecutor:
+    """Thread pool that accepts at most max_workers + max_queue calls."""
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.limit = max_workers + max_queue
+        # Only touched from the event loop, so no lock is needed
+        self.pending = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func on the pool, or raise PoolFullError immediately."""
+        if self.pending >= self.limit:
+            raise PoolFullError("Server busy, try again shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(context.run, func, *args)
+            )
+        finally:
+            self.pending -= 1
+
+
+hash_pool = BoundedExecutor(
+    settings.hash_max_concurrency, settings.hash_max_queue, "hash"
+)
+
+
+def configure_thread_pool():
+    """Size the default thread pool; call from inside the event loop."""
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.thread_pool_size
+
+
+async def run_in_hash_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Run password hashing on the bounded hash pool."""
+    return await hash_pool.run(func, *args)
@@ -5,16 +5,134 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./sprintsync.db"
+    # Serve the task/auth APIs from an asyncio engine (aiosqlite/asyncpg)
+    database_async: bool = False
+
+    # Connection pool (per engine; not used for in-memory SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800  # seconds, -1 to disable
+    db_pool_pre_ping: bool = True
+
+    # Statements slower than this are logged with their EXPLAIN plan
+    slow_query_threshold_ms: float = 200
+    slow_query_explain: bool = True
+
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268435456  # bytes
+    sqlite_cache_size: int = -64000  # negative means KiB
+    sqlite_busy_timeout_ms: int = 5000
 
     # Security
     secret_key: str = "your-secret-key-here"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Password hashing: "bcrypt" or "argon2" (needs argon2-cffi). Hashes
+    # made with other settings are upgraded on the user's next login.
+    password_hash_scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536  # KiB
+    # Hashing threads and how many more requests may wait before 503
+    hash_max_concurrency: int = 4
+    hash_max_queue: int = 32
+    # Authenticated user records cached in-process (entries, seconds)
+    auth_cache_size: int = 1024
+    auth_cache_ttl: float = 60
 
     # AI
     gemini_api_key: Optional[str] = None
     use_real_ai: bool = True
 
+    # Concurrency: worker threads for sync endpoints and dependencies,
+    # and a cap on concurrent Gemini calls so slow AI calls cannot
+    # starve them
+    thread_pool_size: int = 40
+    ai_max_concurrency: int = 8
+
+    # Gemini deadline per call (seconds, including the wait for a slot),
+    # and the circuit breaker: consecutive failures before serving
+    # fallbacks, and how long before trying Gemini again
+    ai_timeout: float = 20
+    ai_breaker_failure_threshold: int = 5
+    ai_breaker_reset_seconds: float = 30
+
+    # Draft-mode answer cache: entries, lifetime (seconds), and an
+    # optional SQLite file that keeps it across restarts
+    ai_cache_size: int = 1000
+    ai_cache_ttl: float = 86400
+    ai_cache_path: Optional[str] = None
+
+    # Batch drafting: most titles, and title characters, per Gemini call
+    ai_batch_max_titles: int = 20
+    ai_batch_max_chars: int = 4000
+
+    # Precomputed daily plans: whether the nightly run happens and its
+    # UTC hour, how recently a user must have touched a task to get one,
+    # and the most Gemini calls per minute the run may make
+    plan_precompute_enabled: bool = True
+    plan_precompute_hour: int = 3
+    plan_active_days: int = 7
+    plan_precompute_rate: float = 30
+
+    # Logging: JSON to stdout and a rotating file, written by a
+    # background thread. Successful fast requests are sampled at
+    # log_sample_rate; errors and slow requests are always logged.
+    log_file: str = "app.log"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_rotate_when: Optional[str] = None  # e.g. "midnight": rotate by time
+    log_queue_size: int = 10000
+    log_sample_rate: float = 1.0
+    log_slow_request_ms: float = 1000
+
+    # Stack sampler: default interval for /auth/admin/profile, its
+    # longest allowed run, and the interval for X-Profile requests
+    profiler_interval_ms: float = 10
+    profiler_max_seconds: float = 60
+    profiler_request_interval_ms: float = 1
+
+    # Event-loop monitor: probe interval, and how long the loop must be
+    # stuck before the blocking stack is logged
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: float = 100
+    loop_block_threshold_ms: float = 500
+
+    # Memory: trace allocations from startup with this many frames per
+    # traceback (0 = only when started from /auth/admin/memory), and
+    # log a warning when a worker's RSS passes memory_warn_rss_mb
+    tracemalloc_frames: int = 0
+    memory_warn_rss_mb: Optional[float] = None
+
+    # Health probes: dependency check intervals (seconds), how long a
+    # check may take, and the DB pool usage and threadpool backlog
+    # (tasks waiting for a thread) at which a worker reports itself not
+    # ready
+    health_check_interval: float = 5
+    health_ai_check_interval: float = 60
+    health_check_timeout: float = 3
+    readiness_saturation_threshold: float = 0.9
+    readiness_thread_pool_waiting: int = 20
+
+    # Multi-worker metrics: every worker writes snapshots to this shared
+    # directory (clear it before starting the server) and /metrics merges
+    # them
+    metrics_multiproc_dir: Optional[str] = None
+    metrics_flush_interval: float = 5  # seconds
+
+    # Tracing: fraction of traces recorded, whether an inbound
+    # traceparent's sampled flag decides instead (only behind a trusted
+    # proxy), and where finished traces go: "memory" (see
+    # /auth/admin/traces), "file" (JSON lines) or "none"
+    trace_sample_rate: float = 0.1
+    trace_trust_inbound_sampled: bool = False
+    trace_exporter: str = "memory"
+    trace_file: str = "traces.jsonl"
+    trace_memory_limit: int = 200  # traces kept by the memory exporter
+
     # App
     debug: bool = True
     app_name: str = "SprintSync"
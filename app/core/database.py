@@ -1,15 +1,269 @@
-from sqlalchemy import create_engine
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+import structlog
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.timing import record_timing
+from app.core.tracing import start_span
+from app.middleware.metrics import Histogram
+
+logger = structlog.get_logger()
+
+# Connection pool counters, exported on /metrics
+pool_stats = {
+    "checkouts": 0,
+    "timeouts": 0,
+    "wait_seconds_sum": 0.0,
+    "wait_seconds_max": 0.0,
+}
+_pool_stats_lock = threading.Lock()
+
+
+def _record_checkout_wait(wait: float, timed_out: bool = False):
+    """Record how long a caller waited for a pooled connection."""
+    with _pool_stats_lock:
+        if timed_out:
+            pool_stats["timeouts"] += 1
+        else:
+            pool_stats["checkouts"] += 1
+        pool_stats["wait_seconds_sum"] += wait
+        pool_stats["wait_seconds_max"] = max(
+            pool_stats["wait_seconds_max"], wait
+        )
+
+
+def _timed_checkout(do_get):
+    """Check out a connection with do_get, recording the wait."""
+    start = time.perf_counter()
+    try:
+        connection = do_get()
+    except PoolTimeoutError:
+        _record_checkout_wait(time.perf_counter() - start, timed_out=True)
+        raise
+    _record_checkout_wait(time.perf_counter() - start)
+    return connection
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time and timeouts."""
+
+    def _do_get(self):
+        return _timed_checkout(super()._do_get)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time and timeouts."""
+
+    def _do_get(self):
+        return _timed_checkout(super()._do_get)
+
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def engine_options(database_url: str, use_async: bool = False) -> dict:
+    """Build create_engine keyword arguments from settings."""
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if make_url(database_url).get_backend_name() == "sqlite":
+        if not use_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(database_url):
+            # In-memory databases live in a single connection; keep the
+            # dialect's default pool for them
+            return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool
+        if use_async
+        else InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    return options
+
+
+def apply_sqlite_pragmas(engine: Engine):
+    """Apply performance pragmas to every new SQLite connection."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not _is_memory_sqlite(str(engine.url)):
+            cursor.execute(
+                f"PRAGMA journal_mode={settings.sqlite_journal_mode}"
+            )
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+        cursor.execute(
+            f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}"
+        )
+        cursor.close()
+
+
+# Per-statement latency, exported on /metrics
+query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency in seconds by normalized statement",
+    ("statement",),
+)
+# Distinct statements tracked before new ones are folded into "<other>"
+MAX_STATEMENT_FINGERPRINTS = 500
+MAX_STATEMENT_LABEL_LENGTH = 200
+
+# Query count and DB time of the current request (set by the middleware)
+query_stats: ContextVar[Optional[dict]] = ContextVar(
+    "query_stats", default=None
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_IN_LIST = re.compile(r"IN \(\?(?:\s*,\s*\?)*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_fingerprints = set()
+_fingerprints_lock = threading.Lock()
+
+
+def track_queries() -> dict:
+    """Start counting queries for the current request; returns the stats."""
+    stats = {"count": 0, "seconds": 0.0}
+    query_stats.set(stats)
+    return stats
+
+
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape: literals and IN lists become ?."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("IN (?)", statement)
+
+
+def _statement_label(normalized: str) -> str:
+    """Bound the number and length of statement labels."""
+    label = normalized[:MAX_STATEMENT_LABEL_LENGTH]
+    with _fingerprints_lock:
+        if label in _fingerprints:
+            return label
+        if len(_fingerprints) >= MAX_STATEMENT_FINGERPRINTS:
+            return "<other>"
+        _fingerprints.add(label)
+    return label
+
+
+def _explain(dialect_name: str, cursor, statement, parameters):
+    """Return the plan of a statement as text lines, or None."""
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+    if dialect_name not in prefix:
+        return None
+    if (
+        not statement.lstrip()
+        .upper()
+        .startswith(("SELECT", "WITH", "UPDATE", "DELETE"))
+    ):
+        return None
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute(prefix[dialect_name] + statement, parameters)
+        rows = plan_cursor.fetchall()
+    finally:
+        plan_cursor.close()
+    column = 3 if dialect_name == "sqlite" else 0
+    return [str(row[column]) for row in rows]
+
+
+def instrument_engine(engine: Engine):
+    """Time every statement: request totals, histograms, slow-query log.
+
+    Statements in a sampled trace also get a "db.query" span.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, many):
+        query_span = start_span("db.query", db_system=engine.dialect.name)
+        conn.info.setdefault("query_start", []).append(
+            (time.perf_counter(), query_span)
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, many):
+        start, query_span = conn.info["query_start"].pop()
+        elapsed = time.perf_counter() - start
+
+        stats = query_stats.get()
+        if stats is not None:
+            stats["count"] += 1
+            stats["seconds"] += elapsed
+        record_timing("db", elapsed)
+
+        normalized = normalize_sql(statement)
+        query_duration.observe(elapsed, _statement_label(normalized))
+        if query_span is not None:
+            query_span.set_attribute("db_statement", normalized)
+            query_span.end()
+
+        if elapsed * 1000 < settings.slow_query_threshold_ms:
+            return
+        plan = None
+        if settings.slow_query_explain and not many:
+            try:
+                plan = _explain(
+                    engine.dialect.name, cursor, statement, parameters
+                )
+            except Exception:
+                plan = None
+        logger.warning(
+            "Slow query",
+            statement=normalized,
+            duration_ms=round(elapsed * 1000, 1),
+            plan=plan,
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def discard_timer(context):
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                _, query_span = starts.pop()
+                if query_span is not None:
+                    query_span.set_attribute("error", True)
+                    query_span.end()
+
 
 # Create database engine
 engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}
-    if "sqlite" in settings.database_url
-    else {},
+    settings.database_url, **engine_options(settings.database_url)
 )
+apply_sqlite_pragmas(engine)
+instrument_engine(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,6 +271,16 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create base class for models
 Base = declarative_base()
 
+# INSERT ... ON CONFLICT constructs for the supported databases
+UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# Async drivers for each sync backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Created on first use so sync-only deployments need no async driver
+_async_engine = None
+_async_session_factory = None
+
 
 def get_db():
     """Dependency to get database session."""
@@ -25,3 +289,75 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto its asyncio driver."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(
+        drivername=f"{backend}+{ASYNC_DRIVERS[backend]}"
+    ).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the shared async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        database_url = async_database_url(settings.database_url)
+        _async_engine = create_async_engine(
+            database_url, **engine_options(database_url, use_async=True)
+        )
+        apply_sqlite_pragmas(_async_engine.sync_engine)
+        instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Get the AsyncSession factory bound to the async engine."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        # Keep attributes loaded after commit; lazy refresh would need IO
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's connections, if it was ever created."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+# Session dependency for services used by both sync and async routes
+get_service_db = get_async_db if settings.database_async else get_db
+
+
+def get_pool_status() -> dict:
+    """Get current pool gauges for the sync (and async, if used) engine."""
+    status = {}
+    engines = [("sync", engine)]
+    if _async_engine is not None:
+        engines.append(("async", _async_engine.sync_engine))
+    for name, pooled_engine in engines:
+        pool = pooled_engine.pool
+        if isinstance(pool, QueuePool):
+            status[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "capacity": pool.size() + max(settings.db_max_overflow, 0),
+            }
+    return status
@@ -0,0 +1,205 @@
+"""
+Liveness and readiness state for the health probes.
+
+Dependency checks (database round trip, Gemini reachability) run on a
+background task and the probes only read the cached results, so probe
+traffic never touches the database or the AI API. Saturation (pool,
+thread-pool and hash-pool pressure) is computed from in-memory gauges at
+probe time, so load balancers see it without delay.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+import structlog
+from anyio import to_thread
+from sqlalchemy import text
+from app.core.concurrency import hash_pool
+from app.core.config import settings
+from app.core.database import engine, get_pool_status
+from app.core.loop_monitor import loop_stats
+
+logger = structlog.get_logger()
+
+
+def _result(status: str, start: float, error: Optional[str] = None) -> dict:
+    return {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "error": error,
+        "checked_at": time.time(),
+    }
+
+
+def check_database() -> dict:
+    """Run SELECT 1 on a pooled connection."""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return _result("down", start, str(e))
+    return _result("up", start)
+
+
+def check_ai() -> dict:
+    """Fetch the model's metadata from Gemini (no tokens are spent)."""
+    from app.services.ai_service import GEMINI_MODEL, ai_service
+
+    start = time.perf_counter()
+    if ai_service.client is None:
+        return _result("disabled", start)
+    try:
+        ai_service.client.models.get(model=GEMINI_MODEL)
+    except Exception as e:
+        return _result("down", start, str(e))
+    return _result("up", start)
+
+
+def saturation() -> dict:
+    """Current load on the pools requests wait for."""
+    return {
+        "db_pool": {
+            name: round(status["checked_out"] / status["capacity"], 2)
+            for name, status in get_pool_status().items()
+            if status["capacity"]
+        },
+        "thread_pool_waiting": loop_stats["thread_pool_waiting"],
+        "hash_pool": round(hash_pool.pending / hash_pool.limit, 2),
+    }
+
+
+class HealthChecker:
+    """Run dependency checks periodically and keep the latest results.
+
+    checks maps a name to (function, interval seconds, critical). Only
+    critical checks affect readiness; the others degrade the status.
+    """
+
+    def __init__(self, checks: Dict[str, tuple], timeout: float):
+        self.checks = checks
+        self.timeout = timeout
+        self.results: Dict[str, dict] = {}
+        self._due = {name: 0.0 for name in checks}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Run every check once, then keep them fresh in the background."""
+        await self.run_due_checks()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def run_due_checks(self) -> None:
+        now = time.monotonic()
+        due = [name for name, at in self._due.items() if at <= now]
+        for name in due:
+            function, interval, _ = self.checks[name]
+            self._due[name] = now + interval
+            self.results[name] = await self._run_check(function)
+
+    async def _run_check(self, function: Callable[[], dict]) -> dict:
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                to_thread.run_sync(function), self.timeout
+            )
+        except asyncio.TimeoutError:
+            return _result("down", start, "timed out")
+
+    async def _run(self) -> None:
+        interval = min(interval for _, interval, _ in self.checks.values())
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.run_due_checks()
+            except Exception:
+                logger.error("Health check failed", exc_info=True)
+
+    def readiness(self) -> dict:
+        """Combine cached check results with live saturation."""
+        reasons: List[str] = []
+        now = time.time()
+        for name, (_, interval, critical) in self.checks.items():
+            result = self.results.get(name)
+            if not critical:
+                continue
+            if result is None:
+                reasons.append(f"{name}: not checked yet")
+            elif result["status"] == "down":
+                reasons.append(f"{name}: down")
+            elif now - result["checked_at"] > 3 * interval + self.timeout:
+                reasons.append(f"{name}: result is stale")
+
+        load = saturation()
+        threshold = settings.readiness_saturation_threshold
+        for name, used in load["db_pool"].items():
+            if used >= threshold:
+                reasons.append(f"db_pool {name} saturated")
+        # A few queued tasks are normal in a burst; only a sustained
+        # backlog should take the worker out of rotation
+        if (
+            load["thread_pool_waiting"]
+            >= settings.readiness_thread_pool_waiting
+        ):
+            reasons.append("thread pool saturated")
+        if load["hash_pool"] >= 1:
+            reasons.append("hash pool saturated")
+
+        degraded = any(
+            result["status"] == "down" for result in self.results.values()
+        )
+        if reasons:
+            status = "not_ready"
+        else:
+            status = "degraded" if degraded else "ready"
+        return {
+            "status": status,
+            "reasons": reasons,
+            "checks": self.results,
+            "saturation": load,
+        }
+
+
+_checker: Optional[HealthChecker] = None
+
+
+async def start_health_checker() -> None:
+    """Start background dependency checks with intervals from settings."""
+    global _checker
+    if _checker is None:
+        _checker = HealthChecker(
+            {
+                "database": (
+                    check_database,
+                    settings.health_check_interval,
+                    True,
+                ),
+                "ai": (check_ai, settings.health_ai_check_interval, False),
+            },
+            settings.health_check_timeout,
+        )
+        await _checker.start()
+
+
+async def stop_health_checker() -> None:
+    global _checker
+    if _checker is not None:
+        await _checker.stop()
+        _checker = None
+
+
+def get_readiness() -> dict:
+    """Latest readiness report; not ready before checks have started."""
+    if _checker is None:
+        return {
+            "status": "not_ready",
+            "reasons": ["health checks not running"],
+            "checks": {},
+            "saturation": saturation(),
+        }
+    return _checker.readiness()
@@ -0,0 +1,138 @@
+"""
+Event-loop lag and thread-pool saturation monitor.
+
+A probe coroutine sleeps for a fixed interval and records how late it
+wakes up (scheduling lag), sampling the thread pools' load on each tick
+and checking RSS against MEMORY_WARN_RSS_MB. A watchdog thread notices
+when the probe has not run for longer than the block threshold and logs
+the event-loop thread's stack while it is still blocked, which points at
+the offending call.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+import structlog
+from anyio import to_thread
+from app.core.concurrency import hash_pool
+from app.core.config import settings
+from app.core.memory import RssGuard
+from app.middleware.metrics import Histogram
+
+logger = structlog.get_logger()
+
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the loop probe was due and when it ran",
+    (),
+)
+
+# Latest readings, exported on /metrics
+loop_stats = {
+    "lag_seconds": 0.0,
+    "blocked_total": 0,
+    "thread_pool_busy": 0,
+    "thread_pool_size": 0,
+    "thread_pool_waiting": 0,
+    "hash_pool_in_flight": 0,
+}
+
+
+class LoopMonitor:
+    """Probe task plus watchdog thread for one event loop."""
+
+    def __init__(self, interval: float, block_threshold: float):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._rss_guard = (
+            RssGuard(int(settings.memory_warn_rss_mb * 2**20))
+            if settings.memory_warn_rss_mb
+            else None
+        )
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start monitoring the running loop; call from inside it."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._watchdog.join()
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        limiter = to_thread.current_default_thread_limiter()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - due, 0.0)
+            self._heartbeat = time.monotonic()
+            event_loop_lag.observe(lag)
+
+            statistics = limiter.statistics()
+            loop_stats.update(
+                lag_seconds=lag,
+                thread_pool_busy=statistics.borrowed_tokens,
+                thread_pool_size=statistics.total_tokens,
+                thread_pool_waiting=statistics.tasks_waiting,
+                hash_pool_in_flight=hash_pool.pending,
+            )
+            if self._rss_guard is not None:
+                self._rss_guard.check()
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.block_threshold or reported == heartbeat:
+                continue
+            # Report each stall once, with the stack as it is right now
+            reported = heartbeat
+            loop_stats["blocked_total"] += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            logger.warning(
+                "Event loop blocked",
+                blocked_ms=int(blocked * 1000),
+                stack="".join(traceback.format_stack(frame))
+                if frame
+                else None,
+            )
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> None:
+    """Start the monitor on the running loop if enabled in settings."""
+    global _monitor
+    if settings.loop_monitor_enabled and _monitor is None:
+        _monitor = LoopMonitor(
+            settings.loop_monitor_interval_ms / 1000,
+            settings.loop_block_threshold_ms / 1000,
+        )
+        _monitor.start()
+
+
+async def stop_loop_monitor() -> None:
+    """Stop the probe and the watchdog."""
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
@@ -0,0 +1,209 @@
+"""
+Process memory diagnostics: RSS, garbage collector state, live object
+counts and tracemalloc allocation sites.
+
+tracemalloc slows allocation-heavy code down, so it only runs when
+TRACEMALLOC_FRAMES is set or an admin starts it. Each snapshot is kept
+as the baseline for the next one; diffing two snapshots taken a few
+hundred requests apart shows which lines keep memory alive.
+"""
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# Allocations made by tracemalloc and the import system are noise
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# Exported on /metrics
+memory_stats = {"rss_warnings": 0}
+
+_snapshot_lock = threading.Lock()
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+def peak_rss_bytes() -> int:
+    """Highest resident set size this process has reached."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_bytes() -> int:
+    """Current resident set size (the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def gc_stats() -> List[dict]:
+    """Per-generation collector counters, pending counts and thresholds."""
+    counts = gc.get_count()
+    thresholds = gc.get_threshold()
+    return [
+        {
+            "generation": generation,
+            **stats,
+            "pending": counts[generation],
+            "threshold": thresholds[generation],
+        }
+        for generation, stats in enumerate(gc.get_stats())
+    ]
+
+
+def object_counts(limit: int) -> List[dict]:
+    """Most common live object types tracked by the collector.
+
+    Walks every tracked object while holding the GIL; admin use only.
+    """
+    counts = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+    return [
+        {"type": name, "count": count}
+        for name, count in counts.most_common(limit)
+    ]
+
+
+def tracemalloc_status() -> dict:
+    """Whether tracemalloc runs, and how much memory it has traced."""
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": traced,
+        "peak_traced_bytes": peak,
+    }
+
+
+def start_tracemalloc(frames: int) -> None:
+    """Start tracing allocations, keeping frames frames per traceback."""
+    global _baseline
+    if tracemalloc.is_tracing():
+        return
+    tracemalloc.start(frames)
+    _baseline = None
+
+
+def stop_tracemalloc() -> None:
+    """Stop tracing and drop the saved snapshot."""
+    global _baseline
+    tracemalloc.stop()
+    _baseline = None
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def top_allocations(limit: int) -> List[dict]:
+    """Source lines holding the most traced memory right now."""
+    if not tracemalloc.is_tracing():
+        return []
+    statistics = _take_snapshot().statistics("lineno")
+    return [
+        {
+            "site": _site(stat.traceback),
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in statistics[:limit]
+    ]
+
+
+def snapshot_diff(limit: int) -> Optional[List[dict]]:
+    """Diff a new snapshot against the previous one, which it replaces.
+
+    Returns None on the first call, which only records the baseline.
+    Raises RuntimeError if tracemalloc is not running.
+    """
+    global _baseline
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running")
+
+    with _snapshot_lock:
+        snapshot = _take_snapshot()
+        previous, _baseline = _baseline, snapshot
+    if previous is None:
+        return None
+    return [
+        {
+            "site": _site(stat.traceback),
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in snapshot.compare_to(previous, "lineno")[:limit]
+    ]
+
+
+def memory_report(limit: int, include_types: bool = False) -> dict:
+    """Everything the admin memory endpoint shows."""
+    report = {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "gc": gc_stats(),
+        "gc_tracked_objects": len(gc.get_objects()),
+        "tracemalloc": tracemalloc_status(),
+        "top_allocations": top_allocations(limit),
+    }
+    if include_types:
+        report["object_types"] = object_counts(limit)
+    return report
+
+
+class RssGuard:
+    """Warn once each time RSS rises past a ceiling.
+
+    check() is cheap enough for a periodic probe; it reads /proc at most
+    once per interval.
+    """
+
+    def __init__(self, limit_bytes: int, interval: float = 1.0):
+        self.limit_bytes = limit_bytes
+        self.interval = interval
+        self.tripped = False
+        self._last_check = 0.0
+
+    def check(self) -> None:
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return
+        self._last_check = now
+
+        rss = rss_bytes()
+        if rss < self.limit_bytes:
+            self.tripped = False
+            return
+        if not self.tripped:
+            self.tripped = True
+            memory_stats["rss_warnings"] += 1
+            logger.warning(
+                "Memory above threshold",
+                rss_mb=round(rss / 2**20, 1),
+                limit_mb=round(self.limit_bytes / 2**20, 1),
+                gc_counts=gc.get_count(),
+                tracemalloc=tracemalloc.is_tracing(),
+            )
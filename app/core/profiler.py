@@ -0,0 +1,91 @@
+"""
+Statistical stack sampler for live workers.
+
+A background thread snapshots every thread's Python stack at a fixed
+interval via sys._current_frames() and counts identical stacks. Output
+is in collapsed-stack format ("frame;frame;frame count" per line), which
+flamegraph.pl, speedscope and inferno read directly.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Only one sampler runs at a time; overlapping profiles would skew both
+profiler_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when another profile is already running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = os.path.basename(code.co_filename)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sample all threads' stacks every interval seconds until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        # Time spent walking stacks (with the GIL held): the overhead
+        self.sampling_seconds = 0.0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def __enter__(self) -> "StackSampler":
+        if not profiler_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        profiler_lock.release()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self.sampling_seconds += time.perf_counter() - start
+
+    def collapsed(self) -> str:
+        """Return the samples in collapsed-stack format."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self._stacks.most_common()
+        )
+
+
+def profile_for(seconds: float, interval: float) -> str:
+    """Sample the whole process for seconds; blocks the calling thread."""
+    with StackSampler(interval) as sampler:
+        time.sleep(seconds)
+    return sampler.collapsed()
+
+
+def profile_header(value: Optional[str]) -> bool:
+    """Return True if an X-Profile header value requests profiling."""
+    return (value or "").lower() in ("1", "true", "yes")
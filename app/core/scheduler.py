@@ -0,0 +1,122 @@
+"""
+In-process scheduler for periodic background jobs.
+
+Jobs are coroutines run on the event loop at a fixed UTC time of day, so
+heavy work (like precomputing AI answers) happens off-peak instead of
+inside requests. Every worker schedules every job, but a job given a
+session factory first claims the day's run in the job_runs table; only
+the worker whose claim succeeds runs it, the others skip that day.
+"""
+import asyncio
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+import structlog
+from anyio import to_thread
+from app.core.database import UPSERTS
+from app.models.job_run import JobRun
+
+logger = structlog.get_logger()
+
+
+def claim_run(session_factory, name: str, day: date) -> bool:
+    """Record that this worker runs job name for day.
+
+    Returns False if another worker has already claimed it.
+    """
+    db = session_factory()
+    try:
+        insert = UPSERTS[db.get_bind().dialect.name]
+        result = db.execute(
+            insert(JobRun)
+            .values(name=name, run_date=day, worker_pid=os.getpid())
+            .on_conflict_do_nothing()
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+
+class DailyJob:
+    """Run an async function once a day at hour:00 UTC.
+
+    With session_factory set, runs are claimed through claim_run so only
+    one worker runs each day's job.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        hour: int,
+        function: Callable[[], Awaitable[dict]],
+        session_factory=None,
+    ):
+        self.name = name
+        self.hour = hour
+        self.function = function
+        self.session_factory = session_factory
+        self.runs = 0
+        self.failures = 0
+        self.last_result: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        next_run = now.replace(
+            hour=self.hour, minute=0, second=0, microsecond=0
+        )
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def claim(self) -> bool:
+        """Claim today's run; True if this worker should run the job."""
+        if self.session_factory is None:
+            return True
+        day = datetime.now(timezone.utc).date()
+        try:
+            claimed = await to_thread.run_sync(
+                claim_run, self.session_factory, self.name, day
+            )
+        except Exception:
+            logger.error("Could not claim job", job=self.name, exc_info=True)
+            return False
+        if not claimed:
+            logger.info("Job claimed by another worker", job=self.name)
+        return claimed
+
+    async def run_once(self) -> Optional[dict]:
+        """Run the job now; failures are logged, not raised."""
+        start = time.perf_counter()
+        self.runs += 1
+        try:
+            self.last_result = await self.function()
+        except Exception:
+            self.failures += 1
+            logger.error("Scheduled job failed", job=self.name, exc_info=True)
+            return None
+        logger.info(
+            "Scheduled job finished",
+            job=self.name,
+            duration_s=round(time.perf_counter() - start, 1),
+            **self.last_result,
+        )
+        return self.last_result
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            if await self.claim():
+                await self.run_once()
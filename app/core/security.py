@@ -1,26 +1,139 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from itertools import chain
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.timing import timed
 from app.models.user import User
 
+PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context() -> CryptContext:
+    """Build the CryptContext from settings.
+
+    The configured scheme hashes new passwords; the other one is kept
+    only to verify, and flag for upgrade, existing hashes.
+    """
+    if settings.password_hash_scheme not in PASSWORD_SCHEMES:
+        raise ValueError(
+            "Invalid password_hash_scheme. Must be one of: "
+            + ", ".join(PASSWORD_SCHEMES)
+        )
+    schemes = [settings.password_hash_scheme] + [
+        scheme
+        for scheme in PASSWORD_SCHEMES
+        if scheme != settings.password_hash_scheme
+    ]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=settings.bcrypt_rounds,
+        argon2__type="ID",
+        argon2__time_cost=settings.argon2_time_cost,
+        argon2__memory_cost=settings.argon2_memory_cost,
+    )
+
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_password_context()
 
 # JWT token scheme
 security = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class AuthUser:
+    """The authenticated user's identity, detached from any session."""
+
+    id: int
+    username: str
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(id=user.id, username=user.username, is_admin=user.is_admin)
+
+
+# Authenticated users by username, so steady-state auth needs no query
+user_cache = TTLCache(
+    maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl
+)
+
+# Marks request.state.auth_claims as not decoded yet
+_UNSET = object()
+
+
+# Session.info keys for auth cache entries to drop when the session
+# commits: changed usernames, and whether to clear the whole cache
+_STALE_USERS = "auth_cache_stale_users"
+_CLEAR_USERS = "auth_cache_clear"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    """Remember users changed or deleted by this flush."""
+    for target in chain(session.dirty, session.deleted):
+        if not isinstance(target, User):
+            continue
+        state = inspect(target)
+        username = state.dict.get("username")
+        if username is None:
+            session.info[_CLEAR_USERS] = True
+            continue
+        stale = session.info.setdefault(_STALE_USERS, set())
+        stale.add(username)
+        stale.update(state.attrs.username.history.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_change(orm_execute_state):
+    """Bulk UPDATE/DELETE of users clears the whole cache on commit."""
+    if (
+        orm_execute_state.is_update or orm_execute_state.is_delete
+    ) and orm_execute_state.bind_mapper is inspect(User):
+        orm_execute_state.session.info[_CLEAR_USERS] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    """Drop users changed by the committed transaction from the cache.
+
+    Done at commit rather than flush, so concurrent requests cannot
+    cache the old row again and rolled-back changes evict nothing.
+    """
+    if session.info.pop(_CLEAR_USERS, False):
+        user_cache.clear()
+    for username in session.info.pop(_STALE_USERS, ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session):
+    session.info.pop(_CLEAR_USERS, None)
+    session.info.pop(_STALE_USERS, None)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the old one is stale."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
@@ -53,97 +166,105 @@ def decode_token(token: str):
         return None
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user."""
-    token = credentials.credentials
-    payload = decode_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+def get_request_token(request: Request) -> Optional[str]:
+    """Get the token from the cookie, falling back to a Bearer header."""
+    token = request.cookies.get("token")
+    if not token:
+        auth_header = request.headers.get("authorization")
+        if auth_header and auth_header.lower().startswith("bearer "):
+            token = auth_header.split(" ", 1)[1]
+    return token
+
+
+def get_token_claims(request: Request) -> Optional[dict]:
+    """Get the request's token claims, decoding at most once per request."""
+    claims = getattr(request.state, "auth_claims", _UNSET)
+    if claims is _UNSET:
+        token = get_request_token(request)
+        claims = decode_token(token) if token else None
+        request.state.auth_claims = claims
+    return claims
 
-    username: str = payload.get("sub")
+
+def resolve_user(db: Session, claims: Optional[dict]) -> Optional[AuthUser]:
+    """Get the user named by token claims, from the cache when possible."""
+    username = claims.get("sub") if claims else None
     if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        return None
 
-    user = db.query(User).filter(User.username == username).first()
+    user = user_cache.get(username)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        record = db.query(User).filter(User.username == username).first()
+        if record is None:
+            return None
+        user = AuthUser.from_user(record)
+        user_cache.set(username, user)
 
+    # A token for a deleted account must not match a reused username
+    if claims.get("user_id", user.id) != user.id:
+        return None
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> AuthUser:
+    """Get current authenticated user."""
+    with timed("auth"):
+        token = credentials.credentials
+        payload = decode_token(token)
+        if payload is None or payload.get("sub") is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        user = resolve_user(db, payload)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        return user
+
+
 def get_current_user_from_cookie(
     request: Request, db: Session = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[AuthUser]:
     """Get current user from cookie token."""
-    token = request.cookies.get("token")
-
-    if not token:
+    if not request.cookies.get("token"):
         return None
 
     try:
-        payload = decode_token(token)
-        if payload:
-            username = payload.get("sub")
-            if username:
-                return db.query(User).filter(User.username == username).first()
+        with timed("auth"):
+            return resolve_user(db, get_token_claims(request))
     except Exception:
-        pass
-
-    return None
+        return None
 
 
 def get_current_user_web(
     request: Request, db: Session = Depends(get_db)
-) -> User:
+) -> AuthUser:
     """Get current user from either cookie or Authorization header."""
-    # Try cookie first (for web interface)
-    token = request.cookies.get("token")
-
-    if not token:
-        # Try Authorization header (for API calls)
-        auth_header = request.headers.get("authorization")
-        if auth_header and auth_header.lower().startswith("bearer "):
-            token = auth_header.split(" ", 1)[1]
-
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    with timed("auth"):
+        return _authenticate_request(request, db)
 
-    payload = decode_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    username: str = payload.get("sub")
-    if username is None:
+def _authenticate_request(request: Request, db: Session) -> AuthUser:
+    """Resolve the request's user or raise 401."""
+    payload = get_token_claims(request)
+    if payload is None or payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, payload)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,75 @@
+"""
+Request-scoped phase timers, reported in the Server-Timing header.
+
+The observability middleware starts a timing dict per request; code on
+the request path adds to a phase with ``timed("phase")`` or
+``record_timing``. Worker threads started through AnyIO inherit the
+context, so their time lands on the same request; the async Gemini call
+runs on the request's own task and is timed as "ai". Outside a request
+both are no-ops. ``timed`` blocks are also trace spans.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from fastapi.responses import JSONResponse
+from fastapi.templating import Jinja2Templates
+from app.core.tracing import span
+
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timing() -> Dict[str, float]:
+    """Start collecting phase timings for the current request."""
+    timings = {}
+    request_timings.set(timings)
+    return timings
+
+
+def record_timing(phase: str, seconds: float) -> None:
+    """Add seconds to a phase of the current request, if any."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str, **attributes):
+    """Time the enclosed block (or decorated function) as phase.
+
+    In a sampled trace the block is also a span named phase.
+    """
+    start = time.perf_counter()
+    try:
+        with span(phase, **attributes):
+            yield
+    finally:
+        record_timing(phase, time.perf_counter() - start)
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """Format timings (seconds) as a Server-Timing header value."""
+    entries = [
+        f"{phase};dur={seconds * 1000:.1f}"
+        for phase, seconds in timings.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that times body encoding as "serialization"."""
+
+    def render(self, content) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
+
+
+class TimedJinja2Templates(Jinja2Templates):
+    """Jinja2Templates that times rendering as "template"."""
+
+    def TemplateResponse(self, *args, **kwargs):
+        with timed("template"):
+            return super().TemplateResponse(*args, **kwargs)
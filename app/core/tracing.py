@@ -0,0 +1,230 @@
+"""
+Lightweight in-process tracing with W3C trace context propagation.
+
+Each request gets a root span, continuing the caller's trace when a
+valid ``traceparent`` header is present. Sampling is decided once at the
+head of the trace (the caller's sampled flag wins, otherwise
+``settings.trace_sample_rate``); unsampled requests still propagate ids
+but record nothing. Finished traces go to a pluggable exporter: in
+memory (inspectable via /auth/admin/traces) or JSON lines in a file.
+"""
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, List, Optional
+from app.core.config import settings
+
+_TRACEPARENT = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$"
+)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "_finished",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        finished: list,
+        attributes: Optional[dict] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        # Spans of this trace that have ended, shared by the whole trace
+        self._finished = finished
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled:
+                self._finished.append(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar(
+    "current_span", default=None
+)
+
+
+def parse_traceparent(value: Optional[str]):
+    """Return (trace_id, parent_id, sampled) or None if invalid."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if not match:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or set(trace_id) == {"0"} or set(parent_id) == {"0"}:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def format_traceparent(span: Span) -> str:
+    """Format the traceparent header that makes span the caller's parent."""
+    flags = "01" if span.sampled else "00"
+    return f"00-{span.trace_id}-{span.span_id}-{flags}"
+
+
+def start_trace(traceparent: Optional[str], name: str) -> Span:
+    """Create a request's root span, continuing an inbound trace.
+
+    The inbound sampled flag is only honoured with
+    trace_trust_inbound_sampled; otherwise any client could have every
+    request recorded. Untrusted traces are sampled at trace_sample_rate.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent:
+        trace_id, parent_id, sampled = parent
+        if settings.trace_trust_inbound_sampled:
+            return Span(name, trace_id, parent_id, sampled, [])
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+    sampled = random.random() < settings.trace_sample_rate
+    return Span(name, trace_id, parent_id, sampled, [])
+
+
+def end_trace(root: Span) -> None:
+    """End the root span and export the trace if sampled."""
+    root.end()
+    if root.sampled:
+        spans = sorted(root._finished, key=lambda s: s.start_ns)
+        get_exporter().export(spans)
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a child of the current span; None if not sampled.
+
+    The span is not made current; use span() for that.
+    """
+    parent = current_span.get()
+    if parent is None or not parent.sampled:
+        return None
+    return Span(
+        name,
+        parent.trace_id,
+        parent.span_id,
+        True,
+        parent._finished,
+        attributes,
+    )
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """Run the enclosed block as the current span."""
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+    token = current_span.set(child)
+    try:
+        yield child
+    finally:
+        current_span.reset(token)
+        child.end()
+
+
+class InMemoryExporter:
+    """Keep the most recent traces for local inspection."""
+
+    def __init__(self, max_traces: int):
+        self.traces = deque(maxlen=max_traces)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append([s.to_dict() for s in spans])
+
+
+class FileExporter:
+    """Append traces as JSON lines; a background thread does the I/O."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="trace-writer", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        self._queue.put([s.to_dict() for s in spans])
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            with open(self.path, "a") as f:
+                f.write(json.dumps(trace) + "\n")
+
+
+class NullExporter:
+    """Drop traces."""
+
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+
+_exporter = None
+
+
+def get_exporter():
+    """Get the exporter selected by settings.trace_exporter."""
+    global _exporter
+    if _exporter is None:
+        if settings.trace_exporter == "file":
+            _exporter = FileExporter(settings.trace_file)
+        elif settings.trace_exporter == "memory":
+            _exporter = InMemoryExporter(settings.trace_memory_limit)
+        else:
+            _exporter = NullExporter()
+    return _exporter
+
+
+def set_exporter(exporter) -> None:
+    """Install an exporter; anything with export(spans) works."""
+    global _exporter
+    _exporter = exporter
@@ -1,13 +1,42 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.core.concurrency import configure_thread_pool
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.core.memory import start_tracemalloc
+from app.core.database import (
+    engine,
+    Base,
+    SessionLocal,
+    dispose_async_engine,
+)
+from app.core.health import (
+    get_readiness,
+    start_health_checker,
+    stop_health_checker,
+)
+from app.core.timing import TimedJSONResponse
 from app.seed_data import seed_database
+from app.services.ai_service import close_draft_store, open_draft_store
+from app.services.counter_service import TaskCounterService
+from app.services.plan_service import (
+    start_plan_scheduler,
+    stop_plan_scheduler,
+)
 
 # Import middleware
 from app.middleware.logging import configure_logging
-from app.middleware.observability import observability_middleware, get_metrics
+from app.middleware.metrics import CONTENT_TYPE
+from app.middleware.profiling import profiling_middleware
+from app.middleware.observability import (
+    get_metrics,
+    observability_middleware,
+    start_metrics_writer,
+    stop_metrics_writer,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
@@ -25,9 +54,38 @@ Base.metadata.create_all(bind=engine)
 # Seed database with demo data
 seed_database()
 
+# Build task counters for databases created before they existed
+with SessionLocal() as db:
+    TaskCounterService(db).ensure_initialized()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure process-wide resources on startup."""
+    configure_thread_pool()
+    if settings.tracemalloc_frames:
+        start_tracemalloc(settings.tracemalloc_frames)
+    start_loop_monitor()
+    start_metrics_writer()
+    await start_health_checker()
+    open_draft_store()
+    start_plan_scheduler()
+    yield
+    await stop_plan_scheduler()
+    close_draft_store()
+    await stop_health_checker()
+    stop_metrics_writer()
+    await stop_loop_monitor()
+    await dispose_async_engine()
+
+
 # Initialize FastAPI app
 app = FastAPI(
-    title=settings.app_name, version=settings.version, debug=settings.debug
+    title=settings.app_name,
+    version=settings.version,
+    debug=settings.debug,
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
 # Add CORS middleware
@@ -48,42 +106,58 @@ app.include_router(tasks_router)
 app.include_router(ai_router)
 app.include_router(web_router)
 
-# Add observability middleware
+# Add profiling and observability middleware (observability outermost)
+app.middleware("http")(profiling_middleware)
 app.middleware("http")(observability_middleware)
 
 
-@app.get("/metrics")
+@app.get("/metrics", response_class=Response)
 def metrics_endpoint():
     """Get application metrics in Prometheus format."""
-    return get_metrics()
+    return Response(get_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the worker is up and its event loop responds.
+
+    Async, like the other probes, so a busy thread pool cannot delay it.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 while dependencies are down or pools are full.
+
+    Dependency results come from the background checker, so probes put
+    no load on the database or the AI API.
+    """
+    report = get_readiness()
+    status_code = 200 if report["status"] != "not_ready" else 503
+    return JSONResponse(report, status_code=status_code)
 
 
 @app.get("/health")
-def health_check():
-    """Comprehensive health check endpoint."""
+async def health_check():
+    """Summary health check (cached; see /health/ready)."""
     import time
-    from sqlalchemy import text
-    from app.core.database import SessionLocal
     from app.middleware.observability import metrics
 
-    health_status = {
-        "status": "healthy",
+    report = get_readiness()
+    checks = report["checks"]
+    database = checks.get("database", {}).get("status")
+    ai_status = checks.get("ai", {}).get("status")
+    return {
+        "status": "unhealthy"
+        if report["status"] == "not_ready"
+        else "healthy",
         "timestamp": time.time(),
         "version": settings.version,
         "uptime_seconds": int(time.time() - metrics["start_time"]),
+        "database": "connected" if database == "up" else "disconnected",
+        "ai_service": {"up": "available", "disabled": "disabled"}.get(
+            ai_status, "unavailable"
+        ),
+        "reasons": report["reasons"],
     }
-
-    # Check database connectivity
-    try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        health_status["database"] = "connected"
-        db.close()
-    except Exception:
-        health_status["database"] = "disconnected"
-        health_status["status"] = "unhealthy"
-
-    # Check AI service availability
-    health_status["ai_service"] = "available"  # Basic check
-
-    return health_status
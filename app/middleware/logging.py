@@ -1,13 +1,66 @@
 """
 Logging configuration for structured logging with structlog.
+
+Log calls only enqueue the event: JSON rendering, traceback formatting
+and I/O happen on a background QueueListener thread, so request handlers
+never wait on stdout or the log file.
 """
-import sys
+import atexit
 import logging
+import logging.handlers
+import queue
+import sys
 import structlog
+from app.core.config import settings
+
+# Records dropped because the queue was full, exported on /metrics
+log_stats = {"dropped": 0}
+
+_listener = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full.
+
+    Records are enqueued unformatted; the listener's handlers render them.
+    """
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_stats["dropped"] += 1
+
+
+def capture_exc_info(logger, method_name, event_dict):
+    """Resolve exc_info=True now; the writer thread has no exception."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _file_handler() -> logging.Handler:
+    """Rotate by time if log_rotate_when is set, otherwise by size."""
+    if settings.log_rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(
+            settings.log_file,
+            when=settings.log_rotate_when,
+            backupCount=settings.log_backup_count,
+        )
+    return logging.handlers.RotatingFileHandler(
+        settings.log_file,
+        maxBytes=settings.log_max_bytes,
+        backupCount=settings.log_backup_count,
+    )
 
 
 def configure_logging():
     """Configure structured logging for the application."""
+    global _listener
+
     # Configure structured logging
     structlog.configure(
         processors=[
@@ -17,9 +70,8 @@ def configure_logging():
             structlog.stdlib.PositionalArgumentsFormatter(),
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(),
+            capture_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
@@ -27,14 +79,47 @@ def configure_logging():
         cache_logger_on_first_use=True,
     )
 
-    # Configure standard library logging to output to both console and file
+    # Rendering runs on the listener thread
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+        ],
+    )
+    handlers = [logging.StreamHandler(sys.stdout), _file_handler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+    # Standard library logging goes through the same queue
     logging.basicConfig(
         level=logging.INFO,
-        format="%(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("app.log"),
-        ],
+        handlers=[DroppingQueueHandler(log_queue)],
+        force=True,
     )
 
     return structlog.get_logger()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,328 @@
+"""
+Fixed-bucket histograms rendered in Prometheus text format.
+
+Memory is bounded by the number of label combinations, not by traffic:
+each series keeps one counter per bucket plus a sum and a count.
+
+For multi-worker servers each process periodically writes a JSON
+snapshot of its metrics to a shared directory and /metrics merges every
+snapshot: counters and histograms are summed across all files (so totals
+survive worker restarts), gauges only across workers still alive that
+wrote recently. Files of exited workers are folded into one archive
+file so the directory does not grow with every restart.
+"""
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Where snapshots of exited workers are accumulated
+ARCHIVE_NAME = "metrics_archive.json"
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; suits both HTTP requests and SQL statements
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """Render label pairs as {a="1",b="2"}, or "" when there are none."""
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+        + "}"
+    )
+
+
+class Histogram:
+    """Cumulative histogram with a fixed label set and bucket bounds."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation for the given label values."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self) -> None:
+        """Drop every series."""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> list:
+        """Return all series as JSON-friendly [labels, counts, sum, count]."""
+        with self._lock:
+            return [
+                [list(labels), list(counts), total, count]
+                for labels, (counts, total, count) in self._series.items()
+            ]
+
+    def render(self, series: Optional[list] = None) -> List[str]:
+        """Render HELP, TYPE and series lines (own series by default)."""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        if series is None:
+            series = self.snapshot()
+        series = sorted(
+            (tuple(labels), counts, total, count)
+            for labels, counts, total, count in series
+        )
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        for labelvalues, counts, total, count in series:
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{format_labels(labels + [('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+def _pid_alive(pid: int) -> bool:
+    """Return True if a process with this pid is running."""
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except (OSError, OverflowError):
+        return False
+    return True
+
+
+def _write_json(directory: str, name: str, data: dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def write_snapshot(directory: str, snapshot: dict) -> None:
+    """Atomically write this process's snapshot into directory."""
+    os.makedirs(directory, exist_ok=True)
+    _write_json(directory, f"metrics_{snapshot['pid']}.json", snapshot)
+
+
+def read_snapshots(
+    directory: str, max_age: Optional[float] = None
+) -> List[dict]:
+    """Load every worker snapshot in directory, skipping unreadable files.
+
+    Snapshots not written for max_age seconds are marked stale, and
+    merge_snapshots ignores their gauges.
+    """
+    now = time.time()
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        try:
+            age = now - os.path.getmtime(path)
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        snapshot["stale"] = max_age is not None and age > max_age
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def archive_exited_workers(directory: str, max_age: float) -> int:
+    """Fold snapshots of exited workers into the archive file.
+
+    Their counters and histograms stay in the totals, but the files
+    (and their gauges) go away. Only files untouched for max_age
+    seconds are archived, so a worker's final write has landed. Returns
+    the number of files archived.
+    """
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    now = time.time()
+    with open(os.path.join(directory, ".archive.lock"), "a") as lock:
+        # Concurrent /metrics calls must not archive a file twice
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            exited = []
+            for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+                if path == archive_path:
+                    continue
+                try:
+                    if now - os.path.getmtime(path) <= max_age:
+                        continue
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if not _pid_alive(snapshot["pid"]):
+                    exited.append((path, snapshot))
+            if not exited:
+                return 0
+
+            snapshots = [snapshot for _, snapshot in exited]
+            try:
+                with open(archive_path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                pass
+            merged = merge_snapshots(snapshots)
+            _write_json(
+                directory,
+                ARCHIVE_NAME,
+                {
+                    "pid": 0,
+                    "counters": merged["counters"],
+                    "gauges_max": {},
+                    "gauges_sum": {},
+                    "histograms": merged["histograms"],
+                },
+            )
+            for path, _ in exited:
+                os.remove(path)
+            return len(exited)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Combine worker snapshots into one with the same layout."""
+    merged = {
+        "counters": {},
+        "gauges_max": {},
+        "gauges_sum": {},
+        "histograms": {},
+    }
+    for snapshot in snapshots:
+        for name, value in snapshot["counters"].items():
+            if not isinstance(value, dict):
+                merged["counters"][name] = (
+                    merged["counters"].get(name, 0) + value
+                )
+                continue
+            target = merged["counters"].setdefault(name, {})
+            for label, labelled_value in value.items():
+                target[label] = target.get(label, 0) + labelled_value
+
+        series_by_name = merged["histograms"]
+        for name, series in snapshot["histograms"].items():
+            by_labels = series_by_name.setdefault(name, {})
+            for labels, counts, total, count in series:
+                key = tuple(labels)
+                if key not in by_labels:
+                    by_labels[key] = [list(labels), list(counts), total, count]
+                    continue
+                current = by_labels[key]
+                current[1] = [a + b for a, b in zip(current[1], counts)]
+                current[2] += total
+                current[3] += count
+
+        if snapshot.get("stale") or not _pid_alive(snapshot["pid"]):
+            continue
+        for name, value in snapshot["gauges_max"].items():
+            merged["gauges_max"][name] = max(
+                merged["gauges_max"].get(name, value), value
+            )
+        for name, value in snapshot["gauges_sum"].items():
+            if not isinstance(value, dict):
+                merged["gauges_sum"][name] = (
+                    merged["gauges_sum"].get(name, 0) + value
+                )
+                continue
+            target = merged["gauges_sum"].setdefault(name, {})
+            for label, labelled_value in value.items():
+                target[label] = target.get(label, 0) + labelled_value
+
+    merged["histograms"] = {
+        name: list(by_labels.values())
+        for name, by_labels in merged["histograms"].items()
+    }
+    return merged
+
+
+class SnapshotWriter:
+    """Daemon thread writing collect() to directory every interval."""
+
+    def __init__(
+        self, directory: str, collect: Callable[[], dict], interval: float
+    ):
+        self.directory = directory
+        self.collect = collect
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-writer", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stop.set()
+        self._thread.join()
+        write_snapshot(self.directory, self.collect())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.directory, self.collect())
+            except OSError:
+                logger.exception("Could not write metrics snapshot")
@@ -1,12 +1,48 @@
 """
 Observability middleware for request logging, metrics, and error tracking.
 """
+import gc
+import os
+import random
 import time
-import traceback
-import uuid
+import tracemalloc
 import structlog
 from fastapi import Request
-from app.core.security import decode_token
+from starlette.routing import Match
+from app.core.database import (
+    get_pool_status,
+    pool_stats,
+    query_duration,
+    track_queries,
+)
+from app.core.loop_monitor import event_loop_lag, loop_stats
+from app.core.memory import memory_stats, peak_rss_bytes, rss_bytes
+from app.core.security import get_token_claims
+from app.core.timing import server_timing_header, start_request_timing
+from app.core.tracing import (
+    current_span,
+    end_trace,
+    format_traceparent,
+    start_trace,
+)
+from app.core.circuit_breaker import STATE_VALUES
+from app.middleware.logging import log_stats
+from app.middleware.metrics import (
+    Histogram,
+    SnapshotWriter,
+    archive_exited_workers,
+    merge_snapshots,
+    read_snapshots,
+    write_snapshot,
+)
+from app.services.ai_service import (
+    ai_breaker,
+    ai_request_duration,
+    ai_stats,
+    draft_cache,
+    draft_cache_stats,
+)
+from app.services.plan_service import plan_stats
 
 logger = structlog.get_logger()
 
@@ -14,35 +50,196 @@ logger = structlog.get_logger()
 metrics = {
     "requests": 0,
     "errors": 0,
+    "in_flight": 0,
     "start_time": time.time(),
-    "response_times": [],
 }
 
+# Labelled by route template (not raw path) to keep cardinality bounded
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ("method", "route", "status"),
+)
+
+
+# Histograms exported on /metrics
+HISTOGRAMS = [
+    request_duration,
+    query_duration,
+    event_loop_lag,
+    ai_request_duration,
+]
+
+# Worker load gauges: (name, description); summed across workers
+LOAD_GAUGES = [
+    ("http_requests_in_flight", "Requests currently being handled"),
+    ("thread_pool_busy_threads", "Default thread pool threads in use"),
+    ("thread_pool_size", "Default thread pool capacity"),
+    ("thread_pool_waiting_tasks", "Tasks waiting for a pool thread"),
+    ("hash_pool_in_flight", "Password hashes running or queued"),
+    ("ai_requests_in_flight", "Gemini calls in progress"),
+    ("ai_requests_waiting", "Gemini calls waiting for a concurrency slot"),
+    ("ai_cache_entries", "Draft suggestions in the cache"),
+    ("process_resident_memory_bytes", "Resident memory of the workers"),
+    ("tracemalloc_traced_bytes", "Memory traced by tracemalloc"),
+]
+
+# Gemini call counters: (name, description)
+AI_COUNTERS = [
+    ("ai_timeouts_total", "Gemini calls that missed their deadline"),
+    ("ai_errors_total", "Gemini calls that failed"),
+    (
+        "ai_short_circuited_total",
+        "Calls answered by the fallback while the circuit breaker was open",
+    ),
+    ("ai_circuit_opened_total", "Times the Gemini circuit breaker opened"),
+    ("ai_cache_hits_total", "Draft suggestions served from the cache"),
+    ("ai_cache_misses_total", "Draft suggestions not in the cache"),
+    (
+        "ai_cache_coalesced_total",
+        "Cache misses that joined an in-flight "
+        "Gemini call for the same title",
+    ),
+    ("ai_cache_evictions_total", "Draft cache entries evicted for space"),
+    ("ai_cache_expirations_total", "Draft cache entries found expired"),
+    ("ai_plans_served_total", "Daily plans served from the stored plan"),
+    (
+        "ai_plans_generated_total",
+        "Daily plans generated on request, without a stored plan",
+    ),
+    ("ai_plans_precomputed_total", "Daily plans built by the nightly run"),
+    (
+        "ai_plan_precompute_failures_total",
+        "Nightly plans Gemini failed to build",
+    ),
+]
+
+# Garbage collector counters by generation: (name, gc.get_stats() field)
+GC_COUNTERS = [
+    ("python_gc_collections_total", "collections"),
+    ("python_gc_objects_collected_total", "collected"),
+    ("python_gc_objects_uncollectable_total", "uncollectable"),
+]
+
+# Connection pool gauges: (field of get_pool_status(), description)
+POOL_GAUGES = [
+    ("size", "Configured pool size"),
+    ("checked_out", "Connections currently in use"),
+    ("overflow", "Connections open beyond the pool size"),
+    ("capacity", "Maximum connections (size + overflow)"),
+]
+
+# Background snapshot writer in multiprocess mode
+_writer = None
+
+# Missed flushes after which a worker's gauges are no longer counted
+STALE_FLUSH_INTERVALS = 3
+
+
+def route_template(request: Request) -> str:
+    """Get the matched route's path template, e.g. /tasks/{task_id}."""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounts (static files) do not record themselves in the scope
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "<unmatched>")
+    return "<unmatched>"
+
+
+def _timings_ms(timings: dict) -> dict:
+    """Round phase timings to milliseconds for the log record."""
+    return {
+        phase: round(seconds * 1000, 1) for phase, seconds in timings.items()
+    }
+
+
+def _sample_rate(status_code: int, latency: float) -> float:
+    """Fraction of requests like this one that get logged."""
+    from app.core.config import settings
+
+    if status_code >= 400 or latency * 1000 >= settings.log_slow_request_ms:
+        return 1.0
+    return settings.log_sample_rate
+
+
+def _observe(request: Request, status_code: int, latency: float):
+    """Record a finished request in the latency histogram."""
+    request_duration.observe(
+        latency,
+        request.method,
+        route_template(request),
+        f"{status_code // 100}xx",
+    )
+
+
+def _finish_root_span(request: Request, root_span, status_code: int):
+    """Name the root span after the route and record the outcome."""
+    if not root_span.sampled:
+        return
+    route = route_template(request)
+    root_span.name = f"{request.method} {route}"
+    root_span.set_attribute("http_method", request.method)
+    root_span.set_attribute("http_route", route)
+    root_span.set_attribute("http_status_code", status_code)
+
+
+async def _log_after_body(
+    body, log_context, start_time, db_stats, timings, root_span
+):
+    """Pass the response body through, then log the request.
+
+    Also ends the trace, so spans and timings recorded while the body
+    streams (like a streamed Gemini call) are included.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        latency = time.perf_counter() - start_time
+        log_context.update(
+            {
+                "latency_ms": int(latency * 1000),
+                "db_queries": db_stats["count"],
+                "db_time_ms": round(db_stats["seconds"] * 1000, 1),
+                "timings_ms": _timings_ms(timings),
+            }
+        )
+        end_trace(root_span)
+
+        # Log successful request with structured data (sampled)
+        sample_rate = _sample_rate(log_context["status_code"], latency)
+        if sample_rate == 1.0 or random.random() < sample_rate:
+            logger.info(
+                "Request processed", **log_context, sample_rate=sample_rate
+            )
+
 
 async def observability_middleware(request: Request, call_next):
     """Middleware for request logging and metrics."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     metrics["requests"] += 1
+    db_stats = track_queries()
+    timings = start_request_timing()
+    metrics["in_flight"] += 1
 
-    # Extract user ID from JWT if present (try both cookie and header)
-    user_id = None
-    token = None
-
-    # Try cookie first (for web interface)
-    token = request.cookies.get("token")
-
-    # Try Authorization header (for API calls)
-    if not token:
-        auth_header = request.headers.get("authorization")
-        if auth_header and auth_header.lower().startswith("bearer "):
-            token = auth_header.split(" ", 1)[1]
+    # Root span: continues the caller's trace, named once routing is done
+    root_span = start_trace(
+        request.headers.get("traceparent"),
+        f"{request.method} {request.url.path}",
+    )
+    span_token = current_span.set(root_span)
 
-    if token:
-        try:
-            payload = decode_token(token)
-            user_id = payload.get("sub") if payload else None
-        except Exception:
-            user_id = None
+    # Decode the token once; auth dependencies reuse request.state
+    user_id = None
+    try:
+        claims = get_token_claims(request)
+        if claims:
+            user_id = claims.get("user_id", claims.get("sub"))
+    except Exception:
+        user_id = None
 
     # Create structured log context
     log_context = {
@@ -51,25 +248,37 @@ async def observability_middleware(request: Request, call_next):
         "user_id": user_id,
         "user_agent": request.headers.get("user-agent", ""),
         "ip_address": request.client.host if request.client else None,
-        "correlation_id": str(uuid.uuid4()),  # Correlation ID for tracing
+        "correlation_id": root_span.trace_id,  # Propagated trace ID
     }
 
+    body_started = False
     try:
         response = await call_next(request)
-        latency = time.time() - start_time
-        log_context.update(
-            {
-                "status_code": response.status_code,
-                "latency_ms": int(latency * 1000),
-            }
+        latency = time.perf_counter() - start_time
+        _observe(request, response.status_code, latency)
+        response.headers["Server-Timing"] = server_timing_header(
+            timings, latency
         )
+        response.headers["traceparent"] = format_traceparent(root_span)
+        _finish_root_span(request, root_span, response.status_code)
 
-        # Log successful request with structured data
-        logger.info("Request processed", **log_context)
+        # Streamed bodies keep working after the headers are sent, so
+        # the log record and trace wait for the end of the body
+        log_context["status_code"] = response.status_code
+        response.body_iterator = _log_after_body(
+            response.body_iterator,
+            log_context,
+            start_time,
+            db_stats,
+            timings,
+            root_span,
+        )
+        body_started = True
         return response
     except Exception as exc:
         metrics["errors"] += 1
-        latency = time.time() - start_time
+        latency = time.perf_counter() - start_time
+        _observe(request, 500, latency)
 
         # Classify error type
         error_type = "UNKNOWN"
@@ -86,41 +295,263 @@ async def observability_middleware(request: Request, call_next):
             {
                 "status_code": 500,
                 "latency_ms": int(latency * 1000),
+                "db_queries": db_stats["count"],
+                "db_time_ms": round(db_stats["seconds"] * 1000, 1),
+                "timings_ms": _timings_ms(timings),
                 "error": str(exc),
                 "error_type": error_type,
-                "stack_trace": traceback.format_exc(),
             }
         )
 
-        # Log error with full structured context
+        _finish_root_span(request, root_span, 500)
+        root_span.set_attribute("error", error_type)
+
+        # Log error with full structured context; the traceback is
+        # formatted by the log writer thread
         logger.error("Request failed", **log_context, exc_info=True)
         raise
+    finally:
+        metrics["in_flight"] -= 1
+        current_span.reset(span_token)
+        if not body_started:
+            end_trace(root_span)
 
 
-def get_metrics():
-    """Get application metrics in Prometheus format."""
-    from app.core.config import settings
+def collect_snapshot() -> dict:
+    """Gather this process's metrics in a mergeable, JSON-friendly form."""
+    pool_status = get_pool_status()
+    return {
+        "pid": os.getpid(),
+        "counters": {
+            "requests_total": metrics["requests"],
+            "errors_total": metrics["errors"],
+            "db_pool_checkouts_total": pool_stats["checkouts"],
+            "db_pool_checkout_timeouts_total": pool_stats["timeouts"],
+            "db_pool_checkout_wait_seconds_sum": pool_stats[
+                "wait_seconds_sum"
+            ],
+            "log_records_dropped_total": log_stats["dropped"],
+            "event_loop_blocked_total": loop_stats["blocked_total"],
+            "memory_rss_warnings_total": memory_stats["rss_warnings"],
+            "ai_timeouts_total": ai_stats["timeouts"],
+            "ai_errors_total": ai_stats["errors"],
+            "ai_short_circuited_total": ai_stats["short_circuited"],
+            "ai_circuit_opened_total": ai_breaker.opened_total,
+            "ai_cache_hits_total": draft_cache_stats["hits"],
+            "ai_cache_misses_total": draft_cache_stats["misses"],
+            "ai_cache_coalesced_total": draft_cache_stats["coalesced"],
+            "ai_cache_evictions_total": draft_cache.evictions,
+            "ai_cache_expirations_total": draft_cache.expirations,
+            "ai_plans_served_total": plan_stats["served"],
+            "ai_plans_generated_total": plan_stats["generated"],
+            "ai_plans_precomputed_total": plan_stats["precomputed"],
+            "ai_plan_precompute_failures_total": plan_stats[
+                "precompute_failures"
+            ],
+            **{
+                name: {
+                    str(generation): stats[field]
+                    for generation, stats in enumerate(gc.get_stats())
+                }
+                for name, field in GC_COUNTERS
+            },
+        },
+        "gauges_max": {
+            "app_uptime_seconds": time.time() - metrics["start_time"],
+            "db_pool_checkout_wait_seconds_max": pool_stats[
+                "wait_seconds_max"
+            ],
+            "event_loop_lag_seconds_last": loop_stats["lag_seconds"],
+            "process_peak_resident_memory_bytes": peak_rss_bytes(),
+            "ai_circuit_state": STATE_VALUES[ai_breaker.state],
+        },
+        "gauges_sum": {
+            **{
+                field: {
+                    engine: status[field]
+                    for engine, status in pool_status.items()
+                }
+                for field, _ in POOL_GAUGES
+            },
+            "http_requests_in_flight": metrics["in_flight"],
+            "thread_pool_busy_threads": loop_stats["thread_pool_busy"],
+            "thread_pool_size": loop_stats["thread_pool_size"],
+            "thread_pool_waiting_tasks": loop_stats["thread_pool_waiting"],
+            "hash_pool_in_flight": loop_stats["hash_pool_in_flight"],
+            "process_resident_memory_bytes": rss_bytes(),
+            "tracemalloc_traced_bytes": tracemalloc.get_traced_memory()[0],
+            "ai_requests_in_flight": ai_stats["in_flight"],
+            "ai_requests_waiting": ai_stats["waiting"],
+            "ai_cache_entries": len(draft_cache),
+        },
+        "histograms": {
+            histogram.name: histogram.snapshot() for histogram in HISTOGRAMS
+        },
+    }
 
-    current_time = time.time()
-    uptime = current_time - metrics["start_time"]
 
+def render_snapshot(snapshot: dict) -> str:
+    """Render a (possibly merged) snapshot in Prometheus format."""
+    from app.core.config import settings
+
+    counters = snapshot["counters"]
+    gauges = snapshot["gauges_max"]
     lines = [
         "# HELP requests_total Total number of requests",
         "# TYPE requests_total counter",
-        f"requests_total {metrics['requests']}",
+        f"requests_total {counters['requests_total']}",
         "",
         "# HELP errors_total Total number of errors",
         "# TYPE errors_total counter",
-        f"errors_total {metrics['errors']}",
+        f"errors_total {counters['errors_total']}",
         "",
         "# HELP app_uptime_seconds Application uptime in seconds",
         "# TYPE app_uptime_seconds gauge",
-        f"app_uptime_seconds {uptime}",
+        f"app_uptime_seconds {gauges.get('app_uptime_seconds', 0)}",
         "",
         "# HELP app_version_info Application version information",
         "# TYPE app_version_info gauge",
         f'app_version_info{{version="{settings.version}",'
         f'app="{settings.app_name}"}} 1',
+        "",
+        "# HELP db_pool_checkouts_total Connections checked out of the pool",
+        "# TYPE db_pool_checkouts_total counter",
+        f"db_pool_checkouts_total {counters['db_pool_checkouts_total']}",
+        "",
+        "# HELP db_pool_checkout_timeouts_total Checkouts that timed out",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+        "db_pool_checkout_timeouts_total "
+        f"{counters['db_pool_checkout_timeouts_total']}",
+        "",
+        "# HELP db_pool_checkout_wait_seconds_sum Time spent waiting for "
+        "pooled connections",
+        "# TYPE db_pool_checkout_wait_seconds_sum counter",
+        "db_pool_checkout_wait_seconds_sum "
+        f"{counters['db_pool_checkout_wait_seconds_sum']}",
+        "",
+        "# HELP db_pool_checkout_wait_seconds_max Longest checkout wait",
+        "# TYPE db_pool_checkout_wait_seconds_max gauge",
+        "db_pool_checkout_wait_seconds_max "
+        f"{gauges.get('db_pool_checkout_wait_seconds_max', 0)}",
+        "",
+        "# HELP log_records_dropped_total Log records dropped because the "
+        "log queue was full",
+        "# TYPE log_records_dropped_total counter",
+        "log_records_dropped_total "
+        f"{counters.get('log_records_dropped_total', 0)}",
+    ]
+
+    lines += [
+        "",
+        "# HELP event_loop_blocked_total Stalls longer than the block "
+        "threshold",
+        "# TYPE event_loop_blocked_total counter",
+        "event_loop_blocked_total "
+        f"{counters.get('event_loop_blocked_total', 0)}",
+        "",
+        "# HELP event_loop_lag_seconds_last Most recent loop probe delay",
+        "# TYPE event_loop_lag_seconds_last gauge",
+        "event_loop_lag_seconds_last "
+        f"{gauges.get('event_loop_lag_seconds_last', 0)}",
+    ]
+    lines += [
+        "",
+        "# HELP memory_rss_warnings_total Times a worker's RSS passed "
+        "MEMORY_WARN_RSS_MB",
+        "# TYPE memory_rss_warnings_total counter",
+        "memory_rss_warnings_total "
+        f"{counters.get('memory_rss_warnings_total', 0)}",
+        "",
+        "# HELP process_peak_resident_memory_bytes Highest worker RSS",
+        "# TYPE process_peak_resident_memory_bytes gauge",
+        "process_peak_resident_memory_bytes "
+        f"{gauges.get('process_peak_resident_memory_bytes', 0)}",
     ]
+    for name, description in AI_COUNTERS:
+        lines += [
+            "",
+            f"# HELP {name} {description}",
+            f"# TYPE {name} counter",
+            f"{name} {counters.get(name, 0)}",
+        ]
+    lines += [
+        "",
+        "# HELP ai_circuit_state Gemini circuit breaker state (0 closed, "
+        "1 half-open, 2 open; worst worker)",
+        "# TYPE ai_circuit_state gauge",
+        f"ai_circuit_state {gauges.get('ai_circuit_state', 0)}",
+    ]
+    for name, field in GC_COUNTERS:
+        lines += [
+            "",
+            f"# HELP {name} Garbage collector {field} by generation",
+            f"# TYPE {name} counter",
+        ]
+        lines += [
+            f'{name}{{generation="{generation}"}} {value}'
+            for generation, value in counters.get(name, {}).items()
+        ]
+    for name, description in LOAD_GAUGES:
+        lines += [
+            "",
+            f"# HELP {name} {description}",
+            f"# TYPE {name} gauge",
+            f"{name} {snapshot['gauges_sum'].get(name, 0)}",
+        ]
+
+    for field, description in POOL_GAUGES:
+        lines += [
+            "",
+            f"# HELP db_pool_{field} {description}",
+            f"# TYPE db_pool_{field} gauge",
+        ]
+        lines += [
+            f'db_pool_{field}{{engine="{engine}"}} {value}'
+            for engine, value in snapshot["gauges_sum"].get(field, {}).items()
+        ]
+
+    for histogram in HISTOGRAMS:
+        lines += [""] + histogram.render(
+            snapshot["histograms"].get(histogram.name, [])
+        )
+    return "\n".join(lines) + "\n"
+
+
+def get_metrics():
+    """Get application metrics in Prometheus format.
+
+    With METRICS_MULTIPROC_DIR set, this merges the snapshots of every
+    worker (other workers' figures are at most one flush interval old).
+    """
+    from app.core.config import settings
+
+    snapshot = collect_snapshot()
+    directory = settings.metrics_multiproc_dir
+    if directory:
+        write_snapshot(directory, snapshot)
+        max_age = STALE_FLUSH_INTERVALS * settings.metrics_flush_interval
+        archive_exited_workers(directory, max_age)
+        snapshot = merge_snapshots(read_snapshots(directory, max_age))
+    return render_snapshot(snapshot)
+
+
+def start_metrics_writer():
+    """Start flushing snapshots if multiprocess metrics are enabled."""
+    from app.core.config import settings
+
+    global _writer
+    if settings.metrics_multiproc_dir and _writer is None:
+        _writer = SnapshotWriter(
+            settings.metrics_multiproc_dir,
+            collect_snapshot,
+            settings.metrics_flush_interval,
+        )
+        _writer.start()
+
 
-    return "\n".join(lines)
+def stop_metrics_writer():
+    """Stop the snapshot writer, flushing one last time."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
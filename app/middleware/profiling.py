@@ -0,0 +1,62 @@
+"""
+Opt-in per-request profiling for admins.
+
+An admin request carrying ``X-Profile: 1`` is run under the stack
+sampler; the response body is replaced by the collapsed stacks and the
+original status is returned in ``X-Profiled-Status``.
+"""
+from contextlib import ExitStack
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.profiler import ProfilerBusyError, StackSampler, profile_header
+from app.core.security import get_token_claims, resolve_user
+
+
+def _is_live_admin(request: Request, claims: dict) -> bool:
+    """Check the token's user, as stored now, is an admin."""
+    # Honour dependency overrides so tests use their database
+    get_session = request.app.dependency_overrides.get(get_db, get_db)
+    sessions = get_session()
+    try:
+        user = resolve_user(next(sessions), claims)
+    finally:
+        sessions.close()
+    return user is not None and user.is_admin
+
+
+async def profiling_middleware(request: Request, call_next):
+    """Profile the request if an admin asked for it."""
+    if not profile_header(request.headers.get("x-profile")):
+        return await call_next(request)
+    claims = get_token_claims(request)
+    # The claim alone would let a demoted admin profile until the token
+    # expires
+    if not (
+        claims
+        and claims.get("is_admin")
+        and await run_in_threadpool(_is_live_admin, request, claims)
+    ):
+        return await call_next(request)
+
+    with ExitStack() as stack:
+        try:
+            sampler = stack.enter_context(
+                StackSampler(settings.profiler_request_interval_ms / 1000)
+            )
+        except ProfilerBusyError:
+            return await call_next(request)
+        response = await call_next(request)
+        # Streamed bodies are produced lazily; include them in the profile
+        async for _ in response.body_iterator:
+            pass
+
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            "X-Profiled-Status": str(response.status_code),
+            "X-Profile-Samples": str(sampler.samples),
+        },
+    )
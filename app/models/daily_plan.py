@@ -0,0 +1,28 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+# SQLAlchemy Model
+class DailyPlan(Base):
+    """A user's plan for one day and the task snapshot it was built from."""
+
+    __tablename__ = "daily_plans"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False
+    )
+    plan_date = Column(Date, nullable=False)
+    snapshot_hash = Column(String(64), nullable=False)
+    plan = Column(Text, nullable=False)
+    generated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
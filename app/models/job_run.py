@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+# SQLAlchemy Model
+class JobRun(Base):
+    """A scheduled job's run for one day, claimed by one worker."""
+
+    __tablename__ = "job_runs"
+
+    name = Column(String, primary_key=True)
+    run_date = Column(Date, primary_key=True)
+    worker_pid = Column(Integer, nullable=False)
+    claimed_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
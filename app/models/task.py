@@ -1,5 +1,13 @@
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -23,6 +31,15 @@ class Task(Base):
     # Relationship
     user = relationship("User", back_populates="tasks")
 
+    # Indexes for the hot access paths (see TaskService)
+    __table_args__ = (
+        Index("ix_tasks_user_id_status", "user_id", "status"),
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status", "status"),
+        Index("ix_tasks_updated_at", "updated_at"),
+    )
+
 
 # Pydantic Models
 class TaskCreate(BaseModel):
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+# user_id used for the system-wide totals rows
+GLOBAL_SCOPE = 0
+
+
+# SQLAlchemy Model
+class TaskCounter(Base):
+    """Task count per (user, status), maintained alongside tasks."""
+
+    __tablename__ = "task_counters"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
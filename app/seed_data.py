@@ -3,6 +3,7 @@ from app.core.database import SessionLocal
 from app.models.user import User
 from app.models.task import Task
 from app.core.security import get_password_hash
+from app.services.counter_service import TaskCounterService
 from datetime import datetime, timedelta
 import random
 
@@ -212,6 +213,7 @@ def seed_database():
                 db.add(task)
 
         db.commit()
+        TaskCounterService(db).rebuild()
         print(
             f"✅ Created {len(all_users)} users and {len(all_users) * 5} AI development tasks"
         )
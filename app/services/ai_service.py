@@ -1,7 +1,88 @@
 # flake8: noqa: E501
-from typing import Optional
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import Dict, List, Optional
 from google import genai
+from app.core.cache import SingleFlight, SQLiteCacheStore, TTLCache
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import settings
+from app.core.timing import record_timing, timed
+from app.core.tracing import start_span
+from app.middleware.metrics import Histogram
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Part of the draft cache key: bump when _description_prompt changes so
+# answers to the old prompt are not served
+DESCRIPTION_PROMPT_VERSION = 1
+
+# Async Gemini call state and counters, exported on /metrics
+ai_stats = {
+    "in_flight": 0,
+    "waiting": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "short_circuited": 0,
+}
+
+ai_request_duration = Histogram(
+    "ai_request_duration_seconds",
+    "Gemini call latency in seconds, including the wait for a slot",
+    ("outcome",),
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+
+# Draft descriptions by normalized title; misses for the same title
+# share one Gemini call
+draft_cache = TTLCache(settings.ai_cache_size, settings.ai_cache_ttl)
+draft_flights = SingleFlight()
+draft_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+_draft_store: Optional[SQLiteCacheStore] = None
+
+ai_breaker = CircuitBreaker(
+    "gemini",
+    settings.ai_breaker_failure_threshold,
+    settings.ai_breaker_reset_seconds,
+)
+
+
+class AIUnavailableError(RuntimeError):
+    """Raised by the streaming path when Gemini cannot answer."""
+
+
+class StreamingCleaner:
+    """Apply AIService._clean_response to a response chunk by chunk.
+
+    Joining the output of feed() for every chunk gives the same text as
+    cleaning the whole response at once: asterisks and hashes removed,
+    whitespace runs collapsed to one space, nothing at either end.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._in_space = False
+        self._pending_spaces = 0
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        for piece in re.split(r"(\s+)", chunk.replace("*", "")):
+            if not piece:
+                continue
+            if piece.isspace():
+                if not self._in_space and self._started:
+                    self._pending_spaces += 1
+                self._in_space = True
+                continue
+            self._in_space = False
+            piece = piece.replace("#", "")
+            if piece:
+                out.append(" " * self._pending_spaces + piece)
+                self._pending_spaces = 0
+                self._started = True
+        return "".join(out)
 
 
 class AIService:
@@ -21,14 +102,334 @@ class AIService:
             print(f"Failed to initialize Gemini client: {e}")
             return None
 
-    def generate_task_description(self, title: str) -> str:
-        """Generate a task description using AI."""
-        if not self.client:
-            print("Warning: No Gemini client available, using fallback")
+    async def agenerate_task_description(self, title: str) -> str:
+        """Draft a task description, with deadline and breaker.
+
+        Answers are cached by normalized title, and concurrent requests
+        for the same title share one Gemini call. Fallbacks are not
+        cached.
+        """
+        key = draft_cache_key(title)
+        text = draft_cache.get(key)
+        if text is not None:
+            draft_cache_stats["hits"] += 1
+            return text
+
+        draft_cache_stats["misses"] += 1
+        if draft_flights.in_flight(key):
+            draft_cache_stats["coalesced"] += 1
+        text = await draft_flights.do(
+            key, lambda: self._fetch_description(key, title)
+        )
+        if text is None:
             return self._get_fallback_description(title)
+        return text
+
+    async def _fetch_description(self, key: str, title: str):
+        text = await self._agenerate(self._description_prompt(title))
+        if text is not None:
+            text = self._clean_response(text)
+            _cache_draft(key, text)
+        return text
+
+    async def agenerate_task_descriptions(self, titles: List[str]) -> dict:
+        """Draft descriptions for many titles with as few calls as possible.
+
+        Cached titles are answered directly. The rest are packed into
+        batches of at most ai_batch_max_titles titles and
+        ai_batch_max_chars characters, each drafted by one Gemini call
+        with a JSON response. Items missing from a response get the
+        fallback description. Returns {"suggestions": [{"title",
+        "suggestion", "source"}], "batches": n}, where source is "cache",
+        "ai" or "fallback" and n is the number of batches drafted.
+        """
+        results = [None] * len(titles)
+        pending = {}  # cache key -> indexes of titles waiting for it
+        for index, title in enumerate(titles):
+            key = draft_cache_key(title)
+            text = draft_cache.get(key)
+            if text is not None:
+                draft_cache_stats["hits"] += 1
+                results[index] = (text, "cache")
+            else:
+                draft_cache_stats["misses"] += 1
+                pending.setdefault(key, []).append(index)
+
+        batches = _pack_batches(
+            [(key, titles[indexes[0]]) for key, indexes in pending.items()],
+            settings.ai_batch_max_titles,
+            settings.ai_batch_max_chars,
+        )
+        answers = await asyncio.gather(
+            *(self._draft_batch(batch) for batch in batches)
+        )
+        for batch, texts in zip(batches, answers):
+            for (key, title), text in zip(batch, texts):
+                if text is None:
+                    result = (
+                        self._get_fallback_description(title),
+                        "fallback",
+                    )
+                else:
+                    result = (text, "ai")
+                for index in pending[key]:
+                    results[index] = result
+
+        return {
+            "suggestions": [
+                {"title": title, "suggestion": text, "source": source}
+                for title, (text, source) in zip(titles, results)
+            ],
+            "batches": len(batches),
+        }
+
+    async def _draft_batch(self, batch: List[tuple]) -> List[Optional[str]]:
+        """Draft one batch of (key, title); None where no usable answer."""
+        titles = [title for _, title in batch]
+        text = await self._agenerate(
+            self._batch_prompt(titles),
+            config={"response_mime_type": "application/json"},
+        )
+        drafts = _parse_batch(text, len(titles)) if text is not None else {}
+        texts = []
+        for number, (key, _) in enumerate(batch, 1):
+            draft = drafts.get(number)
+            if draft:
+                draft = self._clean_response(draft)
+                _cache_draft(key, draft)
+            texts.append(draft or None)
+        return texts
+
+    async def astream_task_description(self, title: str):
+        """Stream a task description as events.
+
+        Yields {"text": chunk} as cleaned text arrives, then
+        {"done": True, "source": ..., "text": full text}. source is
+        "cache", "ai" or "fallback"; a stream that fails part way ends
+        with the fallback text, which replaces what was shown.
+        """
+        key = draft_cache_key(title)
+        text = draft_cache.get(key)
+        if text is not None:
+            draft_cache_stats["hits"] += 1
+            yield {"text": text}
+            yield {"done": True, "source": "cache", "text": text}
+            return
+
+        draft_cache_stats["misses"] += 1
+        async for event in self._astream_events(
+            self._description_prompt(title),
+            lambda: self._get_fallback_description(title),
+            cache_key=key,
+        ):
+            yield event
 
+    async def astream_daily_plan(self, username: str, user_tasks: list = None):
+        """Stream a daily plan as events, like astream_task_description."""
+        async for event in self._astream_events(
+            self._plan_prompt(username, user_tasks),
+            lambda: self._get_fallback_plan(username),
+        ):
+            yield event
+
+    async def _astream_events(
+        self, prompt: str, fallback, cache_key: Optional[str] = None
+    ):
+        cleaner = StreamingCleaner()
+        raw = []
+        try:
+            async for chunk in self._astream(prompt):
+                raw.append(chunk)
+                text = cleaner.feed(chunk)
+                if text:
+                    yield {"text": text}
+        except AIUnavailableError:
+            yield {"done": True, "source": "fallback", "text": fallback()}
+            return
+
+        text = self._clean_response("".join(raw))
+        if not text:
+            yield {"done": True, "source": "fallback", "text": fallback()}
+            return
+        if cache_key is not None:
+            _cache_draft(cache_key, text)
+        yield {"done": True, "source": "ai", "text": text}
+
+    async def _astream(self, prompt: str):
+        """Yield raw text chunks from Gemini's streaming API.
+
+        Same limits as _agenerate, with ai_timeout applying to the wait
+        for a slot and then to each chunk. Raises AIUnavailableError
+        (after recording the failure) instead of Gemini's exceptions.
+        The stream is timed and traced as "ai", like _agenerate's call;
+        its span is not made current, as the generator may be closed
+        from another context.
+        """
+        if not self.client:
+            raise AIUnavailableError("No Gemini client available")
+        if not ai_breaker.allow():
+            ai_stats["short_circuited"] += 1
+            raise AIUnavailableError("Gemini circuit breaker is open")
+
+        start = time.perf_counter()
+        limiter = _ai_limiter()
+        ai_stats["waiting"] += 1
         try:
-            prompt = f"""Create a brief, concise task description for: "{title}"
+            await asyncio.wait_for(limiter.acquire(), settings.ai_timeout)
+        except asyncio.TimeoutError:
+            ai_stats["timeouts"] += 1
+            ai_breaker.release_trial()
+            ai_request_duration.observe(time.perf_counter() - start, "timeout")
+            raise AIUnavailableError("Timed out waiting for a Gemini slot")
+        except asyncio.CancelledError:
+            ai_breaker.release_trial()
+            raise
+        finally:
+            ai_stats["waiting"] -= 1
+
+        ai_stats["in_flight"] += 1
+        outcome = "cancelled"
+        ai_span = start_span("ai", model=GEMINI_MODEL)
+        call_start = time.perf_counter()
+        try:
+            stream = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=GEMINI_MODEL, contents=prompt
+                ),
+                settings.ai_timeout,
+            )
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), settings.ai_timeout
+                    )
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError:
+            ai_stats["timeouts"] += 1
+            outcome = "timeout"
+            ai_breaker.record_failure()
+            raise AIUnavailableError("Gemini stream timed out")
+        except (asyncio.CancelledError, GeneratorExit):
+            ai_breaker.release_trial()
+            raise
+        except Exception as e:
+            print(f"AI streaming failed: {e}")
+            ai_stats["errors"] += 1
+            outcome = "error"
+            ai_breaker.record_failure()
+            raise AIUnavailableError(str(e)) from e
+        else:
+            outcome = "ok"
+            ai_breaker.record_success()
+        finally:
+            record_timing("ai", time.perf_counter() - call_start)
+            if ai_span is not None:
+                ai_span.end()
+            ai_stats["in_flight"] -= 1
+            limiter.release()
+            ai_request_duration.observe(time.perf_counter() - start, outcome)
+
+    async def agenerate_daily_plan(
+        self, username: str, user_tasks: list = None
+    ) -> str:
+        """Daily plan from the user's tasks, with deadline and breaker."""
+        text = await self.adraft_daily_plan(username, user_tasks)
+        if text is None:
+            return self._get_fallback_plan(username)
+        return text
+
+    async def adraft_daily_plan(
+        self, username: str, user_tasks: list = None
+    ) -> Optional[str]:
+        """Gemini's daily plan, or None where the fallback would be used."""
+        text = await self._agenerate(self._plan_prompt(username, user_tasks))
+        if text is None:
+            return None
+        return self._clean_response(text) or None
+
+    def plan_snapshot_hash(self, username: str, user_tasks: list) -> str:
+        """Hash of the plan prompt these tasks produce.
+
+        Two task lists with the same hash would get the same plan, so
+        edits the prompt ignores (descriptions, time logged, tasks
+        beyond the top five) do not count as changes.
+        """
+        prompt = self._plan_prompt(username, user_tasks)
+        return hashlib.sha256(prompt.encode()).hexdigest()
+
+    async def _agenerate(
+        self, prompt: str, config: Optional[dict] = None
+    ) -> Optional[str]:
+        """Call Gemini on the event loop and return the raw response text.
+
+        None means use the fallback.
+
+        At most ai_max_concurrency calls are in flight per worker, and
+        each call (including its wait for a slot) gets ai_timeout
+        seconds. Timeouts and errors count towards the circuit breaker;
+        while it is open, calls fail fast without reaching Gemini.
+        """
+        if not self.client:
+            return None
+        if not ai_breaker.allow():
+            ai_stats["short_circuited"] += 1
+            return None
+
+        started = False
+        start = time.perf_counter()
+
+        async def call():
+            nonlocal started
+            ai_stats["waiting"] += 1
+            try:
+                await _ai_limiter().acquire()
+            finally:
+                ai_stats["waiting"] -= 1
+            started = True
+            ai_stats["in_flight"] += 1
+            try:
+                with timed("ai", model=GEMINI_MODEL):
+                    return await self.client.aio.models.generate_content(
+                        model=GEMINI_MODEL, contents=prompt, config=config
+                    )
+            finally:
+                ai_stats["in_flight"] -= 1
+                _ai_limiter().release()
+
+        try:
+            response = await asyncio.wait_for(call(), settings.ai_timeout)
+            text = response.text
+        except asyncio.CancelledError:
+            ai_breaker.release_trial()
+            raise
+        except asyncio.TimeoutError:
+            ai_stats["timeouts"] += 1
+            outcome = "timeout"
+            # Waiting for a slot is our own backlog, not Gemini failing
+            if started:
+                ai_breaker.record_failure()
+            else:
+                ai_breaker.release_trial()
+            text = None
+        except Exception as e:
+            print(f"AI generation failed: {e}")
+            ai_stats["errors"] += 1
+            outcome = "error"
+            ai_breaker.record_failure()
+            text = None
+        else:
+            outcome = "ok"
+            ai_breaker.record_success()
+        ai_request_duration.observe(time.perf_counter() - start, outcome)
+        return text
+
+    def _description_prompt(self, title: str) -> str:
+        """Prompt for a task description."""
+        return f"""Create a brief, concise task description for: "{title}"
 
 Keep it under 100 words. Focus on:
 - What needs to be done
@@ -37,50 +438,56 @@ Keep it under 100 words. Focus on:
 
 Make it practical and actionable. Use plain text only, no markdown formatting or asterisks."""
 
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash", contents=prompt
-            )
-            return self._clean_response(response.text)
-        except Exception as e:
-            print(f"AI generation failed: {e}")
-            return self._get_fallback_description(title)
+    def _batch_prompt(self, titles: List[str]) -> str:
+        """Prompt for several task descriptions as a JSON array."""
+        numbered = "\n".join(
+            f"{number}. {json.dumps(title)}"
+            for number, title in enumerate(titles, 1)
+        )
+        return f"""Create a brief, concise task description for each of these tasks:
 
-    def generate_daily_plan(
-        self, username: str, user_tasks: list = None
-    ) -> str:
-        """Generate a daily productivity plan using AI based on user's actual tasks."""
-        if not self.client:
-            print("Warning: No Gemini client available, using fallback")
-            return self._get_fallback_plan(username)
+{numbered}
 
-        try:
-            # Build task context from user's actual tasks, prioritizing by status
-            task_context = ""
-            if user_tasks and len(user_tasks) > 0:
-                # Sort tasks by priority: in_progress first, then todo, then done
-                priority_order = {"in_progress": 1, "todo": 2, "done": 3}
-                sorted_tasks = sorted(
-                    user_tasks,
-                    key=lambda x: priority_order.get(x["status"], 4),
-                )
+Keep each under 100 words. Focus on:
+- What needs to be done
+- Key steps (2-3 points)
+- Expected outcome
+
+Make them practical and actionable. Use plain text only, no markdown formatting or asterisks.
+
+Respond with a JSON array holding one object per task: {{"index": <task number>, "description": "<description>"}}."""
 
-                task_context = (
-                    "Based on your current tasks (prioritized by status):\n"
+    def _plan_prompt(self, username: str, user_tasks: list = None) -> str:
+        """Prompt for a daily plan, built from the user's tasks."""
+        # Build task context from user's actual tasks, prioritizing by status
+        task_context = ""
+        if user_tasks and len(user_tasks) > 0:
+            # Sort tasks by priority: in_progress first, then todo, then done
+            priority_order = {"in_progress": 1, "todo": 2, "done": 3}
+            sorted_tasks = sorted(
+                user_tasks,
+                key=lambda x: priority_order.get(x["status"], 4),
+            )
+
+            task_context = (
+                "Based on your current tasks (prioritized by status):\n"
+            )
+            for i, task in enumerate(
+                sorted_tasks[:5], 1
+            ):  # Show top 5 prioritized tasks
+                status_emoji = (
+                    "🔄"
+                    if task["status"] == "in_progress"
+                    else "📋"
+                    if task["status"] == "todo"
+                    else "✅"
                 )
-                for i, task in enumerate(
-                    sorted_tasks[:5], 1
-                ):  # Show top 5 prioritized tasks
-                    status_emoji = (
-                        "🔄"
-                        if task["status"] == "in_progress"
-                        else "📋"
-                        if task["status"] == "todo"
-                        else "✅"
-                    )
-                    task_context += f"{i}. {status_emoji} {task['title']} ({task['status']})\n"
-                task_context += "\n"
+                task_context += (
+                    f"{i}. {status_emoji} {task['title']} ({task['status']})\n"
+                )
+            task_context += "\n"
 
-            prompt = f"""Create a brief daily productivity plan for {username}.
+        return f"""Create a brief daily productivity plan for {username}.
 
 {task_context}Focus on:
 - Prioritize in-progress tasks first, then todo tasks
@@ -89,14 +496,6 @@ Make it practical and actionable. Use plain text only, no markdown formatting or
 
 Keep it under 150 words. Make it practical and motivating. Use plain text only, no markdown formatting or asterisks."""
 
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash", contents=prompt
-            )
-            return self._clean_response(response.text)
-        except Exception as e:
-            print(f"AI plan generation failed: {e}")
-            return self._get_fallback_plan(username)
-
     def _get_fallback_description(self, title: str) -> str:
         """Fallback task description when AI is unavailable."""
         title_lower = title.lower()
@@ -159,5 +558,94 @@ Steps:
 💡 Success Tip: Take 5-min breaks every hour to stay focused and energized."""
 
 
+def draft_cache_key(title: str) -> str:
+    """Cache key for a draft: prompt version plus normalized title."""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+    return f"v{DESCRIPTION_PROMPT_VERSION}:{normalized}"
+
+
+def _cache_draft(key: str, text: str) -> None:
+    """Store a Gemini draft in the cache and, if enabled, on disk."""
+    draft_cache.set(key, text)
+    if _draft_store is not None:
+        _draft_store.save(key, text, time.time() + draft_cache.ttl)
+
+
+def _pack_batches(
+    items: List[tuple], max_titles: int, max_chars: int
+) -> List[List[tuple]]:
+    """Split (key, title) items into batches within the prompt budget."""
+    batches, batch, chars = [], [], 0
+    for item in items:
+        size = len(item[1])
+        if batch and (len(batch) >= max_titles or chars + size > max_chars):
+            batches.append(batch)
+            batch, chars = [], 0
+        batch.append(item)
+        chars += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _parse_batch(text: str, count: int) -> Dict[int, str]:
+    """Map task number to description from a batch JSON response.
+
+    Malformed output or entries yield no description for those numbers.
+    """
+    try:
+        entries = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+    drafts = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        number = entry.get("index")
+        description = entry.get("description")
+        if (
+            isinstance(number, int)
+            and 1 <= number <= count
+            and isinstance(description, str)
+        ):
+            drafts[number] = description
+    return drafts
+
+
+def open_draft_store() -> None:
+    """Warm the draft cache from AI_CACHE_PATH and persist new entries."""
+    global _draft_store
+    if not settings.ai_cache_path or _draft_store is not None:
+        return
+    _draft_store = SQLiteCacheStore(settings.ai_cache_path, "ai_drafts")
+    now = time.time()
+    for key, value, expires_at in _draft_store.load():
+        draft_cache.set(key, value, ttl=expires_at - now)
+
+
+def close_draft_store() -> None:
+    """Flush pending writes to the draft store."""
+    global _draft_store
+    if _draft_store is not None:
+        _draft_store.close()
+        _draft_store = None
+
+
+_limiter: Optional[asyncio.Semaphore] = None
+_limiter_loop = None
+
+
+def _ai_limiter() -> asyncio.Semaphore:
+    """Semaphore capping in-flight Gemini calls on the running loop."""
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter_loop is not loop:
+        _limiter = asyncio.Semaphore(settings.ai_max_concurrency)
+        _limiter_loop = loop
+    return _limiter
+
+
 # Global AI service instance
 ai_service = AIService()
@@ -0,0 +1,120 @@
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from app.core.database import UPSERTS
+from app.models.task import Task
+from app.models.task_counter import GLOBAL_SCOPE, TaskCounter
+
+
+class TaskCounterService:
+    """Service for the incrementally maintained task_counters table.
+
+    Counter writes join the caller's transaction; the caller commits.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, user_id: int, status: str, delta: int) -> None:
+        """Adjust the user and global counters for a status by delta."""
+        if delta == 0:
+            return
+        # A single upsert, so concurrent first writes for the same
+        # (user, status) cannot both try to insert the row
+        upsert = UPSERTS[self.db.get_bind().dialect.name]
+        for scope in (user_id, GLOBAL_SCOPE):
+            statement = upsert(TaskCounter).values(
+                user_id=scope, status=status, count=delta
+            )
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[TaskCounter.user_id, TaskCounter.status],
+                    set_={"count": TaskCounter.count + delta},
+                )
+            )
+
+    def move(
+        self,
+        old_user_id: int,
+        old_status: str,
+        new_user_id: int,
+        new_status: str,
+    ) -> None:
+        """Move one task between (user, status) counters."""
+        if old_user_id == new_user_id and old_status == new_status:
+            return
+        self.record(old_user_id, old_status, -1)
+        self.record(new_user_id, new_status, 1)
+
+    def get_user_counts(self, user_id: int) -> Dict[str, int]:
+        """Get task counts by status for a user."""
+        rows = self.db.execute(
+            select(TaskCounter.status, TaskCounter.count).where(
+                TaskCounter.user_id == user_id
+            )
+        ).all()
+        return {row.status: row.count for row in rows}
+
+    def get_global_counts(self) -> Dict[str, int]:
+        """Get system-wide task counts by status."""
+        return self.get_user_counts(GLOBAL_SCOPE)
+
+    def rebuild(self) -> None:
+        """Recompute every counter from the tasks table and commit."""
+        self.db.execute(delete(TaskCounter))
+        for user_id, status, count in self._actual_counts():
+            self.db.execute(
+                insert(TaskCounter).values(
+                    user_id=user_id, status=status, count=count
+                )
+            )
+        self.db.commit()
+
+    def verify(self) -> List[dict]:
+        """Compare counters against the tasks table and report drift."""
+        expected = {
+            (user_id, status): count
+            for user_id, status, count in self._actual_counts()
+        }
+        stored = {
+            (row.user_id, row.status): row.count
+            for row in self.db.execute(select(TaskCounter)).scalars()
+        }
+
+        drift = []
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key, 0) != stored.get(key, 0):
+                drift.append(
+                    {
+                        "user_id": key[0],
+                        "status": key[1],
+                        "expected": expected.get(key, 0),
+                        "stored": stored.get(key, 0),
+                    }
+                )
+        return drift
+
+    def ensure_initialized(self) -> None:
+        """Build the counters once for databases that predate them."""
+        has_counters = self.db.execute(
+            select(TaskCounter.user_id).limit(1)
+        ).first()
+        has_tasks = self.db.execute(select(Task.id).limit(1)).first()
+        if has_tasks and not has_counters:
+            self.rebuild()
+
+    def _actual_counts(self) -> List[tuple]:
+        """Count tasks per (user, status) plus global totals."""
+        rows = self.db.execute(
+            select(Task.user_id, Task.status, func.count(Task.id))
+            .where(Task.user_id.is_not(None), Task.status.is_not(None))
+            .group_by(Task.user_id, Task.status)
+        ).all()
+
+        totals: Dict[str, int] = {}
+        for _, status, count in rows:
+            totals[status] = totals.get(status, 0) + count
+
+        return [tuple(row) for row in rows] + [
+            (GLOBAL_SCOPE, status, count) for status, count in totals.items()
+        ]
@@ -0,0 +1,257 @@
+"""
+Daily plans, precomputed off-peak and served from the daily_plans table.
+
+A stored plan is served while it is for today (UTC) and its snapshot
+hash matches the user's current tasks (see
+AIService.plan_snapshot_hash). Otherwise the plan is generated in the
+request and stored for the next one.
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import structlog
+from anyio import to_thread
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from app.core.circuit_breaker import OPEN
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.scheduler import DailyJob
+from app.models.daily_plan import DailyPlan
+from app.models.task import Task
+from app.models.user import User
+from app.services.ai_service import ai_breaker, ai_service
+
+logger = structlog.get_logger()
+
+# Exported on /metrics
+plan_stats = {
+    "served": 0,
+    "generated": 0,
+    "precomputed": 0,
+    "precompute_failures": 0,
+}
+
+
+def plan_day() -> date:
+    """The day plans are made for: today in UTC."""
+    return datetime.now(timezone.utc).date()
+
+
+class PlanService:
+    """Service for stored daily plans."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def task_snapshot(self, user_id: int) -> List[dict]:
+        """The user's tasks as the plan prompt sees them, in a fixed order."""
+        rows = self.db.execute(
+            select(Task.title, Task.status)
+            .where(Task.user_id == user_id)
+            .order_by(Task.id)
+        ).all()
+        return [{"title": row.title, "status": row.status} for row in rows]
+
+    def get_plan(
+        self, user_id: int, day: date, snapshot_hash: str
+    ) -> Optional[str]:
+        """The stored plan for day, if built from this snapshot."""
+        return self.db.execute(
+            select(DailyPlan.plan).where(
+                DailyPlan.user_id == user_id,
+                DailyPlan.plan_date == day,
+                DailyPlan.snapshot_hash == snapshot_hash,
+            )
+        ).scalar()
+
+    def save_plan(
+        self, user_id: int, day: date, snapshot_hash: str, plan: str
+    ) -> None:
+        """Store a plan, replacing the user's previous one."""
+        self.db.merge(
+            DailyPlan(
+                user_id=user_id,
+                plan_date=day,
+                snapshot_hash=snapshot_hash,
+                plan=plan,
+                generated_at=datetime.now(timezone.utc),
+            )
+        )
+        self.db.commit()
+
+    def active_users(self, since: datetime) -> List[Tuple[int, str]]:
+        """(id, username) of users who created or updated a task since."""
+        touched = select(Task.user_id).where(
+            or_(Task.created_at >= since, Task.updated_at >= since)
+        )
+        rows = self.db.execute(
+            select(User.id, User.username)
+            .where(User.id.in_(touched))
+            .order_by(User.id)
+        ).all()
+        return [(row.id, row.username) for row in rows]
+
+
+async def _lookup(service: PlanService, user: User):
+    """Return (tasks, snapshot hash, day, stored plan or None).
+
+    Closes the session afterwards, so its pooled connection is not held
+    while Gemini writes a plan; saving the plan reconnects briefly.
+    """
+    tasks = await run_in_threadpool(service.task_snapshot, user.id)
+    snapshot_hash = ai_service.plan_snapshot_hash(user.username, tasks)
+    day = plan_day()
+    plan = await run_in_threadpool(
+        service.get_plan, user.id, day, snapshot_hash
+    )
+    await run_in_threadpool(service.db.close)
+    return tasks, snapshot_hash, day, plan
+
+
+async def get_daily_plan(db: Session, user: User) -> str:
+    """Today's plan for the user's current tasks, stored or generated."""
+    service = PlanService(db)
+    tasks, snapshot_hash, day, plan = await _lookup(service, user)
+    if plan is not None:
+        plan_stats["served"] += 1
+        return plan
+
+    plan_stats["generated"] += 1
+    plan = await ai_service.adraft_daily_plan(user.username, tasks)
+    if plan is None:
+        return ai_service._get_fallback_plan(user.username)
+    await run_in_threadpool(
+        service.save_plan, user.id, day, snapshot_hash, plan
+    )
+    return plan
+
+
+async def daily_plan_events(db: Session, user: User):
+    """Look up today's plan, then return a stream of its events.
+
+    Events are as from AIService.astream_daily_plan. A stored plan is
+    sent at once with source "precomputed"; a newly generated one is
+    stored when the stream completes. The lookup runs before the
+    stream starts, so no connection is held while streaming.
+    """
+    service = PlanService(db)
+    tasks, snapshot_hash, day, plan = await _lookup(service, user)
+
+    async def stored():
+        plan_stats["served"] += 1
+        yield {"text": plan}
+        yield {"done": True, "source": "precomputed", "text": plan}
+
+    async def generated():
+        plan_stats["generated"] += 1
+        async for event in ai_service.astream_daily_plan(user.username, tasks):
+            if event.get("done") and event["source"] == "ai":
+                await run_in_threadpool(
+                    service.save_plan,
+                    user.id,
+                    day,
+                    snapshot_hash,
+                    event["text"],
+                )
+            yield event
+
+    return stored() if plan is not None else generated()
+
+
+def _with_service(session_factory, method: str, *args):
+    db = session_factory()
+    try:
+        return getattr(PlanService(db), method)(*args)
+    finally:
+        db.close()
+
+
+async def precompute_daily_plans(session_factory=SessionLocal) -> dict:
+    """Build today's plan for each recently active user who needs one.
+
+    Users whose stored plan still matches their tasks are skipped.
+    Gemini calls are spaced out to plan_precompute_rate per minute, and
+    the run stops if the circuit breaker opens.
+    """
+    result = {"users": 0, "precomputed": 0, "unchanged": 0, "failed": 0}
+    if ai_service.client is None:
+        return result
+
+    since = datetime.now(timezone.utc) - timedelta(
+        days=settings.plan_active_days
+    )
+    users = await to_thread.run_sync(
+        _with_service, session_factory, "active_users", since
+    )
+    result["users"] = len(users)
+    interval = 60 / settings.plan_precompute_rate
+    day = plan_day()
+
+    for user_id, username in users:
+        if ai_breaker.state == OPEN:
+            logger.warning("Plan precompute stopped: circuit breaker open")
+            break
+        tasks = await to_thread.run_sync(
+            _with_service, session_factory, "task_snapshot", user_id
+        )
+        snapshot_hash = ai_service.plan_snapshot_hash(username, tasks)
+        stored = await to_thread.run_sync(
+            _with_service,
+            session_factory,
+            "get_plan",
+            user_id,
+            day,
+            snapshot_hash,
+        )
+        if stored is not None:
+            result["unchanged"] += 1
+            continue
+
+        plan = await ai_service.adraft_daily_plan(username, tasks)
+        if plan is None:
+            result["failed"] += 1
+            plan_stats["precompute_failures"] += 1
+        else:
+            await to_thread.run_sync(
+                _with_service,
+                session_factory,
+                "save_plan",
+                user_id,
+                day,
+                snapshot_hash,
+                plan,
+            )
+            result["precomputed"] += 1
+            plan_stats["precomputed"] += 1
+        await asyncio.sleep(interval)
+    return result
+
+
+_job: Optional[DailyJob] = None
+
+
+def start_plan_scheduler() -> None:
+    """Precompute plans daily at plan_precompute_hour, if enabled.
+
+    Each worker schedules the job; the job_runs claim makes sure only
+    one of them runs it each day.
+    """
+    global _job
+    if not settings.plan_precompute_enabled or _job is not None:
+        return
+    _job = DailyJob(
+        "daily_plans",
+        settings.plan_precompute_hour,
+        precompute_daily_plans,
+        session_factory=SessionLocal,
+    )
+    _job.start()
+
+
+async def stop_plan_scheduler() -> None:
+    global _job
+    if _job is not None:
+        await _job.stop()
+        _job = None
@@ -0,0 +1,135 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.models.task_counter import GLOBAL_SCOPE, TaskCounter
+from app.models.user import User
+from app.services.counter_service import TaskCounterService
+
+ACTIVE_STATUSES = ("todo", "in_progress")
+
+
+class StatsService:
+    """Service for system-wide task statistics.
+
+    Reads from the task_counters table, so cost does not depend on the
+    number of tasks.
+    """
+
+    # Sortable columns of the user activity listing
+    USER_ACTIVITY_SORT_FIELDS = (
+        "username",
+        "total_tasks",
+        "completed_tasks",
+        "completion_rate",
+    )
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_system_overview(self) -> dict:
+        """Get global user and task totals."""
+        total_users = self.db.query(func.count(User.id)).scalar()
+        counts = TaskCounterService(self.db).get_global_counts()
+
+        return self._overview(
+            total_users,
+            sum(counts.values()),
+            sum(counts.get(status, 0) for status in ACTIVE_STATUSES),
+            counts.get("done", 0),
+        )
+
+    def get_user_activity(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        sort_by: str = "username",
+        order: str = "asc",
+    ) -> list:
+        """Get per-user task totals with a single grouped query."""
+        if sort_by not in self.USER_ACTIVITY_SORT_FIELDS:
+            raise ValueError(
+                "Invalid sort field. Must be one of: "
+                + ", ".join(self.USER_ACTIVITY_SORT_FIELDS)
+            )
+        if order not in ("asc", "desc"):
+            raise ValueError("Invalid order. Must be 'asc' or 'desc'.")
+
+        task_totals = (
+            self.db.query(
+                TaskCounter.user_id.label("user_id"),
+                func.sum(TaskCounter.count).label("total_tasks"),
+                func.sum(
+                    case(
+                        (TaskCounter.status == "done", TaskCounter.count),
+                        else_=0,
+                    )
+                ).label("completed_tasks"),
+            )
+            .filter(TaskCounter.user_id != GLOBAL_SCOPE)
+            .group_by(TaskCounter.user_id)
+            .subquery()
+        )
+        total_tasks = func.coalesce(task_totals.c.total_tasks, 0)
+        completed_tasks = func.coalesce(task_totals.c.completed_tasks, 0)
+        completion_rate = case(
+            (total_tasks > 0, completed_tasks * 100.0 / total_tasks),
+            else_=0,
+        )
+        sort_columns = {
+            "username": User.username,
+            "total_tasks": total_tasks,
+            "completed_tasks": completed_tasks,
+            "completion_rate": completion_rate,
+        }
+        sort_column = sort_columns[sort_by]
+        if order == "desc":
+            sort_column = sort_column.desc()
+
+        rows = (
+            self.db.query(
+                User.username,
+                User.is_admin,
+                total_tasks.label("total_tasks"),
+                completed_tasks.label("completed_tasks"),
+                completion_rate.label("completion_rate"),
+            )
+            .outerjoin(task_totals, task_totals.c.user_id == User.id)
+            .order_by(sort_column, User.id)
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+
+        return [
+            {
+                "username": row.username,
+                "is_admin": row.is_admin,
+                "total_tasks": row.total_tasks,
+                "completed_tasks": row.completed_tasks,
+                "completion_rate": round(row.completion_rate, 1),
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _overview(
+        total_users: int,
+        total_tasks: int,
+        active_tasks: int,
+        completed_tasks: int,
+    ) -> dict:
+        """Build the system overview payload from raw totals."""
+        total_tasks = total_tasks or 0
+        active_tasks = active_tasks or 0
+        completed_tasks = completed_tasks or 0
+        return {
+            "total_users": total_users or 0,
+            "total_tasks": total_tasks,
+            "active_tasks": active_tasks,
+            "completed_tasks": completed_tasks,
+            "completion_rate": round(
+                (completed_tasks / total_tasks * 100)
+                if total_tasks > 0
+                else 0,
+                1,
+            ),
+        }
@@ -1,7 +1,20 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import base64
+import json
+from datetime import datetime, timezone
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import String, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple, Union
 from app.models.task import Task, TaskCreate, TaskUpdate
 from app.models.user import User
+from app.services.counter_service import TaskCounterService
+
+
+TASK_STATUSES = ("todo", "in_progress", "done")
+
+# Sort keys for paginated listings; "-" means newest first
+TASK_SORTS = ("-created_at", "created_at")
 
 
 class TaskService:
@@ -9,6 +22,7 @@ class TaskService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.counters = TaskCounterService(db)
 
     def create_task(self, task_data: TaskCreate, user: User) -> Task:
         """Create a new task for the user."""
@@ -20,6 +34,8 @@ class TaskService:
             user_id=user.id,
         )
         self.db.add(db_task)
+        self.db.flush()
+        self.counters.record(db_task.user_id, db_task.status, 1)
         self.db.commit()
         self.db.refresh(db_task)
         return db_task
@@ -32,6 +48,62 @@ class TaskService:
         """Get all tasks in the system (admin only)."""
         return self.db.query(Task).all()
 
+    def list_tasks(
+        self,
+        user_id: Optional[int] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+        sort: str = "-created_at",
+        with_owner: bool = False,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """Get one page of tasks using keyset pagination on (created_at, id).
+
+        Returns the tasks and the cursor for the next page, or None when
+        this is the last page. Pass user_id=None for all tasks (admin) and
+        with_owner=True to load each task's user in the same query.
+        """
+        if sort not in TASK_SORTS:
+            raise ValueError(
+                "Invalid sort. Must be one of: " + ", ".join(TASK_SORTS)
+            )
+        if status is not None and status not in TASK_STATUSES:
+            raise ValueError("Invalid status value.")
+
+        query = self.db.query(Task)
+        if with_owner:
+            query = query.options(joinedload(Task.user))
+        if user_id is not None:
+            query = query.filter(Task.user_id == user_id)
+        if status is not None:
+            query = query.filter(Task.status == status)
+        if updated_since is not None:
+            since = self._datetime_param(updated_since)
+            query = query.filter(
+                or_(Task.updated_at >= since, Task.created_at >= since)
+            )
+
+        descending = sort.startswith("-")
+        if cursor is not None:
+            created_at, task_id = self._decode_cursor(cursor)
+            position = tuple_(Task.created_at, Task.id)
+            after = tuple_(self._datetime_param(created_at), task_id)
+            query = query.filter(
+                position < after if descending else position > after
+            )
+
+        if descending:
+            query = query.order_by(Task.created_at.desc(), Task.id.desc())
+        else:
+            query = query.order_by(Task.created_at, Task.id)
+
+        tasks = query.limit(limit + 1).all()
+        if len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        return tasks, self._encode_cursor(tasks[-1])
+
     def get_task_by_id(self, task_id: int, user_id: int) -> Optional[Task]:
         """Get a specific task by ID, ensuring it belongs to the user."""
         return (
@@ -47,6 +119,7 @@ class TaskService:
         task = self.get_task_by_id(task_id, user_id)
         if not task:
             return None
+        old_status = task.status
 
         # Update only provided fields
         if task_data.title is not None:
@@ -58,6 +131,7 @@ class TaskService:
         if task_data.total_minutes is not None:
             task.total_minutes = task_data.total_minutes
 
+        self.counters.move(task.user_id, old_status, task.user_id, task.status)
         self.db.commit()
         self.db.refresh(task)
         return task
@@ -68,6 +142,7 @@ class TaskService:
         if not task:
             return False
 
+        self.counters.record(task.user_id, task.status, -1)
         self.db.delete(task)
         self.db.commit()
         return True
@@ -78,6 +153,7 @@ class TaskService:
         if not task:
             return False
 
+        self.counters.record(task.user_id, task.status, -1)
         self.db.delete(task)
         self.db.commit()
         return True
@@ -90,6 +166,7 @@ class TaskService:
         if not task:
             return None
 
+        self.counters.move(task.user_id, task.status, task.user_id, status)
         task.status = status
         self.db.commit()
         self.db.refresh(task)
@@ -110,7 +187,117 @@ class TaskService:
         if not target_user:
             return None
 
+        self.counters.move(
+            task.user_id, task.status, target_user_id, task.status
+        )
         task.user_id = target_user_id
         self.db.commit()
         self.db.refresh(task)
         return task
+
+    @staticmethod
+    def _encode_cursor(task: Task) -> str:
+        """Encode a task's (created_at, id) position as an opaque cursor."""
+        raw = json.dumps([task.created_at.isoformat(), task.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode a cursor produced by _encode_cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, task_id = json.loads(raw)
+            return datetime.fromisoformat(created_at), int(task_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor.")
+
+    def _datetime_param(self, value: datetime):
+        """Bind a datetime in the same form the database stores it.
+
+        SQLite keeps DATETIME columns as text and CURRENT_TIMESTAMP rows
+        have no fractional seconds, so a bound datetime (always rendered
+        with microseconds) would never compare equal to them.
+        """
+        if self.db.get_bind().dialect.name != "sqlite":
+            return value
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        fmt = "%Y-%m-%d %H:%M:%S"
+        if value.microsecond:
+            fmt += ".%f"
+        return literal(value.strftime(fmt), String)
+
+
+class AsyncTaskService:
+    """Awaitable TaskService for async routes.
+
+    With an AsyncSession the TaskService queries run through
+    AsyncSession.run_sync, so I/O goes through the async driver without a
+    thread per query. With a regular Session (sync database mode) they
+    run in the thread pool.
+    """
+
+    def __init__(self, db: Union[AsyncSession, Session]):
+        self.db = db
+
+    async def _run(self, method: str, *args, **kwargs):
+        """Call a TaskService method on the wrapped session."""
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(
+                lambda session: getattr(TaskService(session), method)(
+                    *args, **kwargs
+                )
+            )
+        return await run_in_threadpool(
+            getattr(TaskService(self.db), method), *args, **kwargs
+        )
+
+    async def create_task(self, task_data: TaskCreate, user: User) -> Task:
+        """See TaskService.create_task."""
+        return await self._run("create_task", task_data, user)
+
+    async def get_user_tasks(self, user_id: int) -> List[Task]:
+        """See TaskService.get_user_tasks."""
+        return await self._run("get_user_tasks", user_id)
+
+    async def get_all_tasks(self) -> List[Task]:
+        """See TaskService.get_all_tasks."""
+        return await self._run("get_all_tasks")
+
+    async def list_tasks(
+        self, user_id: Optional[int] = None, **kwargs
+    ) -> Tuple[List[Task], Optional[str]]:
+        """See TaskService.list_tasks."""
+        return await self._run("list_tasks", user_id, **kwargs)
+
+    async def get_task_by_id(
+        self, task_id: int, user_id: int
+    ) -> Optional[Task]:
+        """See TaskService.get_task_by_id."""
+        return await self._run("get_task_by_id", task_id, user_id)
+
+    async def update_task(
+        self, task_id: int, user_id: int, task_data: TaskUpdate
+    ) -> Optional[Task]:
+        """See TaskService.update_task."""
+        return await self._run("update_task", task_id, user_id, task_data)
+
+    async def delete_task(self, task_id: int, user_id: int) -> bool:
+        """See TaskService.delete_task."""
+        return await self._run("delete_task", task_id, user_id)
+
+    async def delete_task_admin(self, task_id: int) -> bool:
+        """See TaskService.delete_task_admin."""
+        return await self._run("delete_task_admin", task_id)
+
+    async def update_task_status(
+        self, task_id: int, user_id: int, status: str
+    ) -> Optional[Task]:
+        """See TaskService.update_task_status."""
+        return await self._run("update_task_status", task_id, user_id, status)
+
+    async def assign_task_to_user(
+        self, task_id: int, target_user_id: int
+    ) -> Optional[Task]:
+        """See TaskService.assign_task_to_user."""
+        return await self._run("assign_task_to_user", task_id, target_user_id)
@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.user import User, UserCreate
-from app.core.security import get_password_hash, verify_password
-from typing import List
+from app.core.concurrency import run_in_hash_pool
+from app.core.security import get_password_hash, verify_and_update_password
+from typing import List, Optional, Union
 
 
 class UserService:
@@ -12,21 +15,22 @@ class UserService:
 
     def create_user(self, user_data: UserCreate) -> User:
         """Create a new user."""
-        # Check if user already exists
+        self._ensure_username_available(user_data.username)
+        hashed_password = get_password_hash(user_data.password)
+        return self._add_user(user_data.username, hashed_password)
+
+    def _ensure_username_available(self, username: str) -> None:
+        """Raise ValueError if the username is taken."""
         existing_user = (
-            self.db.query(User)
-            .filter(User.username == user_data.username)
-            .first()
+            self.db.query(User).filter(User.username == username).first()
         )
 
         if existing_user:
             raise ValueError("Username already registered")
 
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
-        user = User(
-            username=user_data.username, hashed_password=hashed_password
-        )
+    def _add_user(self, username: str, hashed_password: str) -> User:
+        """Insert a user with an already hashed password."""
+        user = User(username=username, hashed_password=hashed_password)
 
         self.db.add(user)
         self.db.commit()
@@ -41,11 +45,22 @@ class UserService:
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = verify_and_update_password(
+            password, user.hashed_password
+        )
+        if not verified:
             return None
+        if new_hash:
+            self.update_password_hash(user.id, new_hash)
 
         return user
 
+    def update_password_hash(self, user_id: int, hashed_password: str):
+        """Replace a user's password hash, e.g. after a cost change."""
+        user = self.get_user_by_id(user_id)
+        user.hashed_password = hashed_password
+        self.db.commit()
+
     def get_user_by_username(self, username: str) -> User:
         """Get user by username."""
         return self.db.query(User).filter(User.username == username).first()
@@ -57,3 +72,72 @@ class UserService:
     def get_all_users(self) -> List[User]:
         """Get all users (admin only)."""
         return self.db.query(User).all()
+
+    def get_all_users_with_tasks(self) -> List[User]:
+        """Get all users with their tasks loaded in one extra query."""
+        return (
+            self.db.query(User)
+            .options(selectinload(User.tasks))
+            .order_by(User.id)
+            .all()
+        )
+
+
+class AsyncUserService:
+    """Awaitable UserService for async routes.
+
+    Queries run through AsyncSession.run_sync (or the thread pool for a
+    regular Session); password hashing runs on the bounded hash pool, so
+    it never blocks the event loop and raises PoolFullError when busy.
+    """
+
+    def __init__(self, db: Union[AsyncSession, Session]):
+        self.db = db
+
+    async def _run(self, method: str, *args):
+        """Call a UserService method on the wrapped session."""
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(
+                lambda session: getattr(UserService(session), method)(*args)
+            )
+        return await run_in_threadpool(
+            getattr(UserService(self.db), method), *args
+        )
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        """See UserService.create_user."""
+        await self._run("_ensure_username_available", user_data.username)
+        hashed_password = await run_in_hash_pool(
+            get_password_hash, user_data.password
+        )
+        return await self._run(
+            "_add_user", user_data.username, hashed_password
+        )
+
+    async def authenticate_user(
+        self, username: str, password: str
+    ) -> Optional[User]:
+        """See UserService.authenticate_user."""
+        user = await self._run("get_user_by_username", username)
+        if not user:
+            return None
+        verified, new_hash = await run_in_hash_pool(
+            verify_and_update_password, password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if new_hash:
+            await self._run("update_password_hash", user.id, new_hash)
+        return user
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """See UserService.get_user_by_username."""
+        return await self._run("get_user_by_username", username)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """See UserService.get_user_by_id."""
+        return await self._run("get_user_by_id", user_id)
+
+    async def get_all_users(self) -> List[User]:
+        """See UserService.get_all_users."""
+        return await self._run("get_all_users")
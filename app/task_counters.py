@@ -0,0 +1,56 @@
+"""
+Maintenance commands for the task_counters table.
+
+Usage:
+    python -m app.task_counters verify   # report drift, exit 1 if any
+    python -m app.task_counters rebuild  # recompute from the tasks table
+"""
+import sys
+from app.core.database import Base, SessionLocal, engine
+from app.models.task import Task  # noqa: F401
+from app.models.task_counter import TaskCounter  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.services.counter_service import TaskCounterService
+
+
+def verify_counters() -> int:
+    """Print counter drift and return the number of drifted rows."""
+    db = SessionLocal()
+    try:
+        drift = TaskCounterService(db).verify()
+    finally:
+        db.close()
+
+    if not drift:
+        print("✅ Task counters match the tasks table")
+        return 0
+
+    print(f"❌ {len(drift)} task counter(s) drifted:")
+    for entry in drift:
+        print(
+            f"   user_id={entry['user_id']} status={entry['status']} "
+            f"expected={entry['expected']} stored={entry['stored']}"
+        )
+    return len(drift)
+
+
+def rebuild_counters():
+    """Recompute all task counters."""
+    db = SessionLocal()
+    try:
+        TaskCounterService(db).rebuild()
+        print("✅ Task counters rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command == "rebuild":
+        rebuild_counters()
+    elif command == "verify":
+        sys.exit(1 if verify_counters() else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
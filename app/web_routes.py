@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Request, status, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import (
+    APIRouter,
+    Body,
+    Request,
+    status,
+    Depends,
+    HTTPException,
+    Query,
+)
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.security import decode_token, get_current_user_web
+from app.core.security import (
+    get_current_user_from_cookie,
+    get_current_user_web,
+)
+from app.core.timing import TimedJinja2Templates
+from app.services.counter_service import TaskCounterService
 from app.services.task_service import TaskService
 from app.services.user_service import UserService
-from app.models.user import User
 from app.models.task import TaskCreate
 
 # Templates
-templates = Jinja2Templates(directory="app/templates")
+templates = TimedJinja2Templates(directory="app/templates")
 
 # Router
 router = APIRouter(tags=["web"])
@@ -38,54 +51,78 @@ async def signup_page(request: Request):
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db)):
+def dashboard(request: Request, db: Session = Depends(get_db)):
     """Dashboard page with user tasks."""
-    # Get current user from cookie
-    current_user = None
-    token = request.cookies.get("token")
-
-    if token:
-        try:
-            payload = decode_token(token)
-            if payload:
-                user_service = UserService(db)
-                current_user = user_service.get_user_by_username(
-                    payload.get("sub")
-                )
-        except Exception:
-            pass
-
+    current_user = get_current_user_from_cookie(request, db)
     if not current_user:
         return RedirectResponse(
             url="/login", status_code=status.HTTP_302_FOUND
         )
 
-    # Get user's tasks using service
-    task_service = TaskService(db)
-    tasks = task_service.get_user_tasks(current_user.id)
+    # Tasks themselves are loaded page by page from /web/tasks/
+    task_counts = TaskCounterService(db).get_user_counts(current_user.id)
 
     return templates.TemplateResponse(
         "dashboard.html",
-        {"request": request, "current_user": current_user, "tasks": tasks},
+        {
+            "request": request,
+            "current_user": current_user,
+            "task_counts": task_counts,
+        },
     )
 
 
 @router.get("/web/tasks/", response_class=HTMLResponse)
-async def tasks_list(request: Request, db: Session = Depends(get_db)):
-    """Get tasks as HTML for HTMX."""
+def tasks_list(
+    request: Request,
+    limit: int = Query(30, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    updated_since: Optional[datetime] = None,
+    sort: str = "-created_at",
+    db: Session = Depends(get_db),
+):
+    """Get a page of tasks as HTML for HTMX.
+
+    Without a cursor the full list container is rendered; with a cursor
+    only the next cards and "load more" trigger are returned. A bad
+    cursor, status or sort gets a 422 error fragment.
+    """
+    current_user = None
     try:
         current_user = get_current_user_web(request, db)
         task_service = TaskService(db)
 
         # If admin, show all tasks. Otherwise, show only user's tasks
-        if current_user.is_admin:
-            tasks = task_service.get_all_tasks()
-        else:
-            tasks = task_service.get_user_tasks(current_user.id)
+        tasks, next_cursor = task_service.list_tasks(
+            None if current_user.is_admin else current_user.id,
+            limit=limit,
+            cursor=cursor,
+            status=status_filter,
+            updated_since=updated_since,
+            sort=sort,
+            with_owner=current_user.is_admin,
+        )
 
+        return templates.TemplateResponse(
+            "task_cards.html" if cursor else "task_list.html",
+            {
+                "request": request,
+                "tasks": tasks,
+                "current_user": current_user,
+                "next_cursor": next_cursor,
+            },
+        )
+    except ValueError as e:
         return templates.TemplateResponse(
             "task_list.html",
-            {"request": request, "tasks": tasks, "current_user": current_user},
+            {
+                "request": request,
+                "tasks": [],
+                "current_user": current_user,
+                "error": str(e),
+            },
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         )
     except Exception as e:
         print(f"Error in tasks_list: {e}")
@@ -101,7 +138,7 @@ async def tasks_list(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/web/tasks/", response_class=HTMLResponse)
-async def create_task_web(
+def create_task_web(
     request: Request,
     task_data: TaskCreate,
     db: Session = Depends(get_db),
@@ -117,11 +154,16 @@ async def create_task_web(
 
         task_service.create_task(task_data, current_user)
 
-        # Return updated task list HTML
-        tasks = task_service.get_user_tasks(current_user.id)
+        # Return the first page of the updated task list HTML
+        tasks, next_cursor = task_service.list_tasks(current_user.id)
         return templates.TemplateResponse(
             "task_list.html",
-            {"request": request, "tasks": tasks, "current_user": current_user},
+            {
+                "request": request,
+                "tasks": tasks,
+                "current_user": current_user,
+                "next_cursor": next_cursor,
+            },
         )
     except Exception as e:
         print(f"Error in create_task_web: {e}")
@@ -137,7 +179,7 @@ async def create_task_web(
 
 
 @router.delete("/web/tasks/{task_id}")
-async def delete_task_web(
+def delete_task_web(
     task_id: int, request: Request, db: Session = Depends(get_db)
 ):
     """Delete a task via web interface."""
@@ -159,8 +201,11 @@ async def delete_task_web(
 
 
 @router.post("/web/tasks/{task_id}/assign")
-async def assign_task_web(
-    task_id: int, request: Request, db: Session = Depends(get_db)
+def assign_task_web(
+    task_id: int,
+    request: Request,
+    body: dict = Body(...),
+    db: Session = Depends(get_db),
 ):
     """Assign a task to a different user via web interface (admin only)."""
     try:
@@ -173,7 +218,6 @@ async def assign_task_web(
             )
 
         # Get the user_id from the request body
-        body = await request.json()
         target_user_id = body.get("user_id")
 
         if not target_user_id:
@@ -202,7 +246,7 @@ async def assign_task_web(
 
 
 @router.get("/web/users")
-async def get_users_for_admin(request: Request, db: Session = Depends(get_db)):
+def get_users_for_admin(request: Request, db: Session = Depends(get_db)):
     """Get all users for admin task assignment (admin only)."""
     try:
         current_user = get_current_user_web(request, db)
@@ -235,16 +279,14 @@ async def get_users_for_admin(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/debug/tasks", response_class=HTMLResponse)
-async def debug_tasks(request: Request, db: Session = Depends(get_db)):
+def debug_tasks(request: Request, db: Session = Depends(get_db)):
     """Debug endpoint to check tasks in database."""
-    # Get all users and their tasks
-    task_service = TaskService(db)
-
-    users = db.query(User).all()
+    # Get all users and their tasks (two queries in total)
+    user_service = UserService(db)
     user_info = []
 
-    for user in users:
-        tasks = task_service.get_user_tasks(user.id)
+    for user in user_service.get_all_users_with_tasks():
+        tasks = user.tasks
         user_info.append(
             {
                 "username": user.username,
@@ -0,0 +1,103 @@
+"""
+Benchmark /auth/admin/stats aggregation: query count and latency by users.
+
+Compares the previous per-user COUNT loop with StatsService on an
+in-memory SQLite database.
+
+Usage: python -m benchmarks.admin_stats
+"""
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.task import Task
+from app.models.user import User
+from app.services.stats_service import StatsService
+
+USER_COUNTS = (10, 100, 1000, 5000)
+TASKS_PER_USER = 5
+
+
+def legacy_user_activity(db):
+    """The original loop: two COUNT queries per user."""
+    user_stats = []
+    for user in db.query(User).all():
+        total = db.query(Task).filter(Task.user_id == user.id).count()
+        completed = (
+            db.query(Task)
+            .filter(Task.user_id == user.id, Task.status == "done")
+            .count()
+        )
+        user_stats.append((user.username, total, completed))
+    return user_stats
+
+
+def seed(db, user_count):
+    """Insert users with a fixed number of tasks each."""
+    for i in range(user_count):
+        db.add(User(username=f"bench_{i}", hashed_password="x"))
+    db.flush()
+    db.bulk_insert_mappings(
+        Task,
+        [
+            {
+                "title": f"Task {j}",
+                "status": ("todo", "in_progress", "done")[j % 3],
+                "user_id": user_id,
+            }
+            for user_id in range(1, user_count + 1)
+            for j in range(TASKS_PER_USER)
+        ],
+    )
+    db.commit()
+
+
+def measure(engine, func):
+    """Return (query_count, elapsed_ms) for one call of func."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    event.remove(engine, "before_cursor_execute", record)
+    return len(statements), elapsed
+
+
+def main():
+    print(
+        f"{'users':>6} | {'legacy q':>8} {'ms':>9} | {'engine q':>8} {'ms':>7}"
+    )
+    for user_count in USER_COUNTS:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, user_count)
+
+        stats_service = StatsService(db)
+        legacy = measure(engine, lambda: legacy_user_activity(db))
+        grouped = measure(
+            engine,
+            lambda: (
+                stats_service.get_system_overview(),
+                stats_service.get_user_activity(limit=1000),
+            ),
+        )
+        print(
+            f"{user_count:>6} | {legacy[0]:>8} {legacy[1]:>9.1f} | "
+            f"{grouped[0]:>8} {grouped[1]:>7.1f}"
+        )
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark task listing throughput in sync vs async database modes.
+
+Each simulated request opens its own session and fetches one page of a
+user's tasks through AsyncTaskService: on a Session via the thread pool
+(sync mode) or on an AsyncSession via the async driver (async mode).
+
+Usage: python -m benchmarks.db_modes [database_url]
+(defaults to a temporary SQLite file; pass a postgresql:// URL to
+compare psycopg2 against asyncpg)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import (
+    Base,
+    apply_sqlite_pragmas,
+    async_database_url,
+    engine_options,
+)
+from app.models.task import Task
+from app.models.user import User
+from app.services.counter_service import TaskCounterService
+from app.services.task_service import AsyncTaskService
+
+USERS = 50
+TASKS_PER_USER = 20
+REQUESTS = 1000
+CONCURRENCY_LEVELS = (1, 50, 200)
+
+
+def seed(engine):
+    """Create the schema and insert users with tasks."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        User(username=f"bench_{i}", hashed_password="x") for i in range(USERS)
+    )
+    db.flush()
+    db.bulk_insert_mappings(
+        Task,
+        [
+            {"title": f"Task {j}", "status": "todo", "user_id": user_id}
+            for user_id in range(1, USERS + 1)
+            for j in range(TASKS_PER_USER)
+        ],
+    )
+    db.commit()
+    TaskCounterService(db).rebuild()
+    db.close()
+
+
+async def run_requests(open_session, concurrency):
+    """Serve REQUESTS listings with at most concurrency in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    peak_threads = threading.active_count()
+
+    async def one_request(i):
+        nonlocal peak_threads
+        async with semaphore:
+            async with open_session() as db:
+                await AsyncTaskService(db).list_tasks(i % USERS + 1, limit=20)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - start), peak_threads
+
+
+class SyncSessionContext:
+    """Async context manager around a sync Session, like get_db."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    async def __aenter__(self):
+        self.db = self.factory()
+        return self.db
+
+    async def __aexit__(self, *exc):
+        self.db.close()
+
+
+async def main(database_url):
+    # Same engine setup as the app: instrumented pools, SQLite pragmas
+    sync_engine = create_engine(database_url, **engine_options(database_url))
+    apply_sqlite_pragmas(sync_engine)
+    seed(sync_engine)
+    sync_factory = sessionmaker(bind=sync_engine)
+    async_url = async_database_url(database_url)
+    async_engine = create_async_engine(
+        async_url, **engine_options(async_url, use_async=True)
+    )
+    apply_sqlite_pragmas(async_engine.sync_engine)
+    async_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    print(f"{REQUESTS} task listings against {sync_engine.url.drivername}")
+    print(
+        f"{'concurrency':>11} | {'sync req/s':>10} {'threads':>7} | "
+        f"{'async req/s':>11} {'threads':>7}"
+    )
+    for concurrency in CONCURRENCY_LEVELS:
+        sync_rate, sync_threads = await run_requests(
+            lambda: SyncSessionContext(sync_factory), concurrency
+        )
+        async_rate, async_threads = await run_requests(
+            async_factory, concurrency
+        )
+        print(
+            f"{concurrency:>11} | {sync_rate:>10.0f} {sync_threads:>7} | "
+            f"{async_rate:>11.0f} {async_threads:>7}"
+        )
+
+    await async_engine.dispose()
+    sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        asyncio.run(main(sys.argv[1]))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            asyncio.run(main(f"sqlite:///{path}"))
@@ -0,0 +1,124 @@
+"""
+Benchmark per-request logging cost on the request path.
+
+Emits one "Request processed" event per simulated request from many
+concurrent coroutines and reports the caller-side cost per request for:
+the previous synchronous setup (JSON rendering, stdout and file writes on
+the calling thread), the queue-based setup, and the queue-based setup
+with 10% sampling of successful requests.
+
+Usage: python -m benchmarks.logging_overhead
+(stdout is redirected to /dev/null while measuring)
+"""
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import structlog
+from app.core.config import settings
+from app.middleware import logging as app_logging
+
+REQUESTS = 20000
+CONCURRENCY = 100
+LOG_CONTEXT = {
+    "method": "GET",
+    "path": "/tasks/",
+    "user_id": 42,
+    "user_agent": "benchmark",
+    "ip_address": "127.0.0.1",
+    "correlation_id": "00000000-0000-0000-0000-000000000000",
+    "status_code": 200,
+    "latency_ms": 3,
+    "db_queries": 2,
+    "db_time_ms": 0.8,
+    "timings_ms": {"auth": 0.1, "db": 0.8, "serialization": 0.2},
+}
+
+
+def legacy_configure(log_file):
+    """The previous setup: render and write on the calling thread."""
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=False,
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(message)s",
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(log_file),
+        ],
+        force=True,
+    )
+
+
+def queue_configure(log_file):
+    """The current setup, pointed at log_file."""
+    settings.log_file = log_file
+    app_logging.configure_logging()
+
+
+async def run(sample_rate):
+    """Return per-request caller cost in microseconds (mean, p99)."""
+    logger = structlog.get_logger("benchmark")
+    costs = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one_request():
+        async with semaphore:
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            if sample_rate == 1.0 or random.random() < sample_rate:
+                logger.info(
+                    "Request processed", **LOG_CONTEXT, sample_rate=sample_rate
+                )
+            costs.append((time.perf_counter() - start) * 1e6)
+
+    await asyncio.gather(*(one_request() for _ in range(REQUESTS)))
+    costs.sort()
+    return statistics.mean(costs), costs[int(len(costs) * 0.99)]
+
+
+def main():
+    setups = [
+        ("sync (previous)", legacy_configure, 1.0),
+        ("queue", queue_configure, 1.0),
+        ("queue, 10% sampled", queue_configure, 0.1),
+    ]
+    results = []
+    real_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as null:
+        for name, configure, sample_rate in setups:
+            sys.stdout = null
+            try:
+                configure(os.path.join(tmp, "bench.log"))
+                results.append((name, asyncio.run(run(sample_rate))))
+                app_logging.stop_logging()
+            finally:
+                sys.stdout = real_stdout
+
+    print(f"{REQUESTS} requests, {CONCURRENCY} concurrent")
+    print(f"{'setup':>20} | {'mean us':>8} {'p99 us':>8}")
+    for name, (mean, p99) in results:
+        print(f"{name:>20} | {mean:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark login throughput and event-loop stalls by bcrypt cost.
+
+Fires concurrent AsyncUserService.authenticate_user calls, as /auth/login
+does, and reports logins/s, how many were rejected by the bounded hash
+pool (503 in the API), and the worst event-loop stall seen by a ticker
+coroutine while the burst ran.
+
+Usage: python -m benchmarks.login_throughput
+"""
+import asyncio
+import time
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core import security
+from app.core.concurrency import PoolFullError, hash_pool
+from app.core.database import Base
+from app.models.task import Task  # noqa: F401 (registers User.tasks)
+from app.models.user import User
+from app.services.user_service import AsyncUserService
+
+USERS = 20
+LOGINS = 200
+ROUNDS = (10, 12)
+CONCURRENCY_LEVELS = (8, 64)
+
+
+async def watch_loop(stop, interval=0.005):
+    """Return the longest delay past interval seen until stop is set."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def burst(factory, concurrency):
+    """Run LOGINS logins; return (logins/s, rejected, worst stall ms)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def one_login(i):
+        nonlocal rejected
+        async with semaphore:
+            db = factory()
+            try:
+                await AsyncUserService(db).authenticate_user(
+                    f"bench_{i % USERS}", "password123"
+                )
+            except PoolFullError:
+                rejected += 1
+            finally:
+                db.close()
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login(i) for i in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await watcher
+    return (LOGINS - rejected) / elapsed, rejected, stall * 1000
+
+
+async def main():
+    print(
+        f"hash pool: {hash_pool.executor._max_workers} threads, "
+        f"{hash_pool.limit} in flight max"
+    )
+    print(
+        f"{'rounds':>6} {'concurrency':>11} | {'logins/s':>8} "
+        f"{'rejected':>8} {'max stall ms':>12}"
+    )
+    for rounds in ROUNDS:
+        security.pwd_context = CryptContext(
+            schemes=["bcrypt"], bcrypt__rounds=rounds
+        )
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        hashed = security.get_password_hash("password123")
+        db.add_all(
+            User(username=f"bench_{i}", hashed_password=hashed)
+            for i in range(USERS)
+        )
+        db.commit()
+        db.close()
+
+        for concurrency in CONCURRENCY_LEVELS:
+            rate, rejected, stall = await burst(factory, concurrency)
+            print(
+                f"{rounds:>6} {concurrency:>11} | {rate:>8.1f} "
+                f"{rejected:>8} {stall:>12.1f}"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
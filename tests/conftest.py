@@ -1,9 +1,23 @@
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.main import app
-from app.core.database import get_db, Base
+import asyncio
+import os
+from types import SimpleNamespace
+
+# Cheap password hashing for tests; must be set before app settings load
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.database import get_db, Base, instrument_engine  # noqa: E402
+from app.core.security import user_cache  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.ai_service import (  # noqa: E402
+    ai_breaker,
+    ai_service,
+    draft_cache,
+)
 
 # Use in-memory SQLite for tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -11,6 +25,7 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine
 )
@@ -38,3 +53,115 @@ def client():
     # Clean up
     Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def count_queries():
+    """Record every SQL statement executed against the test database."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class RecordingLogger:
+    """Stand-in for a structlog logger that keeps every event."""
+
+    def __init__(self):
+        self.events = []
+
+    def _record(self, event, **fields):
+        self.events.append((event, fields))
+
+    info = warning = error = _record
+
+
+@pytest.fixture
+def admin_headers(client):
+    """Create an admin user and return its Authorization header."""
+    client.post(
+        "/auth/signup",
+        json={"username": "admin_fixture", "password": "adminpass123"},
+    )
+    db = TestingSessionLocal()
+    db.query(User).filter(User.username == "admin_fixture").update(
+        {"is_admin": True}
+    )
+    db.commit()
+    db.close()
+
+    login_response = client.post(
+        "/auth/login",
+        json={"username": "admin_fixture", "password": "adminpass123"},
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FakeGemini:
+    """Stand-in for genai.Client: async and streaming calls.
+
+    Set delay to stall async calls, error to make them raise, or
+    respond to compute the text from the prompt. Streams send the text
+    in chunk_size pieces, waiting delay before each one.
+    """
+
+    def __init__(self, text="Write the tests first."):
+        self.text = text
+        self.delay = 0.0
+        self.error = None
+        self.respond = None
+        self.calls = 0
+        self.prompts = []
+        self.chunk_size = 8
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(
+                generate_content=self._agenerate,
+                generate_content_stream=self._astream,
+            )
+        )
+
+    async def _agenerate(self, model, contents, config=None):
+        self.calls += 1
+        self.prompts.append(contents)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if self.respond is not None:
+            return SimpleNamespace(text=self.respond(contents))
+        return SimpleNamespace(text=self.text)
+
+    async def _astream(self, model, contents, config=None):
+        self.calls += 1
+        self.prompts.append(contents)
+        text = self.respond(contents) if self.respond else self.text
+
+        async def chunks():
+            for start in range(0, len(text), self.chunk_size):
+                end = start + self.chunk_size
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                if self.error is not None:
+                    raise self.error
+                yield SimpleNamespace(text=text[start:end])
+
+        return chunks()
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """Install a FakeGemini client, closed breaker and empty draft cache."""
+    draft_cache.clear()
+    fake = FakeGemini()
+    monkeypatch.setattr(ai_service, "client", fake)
+    monkeypatch.setattr(ai_breaker, "state", "closed")
+    monkeypatch.setattr(ai_breaker, "failures", 0)
+    monkeypatch.setattr(ai_breaker, "_trial_in_flight", False)
+    yield fake
+    draft_cache.clear()
@@ -0,0 +1,51 @@
+from app.models.task import Task
+from app.models.user import User
+from tests.conftest import TestingSessionLocal
+
+
+def _seed_tasks(first, last, tasks_per_user):
+    """Insert users owner_<first>..owner_<last - 1> with a few tasks each."""
+    db = TestingSessionLocal()
+    for i in range(first, last):
+        user = User(username=f"owner_{i}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        for j in range(tasks_per_user):
+            db.add(Task(title=f"Owned {j}", status="todo", user_id=user.id))
+    db.commit()
+    db.close()
+
+
+def test_admin_task_list_loads_owners_in_one_query(
+    client, admin_headers, count_queries
+):
+    """Test the admin HTMX list does not lazy-load each task's user."""
+    _seed_tasks(0, 2, 1)
+    client.get("/web/tasks/", headers=admin_headers)  # warm auth cache
+    count_queries.clear()
+    response = client.get("/web/tasks/", headers=admin_headers)
+    assert response.status_code == 200
+    assert "owner_0" in response.text
+    small = len(count_queries)
+
+    _seed_tasks(2, 10, 2)
+    count_queries.clear()
+    response = client.get("/web/tasks/", headers=admin_headers)
+    assert "owner_9" in response.text
+    assert len(count_queries) == small
+
+
+def test_debug_tasks_query_count_is_constant(client, count_queries):
+    """Test the debug page loads all users' tasks in constant queries."""
+    _seed_tasks(0, 2, 2)
+    count_queries.clear()
+    response = client.get("/debug/tasks")
+    assert response.status_code == 200
+    assert "owner_1" in response.text
+    small = len(count_queries)
+
+    _seed_tasks(2, 12, 3)
+    count_queries.clear()
+    response = client.get("/debug/tasks")
+    assert "owner_11" in response.text
+    assert len(count_queries) == small
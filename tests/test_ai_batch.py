@@ -0,0 +1,101 @@
+import json
+import re
+from app.core.config import settings
+
+
+def _echo_batch(prompt):
+    """Answer a batch prompt with one description per numbered title."""
+    titles = re.findall(r'^(\d+)\. "(.*)"$', prompt, re.MULTILINE)
+    return json.dumps(
+        [
+            {"index": int(number), "description": f"Do {title}"}
+            for number, title in titles
+        ]
+    )
+
+
+def _batch(client, headers, titles):
+    return client.post(
+        "/ai/suggest/batch", json={"titles": titles}, headers=headers
+    )
+
+
+def test_batch_uses_one_call_per_batch(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test titles are packed into batches and mapped back in order."""
+    monkeypatch.setattr(settings, "ai_batch_max_titles", 3)
+    fake_gemini.respond = _echo_batch
+    titles = [f"Task {i}" for i in range(7)]
+
+    response = _batch(client, admin_headers, titles)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["batches"] == 3
+    assert fake_gemini.calls == 3
+    assert [s["title"] for s in body["suggestions"]] == titles
+    assert [s["suggestion"] for s in body["suggestions"]] == [
+        f"Do {title}" for title in titles
+    ]
+    assert {s["source"] for s in body["suggestions"]} == {"ai"}
+
+
+def test_batch_reports_cache_hits(client, admin_headers, fake_gemini):
+    """Test cached and duplicate titles are not sent to Gemini again."""
+    fake_gemini.respond = _echo_batch
+    _batch(client, admin_headers, ["Write unit tests"])
+
+    body = _batch(
+        client,
+        admin_headers,
+        ["write unit tests", "Fix login bug", "Fix login bug!"],
+    ).json()
+
+    assert [s["source"] for s in body["suggestions"]] == [
+        "cache",
+        "ai",
+        "ai",
+    ]
+    assert body["batches"] == 1
+    assert fake_gemini.prompts[-1].count("Fix login bug") == 1
+    # Single-title drafts share the cache
+    response = client.post(
+        "/ai/suggest",
+        json={"title": "Fix login bug", "mode": "draft"},
+        headers=admin_headers,
+    )
+    assert response.json()["suggestion"] == "Do Fix login bug"
+    assert fake_gemini.calls == 2
+
+
+def test_missing_items_fall_back(client, admin_headers, fake_gemini):
+    """Test items absent from the response get the fallback text."""
+    fake_gemini.respond = lambda prompt: json.dumps(
+        [{"index": 1, "description": "Outline it"}, {"index": 9}]
+    )
+
+    body = _batch(client, admin_headers, ["Write docs", "Study SQL"]).json()
+
+    first, second = body["suggestions"]
+    assert (first["suggestion"], first["source"]) == ("Outline it", "ai")
+    assert second["source"] == "fallback"
+    assert second["suggestion"].startswith("Create focused study")
+
+
+def test_malformed_response_falls_back(client, admin_headers, fake_gemini):
+    """Test a non-JSON answer is not cached and every item falls back."""
+    fake_gemini.text = "Sure! Here are your descriptions..."
+
+    body = _batch(client, admin_headers, ["Write docs"]).json()
+    assert body["suggestions"][0]["source"] == "fallback"
+
+    fake_gemini.respond = _echo_batch
+    body = _batch(client, admin_headers, ["Write docs"]).json()
+    assert body["suggestions"][0]["source"] == "ai"
+
+
+def test_batch_validation(client, admin_headers):
+    """Test empty requests and blank titles are rejected."""
+    assert _batch(client, admin_headers, []).status_code == 422
+    assert _batch(client, admin_headers, ["ok", "  "]).status_code == 422
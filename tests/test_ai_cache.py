@@ -0,0 +1,107 @@
+import asyncio
+from app.core.cache import SQLiteCacheStore, TTLCache
+from app.core.config import settings
+from app.services import ai_service as ai_module
+from app.services.ai_service import (
+    ai_service,
+    draft_cache,
+    draft_cache_key,
+    draft_cache_stats,
+)
+
+
+def _suggest(client, headers, title):
+    return client.post(
+        "/ai/suggest", json={"title": title, "mode": "draft"}, headers=headers
+    )
+
+
+def test_key_normalizes_titles():
+    """Test near-identical titles share a cache entry."""
+    assert draft_cache_key("Write unit tests") == draft_cache_key(
+        "  write  UNIT tests! "
+    )
+    assert draft_cache_key("Fix login bug") != draft_cache_key("Fix logout")
+    assert draft_cache_key("x").startswith("v1:")
+
+
+def test_repeated_drafts_hit_the_cache(client, admin_headers, fake_gemini):
+    """Test the second request for a title skips Gemini."""
+    first = _suggest(client, admin_headers, "Write unit tests")
+    second = _suggest(client, admin_headers, "write unit tests.")
+
+    assert first.json() == second.json()
+    assert fake_gemini.calls == 1
+    body = client.get("/metrics").text
+    assert "ai_cache_hits_total" in body
+    assert "ai_cache_entries 1" in body
+
+
+def test_fallbacks_are_not_cached(client, admin_headers, fake_gemini):
+    """Test a failed call is retried on the next request."""
+    fake_gemini.error = RuntimeError("boom")
+    _suggest(client, admin_headers, "Fix login bug")
+    fake_gemini.error = None
+    response = _suggest(client, admin_headers, "Fix login bug")
+
+    assert response.json()["suggestion"] == fake_gemini.text
+    assert fake_gemini.calls == 2
+
+
+def test_concurrent_misses_share_one_call(fake_gemini, monkeypatch):
+    """Test identical titles requested together reach Gemini once."""
+    monkeypatch.setitem(draft_cache_stats, "coalesced", 0)
+    fake_gemini.delay = 0.05
+
+    async def burst():
+        return await asyncio.gather(
+            *(
+                ai_service.agenerate_task_description("Plan the sprint")
+                for _ in range(5)
+            )
+        )
+
+    assert set(asyncio.run(burst())) == {fake_gemini.text}
+    assert fake_gemini.calls == 1
+    assert draft_cache_stats["coalesced"] == 4
+
+
+def test_lru_eviction_and_expiry_are_counted(monkeypatch):
+    """Test the cache reports evictions and expirations."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") is None and cache.evictions == 1
+
+    cache.set("d", "d", ttl=-1)
+    assert cache.get("d") is None and cache.expirations == 1
+
+
+def test_drafts_survive_restart(fake_gemini, monkeypatch, tmp_path):
+    """Test persisted drafts warm a fresh cache."""
+    monkeypatch.setattr(settings, "ai_cache_path", str(tmp_path / "ai.db"))
+    ai_module.open_draft_store()
+    asyncio.run(ai_service.agenerate_task_description("Ship release"))
+    ai_module.close_draft_store()
+
+    draft_cache.clear()
+    ai_module.open_draft_store()
+    try:
+        assert draft_cache.get(draft_cache_key("Ship release")) == (
+            fake_gemini.text
+        )
+    finally:
+        ai_module.close_draft_store()
+    assert fake_gemini.calls == 1
+
+
+def test_store_drops_expired_rows(tmp_path):
+    """Test expired rows are not loaded."""
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    store.save("old", "x", 0)
+    store.save("new", "y", 4102444800)
+    store.close()
+
+    reopened = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    assert reopened.load() == [("new", "y", 4102444800)]
+    reopened.close()
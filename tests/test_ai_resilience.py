@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.services import ai_service as ai_module
+from app.services.ai_service import ai_breaker, ai_service, ai_stats
+
+
+def _suggest(client, headers, title="Write docs"):
+    return client.post(
+        "/ai/suggest", json={"title": title, "mode": "draft"}, headers=headers
+    )
+
+
+def test_breaker_opens_and_recovers(monkeypatch):
+    """Test consecutive failures open the breaker until a trial succeeds."""
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()  # the trial call
+    assert not breaker.allow()  # only one at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened_total == 2
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_async_suggestion(client, admin_headers, fake_gemini):
+    """Test drafts come from the async Gemini client."""
+    fake_gemini.text = "**Outline** the docs"
+    response = _suggest(client, admin_headers)
+    assert response.json()["suggestion"] == "Outline the docs"
+    assert fake_gemini.calls == 1
+
+
+def test_timeout_serves_fallback(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test a call past its deadline returns the canned description."""
+    monkeypatch.setattr(settings, "ai_timeout", 0.05)
+    monkeypatch.setitem(ai_stats, "timeouts", 0)
+    fake_gemini.delay = 1
+
+    response = _suggest(client, admin_headers, title="Study for exam")
+
+    assert response.status_code == 200
+    assert response.json()["suggestion"].startswith("Create focused study")
+    assert ai_stats["timeouts"] == 1
+    assert ai_breaker.failures == 1
+
+
+def test_open_breaker_skips_gemini(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test repeated failures stop calls reaching Gemini at all."""
+    monkeypatch.setattr(ai_breaker, "failure_threshold", 2)
+    monkeypatch.setitem(ai_stats, "short_circuited", 0)
+    fake_gemini.error = RuntimeError("503 UNAVAILABLE")
+
+    for _ in range(4):
+        assert _suggest(client, admin_headers).status_code == 200
+
+    assert fake_gemini.calls == 2
+    assert ai_stats["short_circuited"] == 2
+    body = client.get("/metrics").text
+    assert "ai_circuit_state 2" in body
+    assert 'ai_request_duration_seconds_count{outcome="error"}' in body
+
+
+def test_concurrency_is_capped(fake_gemini, monkeypatch):
+    """Test no more than ai_max_concurrency calls run at once."""
+    monkeypatch.setattr(settings, "ai_max_concurrency", 2)
+    monkeypatch.setattr(ai_module, "_limiter_loop", None)
+    peak = [0]
+    agenerate = fake_gemini.aio.models.generate_content
+
+    async def tracked(model, contents, config=None):
+        peak[0] = max(peak[0], ai_stats["in_flight"])
+        return await agenerate(model, contents, config)
+
+    fake_gemini.aio.models.generate_content = tracked
+    fake_gemini.delay = 0.05
+
+    async def burst():
+        return await asyncio.gather(
+            *(
+                ai_service.agenerate_task_description(f"task {i}")
+                for i in range(6)
+            )
+        )
+
+    results = asyncio.run(burst())
+    assert results == ["Write the tests first."] * 6
+    assert peak[0] == 2
+
+
+def test_cancelled_trial_frees_breaker(fake_gemini, monkeypatch):
+    """Test a half-open trial cancelled by a disconnect is not leaked."""
+    monkeypatch.setattr(ai_breaker, "state", "open")
+    monkeypatch.setattr(ai_breaker, "reset_timeout", 0)
+    fake_gemini.delay = 1
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(
+            ai_service.agenerate_task_description("x")
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert ai_breaker.state == "half_open"
+    assert ai_breaker.allow()
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from app.core.config import settings
+from app.services.ai_service import StreamingCleaner, ai_service
+from tests.conftest import engine
+
+RAW = "## Plan:\n\n**Write**  the *tests*  #first,\tthen  ship # it. #"
+
+
+def _events(response):
+    """Parse an SSE body into (event name, data) pairs."""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append(
+            (lines.get("event", "message"), json.loads(lines["data"]))
+        )
+    return events
+
+
+def _stream(client, headers, **body):
+    return client.post("/ai/suggest/stream", json=body, headers=headers)
+
+
+def test_streaming_cleaner_matches_clean_response():
+    """Test cleaning chunk by chunk gives the same text at any split."""
+    expected = ai_service._clean_response(RAW)
+    for i in range(len(RAW) + 1):
+        for j in range(i, len(RAW) + 1):
+            cleaner = StreamingCleaner()
+            chunks = [RAW[:i], RAW[i:j], RAW[j:]]
+            assert "".join(cleaner.feed(c) for c in chunks) == expected
+
+
+def test_stream_sends_chunks_then_done(client, admin_headers, fake_gemini):
+    """Test text arrives in several events and the done event has it all."""
+    fake_gemini.text = "Write the tests first, then ship it."
+
+    response = _stream(client, admin_headers, title="Ship it", mode="draft")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = _events(response)
+    *chunks, (name, done) = events
+    assert len(chunks) > 1
+    assert "".join(data["text"] for _, data in chunks) == fake_gemini.text
+    assert name == "done"
+    assert done == {"source": "ai", "text": fake_gemini.text}
+
+
+def test_streamed_draft_is_cached(client, admin_headers, fake_gemini):
+    """Test a streamed draft is reused by the next request."""
+    _stream(client, admin_headers, title="Ship it", mode="draft")
+    events = _events(
+        _stream(client, admin_headers, title="ship it!", mode="draft")
+    )
+
+    assert fake_gemini.calls == 1
+    assert events[-1] == (
+        "done",
+        {"source": "cache", "text": fake_gemini.text},
+    )
+
+
+def test_stream_falls_back_on_error(client, admin_headers, fake_gemini):
+    """Test a failed stream ends with the fallback, which is not cached."""
+    fake_gemini.error = RuntimeError("quota exceeded")
+
+    events = _events(
+        _stream(client, admin_headers, title="Ship it", mode="draft")
+    )
+    name, done = events[-1]
+    assert (name, done["source"]) == ("done", "fallback")
+
+    fake_gemini.error = None
+    events = _events(
+        _stream(client, admin_headers, title="Ship it", mode="draft")
+    )
+    assert events[-1][1]["source"] == "ai"
+
+
+def test_stream_times_out_between_chunks(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test a stalled stream hits the per-chunk deadline."""
+    monkeypatch.setattr(settings, "ai_timeout", 0.05)
+    fake_gemini.delay = 0.5
+
+    events = _events(_stream(client, admin_headers, mode="plan"))
+
+    assert events[-1][0] == "done"
+    assert events[-1][1]["source"] == "fallback"
+    assert "Daily Plan for admin" in events[-1][1]["text"]
+
+
+def test_stream_holds_no_connection(client, admin_headers, fake_gemini):
+    """Test the request's pooled connection is returned before streaming."""
+    checked_out = []
+
+    def respond(prompt):
+        checked_out.append(engine.pool.checkedout())
+        return "Streamed without a connection."
+
+    fake_gemini.respond = respond
+    _stream(client, admin_headers, title="Pool", mode="draft")
+
+    assert checked_out == [0]
+
+
+def test_stream_validates_before_streaming(client, admin_headers):
+    """Test bad requests get a JSON 422, not an event stream."""
+    response = _stream(client, admin_headers, mode="draft")
+    assert response.status_code == 422
+    response = _stream(client, admin_headers, title="x", mode="essay")
+    assert response.status_code == 422
+
+
+def test_abandoned_stream_frees_its_slot(fake_gemini):
+    """Test closing the generator early releases the concurrency slot."""
+    from app.services.ai_service import ai_stats
+
+    async def read_one():
+        events = ai_service.astream_task_description("Abandon me")
+        await events.__anext__()
+        await events.aclose()
+
+    asyncio.run(read_one())
+    assert ai_stats["in_flight"] == 0
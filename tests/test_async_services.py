@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.core import database
+from app.core.config import settings
+from app.core.database import (
+    Base,
+    async_database_url,
+    get_async_db,
+    get_service_db,
+)
+from app.core.security import user_cache
+from app.main import app
+from app.models.user import User
+from app.models.task import TaskCreate
+from app.models.user import UserCreate
+from app.services.counter_service import TaskCounterService
+from app.services.task_service import AsyncTaskService
+from app.services.user_service import AsyncUserService
+
+
+def test_async_database_url():
+    """Test sync URLs map onto their asyncio drivers."""
+    assert (
+        async_database_url("sqlite:///./sprintsync.db")
+        == "sqlite+aiosqlite:///./sprintsync.db"
+    )
+    assert (
+        async_database_url("postgresql://u:secret@db:5432/sprintsync")
+        == "postgresql+asyncpg://u:secret@db:5432/sprintsync"
+    )
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u@db/sprintsync")
+
+
+def test_async_services_on_async_session():
+    """Test the async services work end to end on an AsyncSession."""
+
+    async def scenario():
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", poolclass=StaticPool
+        )
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as db:
+            user_service = AsyncUserService(db)
+            user = await user_service.create_user(
+                UserCreate(username="async_user", password="testpass123")
+            )
+            with pytest.raises(ValueError):
+                await user_service.create_user(
+                    UserCreate(username="async_user", password="other")
+                )
+            assert await user_service.authenticate_user(
+                "async_user", "testpass123"
+            )
+            assert not await user_service.authenticate_user(
+                "async_user", "wrong"
+            )
+
+            task_service = AsyncTaskService(db)
+            task = await task_service.create_task(
+                TaskCreate(title="Async task"), user
+            )
+            await task_service.update_task_status(task.id, user.id, "done")
+            tasks, next_cursor = await task_service.list_tasks(user.id)
+            counts = await db.run_sync(
+                lambda session: TaskCounterService(session).get_user_counts(
+                    user.id
+                )
+            )
+
+        await engine.dispose()
+        return tasks, next_cursor, counts
+
+    tasks, next_cursor, counts = asyncio.run(scenario())
+    assert [task.title for task in tasks] == ["Async task"]
+    assert tasks[0].status == "done"
+    assert next_cursor is None
+    assert counts == {"todo": 0, "done": 1}
+
+
+@pytest.fixture
+def async_mode(tmp_path, monkeypatch):
+    """Run the app as with DATABASE_ASYNC=true on a file database."""
+    database_url = f"sqlite:///{tmp_path / 'async_mode.db'}"
+    sync_engine = create_engine(database_url)
+    Base.metadata.create_all(bind=sync_engine)
+    monkeypatch.setattr(settings, "database_url", database_url)
+    monkeypatch.setattr(settings, "database_async", True)
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(database, "_async_session_factory", None)
+    # get_service_db is chosen at import; route it the way the setting
+    # would have
+    app.dependency_overrides[get_service_db] = get_async_db
+
+    with TestClient(app) as client:
+        yield client, sync_engine
+
+    app.dependency_overrides.clear()
+    user_cache.clear()
+    sync_engine.dispose()
+
+
+def test_auth_in_async_database_mode(async_mode):
+    """Test signup and login through get_async_db and the async engine."""
+    client, sync_engine = async_mode
+    credentials = {"username": "async_mode_user", "password": "secret123"}
+
+    assert client.post("/auth/signup", json=credentials).status_code == 200
+    response = client.post("/auth/login", json=credentials)
+
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+    with sync_engine.connect() as connection:
+        users = connection.scalar(
+            select(func.count())
+            .select_from(User)
+            .where(User.username == "async_mode_user")
+        )
+    assert users == 1
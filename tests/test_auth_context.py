@@ -0,0 +1,93 @@
+from app.core.security import decode_token, user_cache
+from app.models.user import User
+from tests.conftest import TestingSessionLocal
+
+
+def _login(client, username="cached_user"):
+    client.post(
+        "/auth/signup", json={"username": username, "password": "secret123"}
+    )
+    response = client.post(
+        "/auth/login", json={"username": username, "password": "secret123"}
+    )
+    return response.json()["access_token"]
+
+
+def _user_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_token_carries_user_claims(client):
+    """Test login tokens embed the user's id and admin flag."""
+    claims = decode_token(_login(client))
+    assert claims["sub"] == "cached_user"
+    assert isinstance(claims["user_id"], int)
+    assert claims["is_admin"] is False
+
+
+def test_authenticated_requests_skip_user_query(client, count_queries):
+    """Test only the first authenticated request loads the user."""
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+
+    count_queries.clear()
+    assert client.get("/tasks/", headers=headers).status_code == 200
+    assert len(_user_queries(count_queries)) == 1
+
+    count_queries.clear()
+    for _ in range(3):
+        assert client.get("/tasks/", headers=headers).status_code == 200
+        client.get("/web/tasks/", headers=headers)
+    assert _user_queries(count_queries) == []
+
+
+def test_user_change_invalidates_cache(client):
+    """Test a user update is visible to the next request."""
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.get("/auth/admin/stats", headers=headers).status_code == 403
+    assert len(user_cache) == 1
+
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "cached_user").one()
+    user.is_admin = True
+    db.commit()
+    db.close()
+
+    assert len(user_cache) == 0
+    assert client.get("/auth/admin/stats", headers=headers).status_code == 200
+
+
+def test_cache_is_invalidated_on_commit_only(client):
+    """Test flushed or rolled-back user changes keep the cached entry."""
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    client.get("/tasks/", headers=headers)
+
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "cached_user").one()
+    user.is_admin = True
+    db.flush()
+    assert len(user_cache) == 1
+    db.rollback()
+    db.close()
+    assert len(user_cache) == 1
+
+    db = TestingSessionLocal()
+    db.query(User).filter(User.username == "cached_user").update(
+        {"is_admin": True}
+    )
+    assert len(user_cache) == 1
+    db.commit()
+    db.close()
+    assert len(user_cache) == 0
+
+
+def test_deleted_user_is_rejected(client):
+    """Test a token stops working once its user is deleted."""
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.get("/tasks/", headers=headers).status_code == 200
+
+    db = TestingSessionLocal()
+    db.query(User).filter(User.username == "cached_user").delete()
+    db.commit()
+    db.close()
+
+    assert client.get("/tasks/", headers=headers).status_code == 401
@@ -0,0 +1,48 @@
+import threading
+import time
+
+STALL_SECONDS = 1.5
+
+
+def test_stalled_ai_call_does_not_block_task_list(client, fake_gemini):
+    """Test a hung Gemini call leaves /web/tasks/ latency unaffected."""
+    client.post(
+        "/auth/signup",
+        json={"username": "concurrent_unique", "password": "testpass123"},
+    )
+    login_response = client.post(
+        "/auth/login",
+        json={"username": "concurrent_unique", "password": "testpass123"},
+    )
+    headers = {
+        "Authorization": f"Bearer {login_response.json()['access_token']}"
+    }
+
+    fake_gemini.text = "Slow suggestion"
+    fake_gemini.delay = STALL_SECONDS
+
+    ai_responses = []
+    ai_request = threading.Thread(
+        target=lambda: ai_responses.append(
+            client.post(
+                "/ai/suggest",
+                json={"title": "Slow", "mode": "draft"},
+                headers=headers,
+            )
+        )
+    )
+    ai_request.start()
+    deadline = time.monotonic() + 5
+    while fake_gemini.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fake_gemini.calls == 1
+
+    start = time.perf_counter()
+    for _ in range(3):
+        response = client.get("/web/tasks/", headers=headers)
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+
+    ai_request.join()
+    assert ai_responses[0].json()["suggestion"] == "Slow suggestion"
+    assert elapsed < STALL_SECONDS / 2
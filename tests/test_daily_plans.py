@@ -0,0 +1,190 @@
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from app.core.config import settings
+from app.core.scheduler import DailyJob, claim_run
+from app.services.ai_service import ai_breaker
+from app.services.plan_service import plan_stats, precompute_daily_plans
+from tests.conftest import TestingSessionLocal, engine
+
+
+def _plan(client, headers):
+    return client.post("/ai/suggest", json={"mode": "plan"}, headers=headers)
+
+
+def _add_task(client, headers, title, status="todo"):
+    return client.post(
+        "/tasks/",
+        json={"title": title, "description": "", "status": status},
+        headers=headers,
+    ).json()
+
+
+def _update_task(client, headers, task, **changes):
+    client.put(
+        f"/tasks/{task['id']}", json={**task, **changes}, headers=headers
+    )
+
+
+def _user_headers(client, username):
+    credentials = {"username": username, "password": "secret123"}
+    client.post("/auth/signup", json=credentials)
+    response = client.post("/auth/login", json=credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _precompute():
+    return asyncio.run(precompute_daily_plans(TestingSessionLocal))
+
+
+def test_plan_is_stored_and_reused(client, admin_headers, fake_gemini):
+    """Test the second plan request is served without calling Gemini."""
+    _add_task(client, admin_headers, "Write the report")
+
+    first = _plan(client, admin_headers).json()["suggestion"]
+    second = _plan(client, admin_headers).json()["suggestion"]
+
+    assert first == second == fake_gemini.text
+    assert fake_gemini.calls == 1
+
+
+def test_only_prompt_changes_regenerate(client, admin_headers, fake_gemini):
+    """Test edits the plan prompt ignores keep the stored plan."""
+    task = _add_task(client, admin_headers, "Write the report")
+    _plan(client, admin_headers)
+
+    _update_task(client, admin_headers, task, description="More detail")
+    _plan(client, admin_headers)
+    assert fake_gemini.calls == 1
+
+    _update_task(client, admin_headers, task, status="in_progress")
+    _plan(client, admin_headers)
+    assert fake_gemini.calls == 2
+
+
+def test_fallback_plans_are_not_stored(client, admin_headers, fake_gemini):
+    """Test a failed generation is retried on the next request."""
+    fake_gemini.error = RuntimeError("quota exceeded")
+    fallback = _plan(client, admin_headers).json()["suggestion"]
+    assert "Daily Plan for admin_fixture" in fallback
+
+    fake_gemini.error = None
+    assert _plan(client, admin_headers).json()["suggestion"] == (
+        fake_gemini.text
+    )
+
+
+def test_precompute_builds_plans_for_active_users(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test the nightly run fills the store and skips unchanged users."""
+    monkeypatch.setattr(settings, "plan_precompute_rate", 1e6)
+    _add_task(client, admin_headers, "Write the report")
+    _add_task(client, _user_headers(client, "planner"), "Review PRs")
+    _user_headers(client, "idle_user")
+    precomputed = plan_stats["precomputed"]
+
+    result = _precompute()
+
+    assert result == {
+        "users": 2,
+        "precomputed": 2,
+        "unchanged": 0,
+        "failed": 0,
+    }
+    assert plan_stats["precomputed"] == precomputed + 2
+    assert _precompute()["unchanged"] == 2
+
+    _plan(client, admin_headers)
+    assert fake_gemini.calls == 2
+
+
+def test_precompute_stops_when_breaker_opens(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test a failing Gemini does not get one call per user."""
+    monkeypatch.setattr(settings, "plan_precompute_rate", 1e6)
+    monkeypatch.setattr(ai_breaker, "failure_threshold", 1)
+    fake_gemini.error = RuntimeError("quota exceeded")
+    for name in ("first", "second", "third"):
+        _add_task(client, _user_headers(client, name), "Review PRs")
+
+    result = _precompute()
+
+    assert (result["users"], result["failed"]) == (3, 1)
+    assert result["precomputed"] == 0
+    assert fake_gemini.calls == 1
+
+
+def test_stream_serves_precomputed_plan(
+    client, admin_headers, fake_gemini, monkeypatch
+):
+    """Test the streaming endpoint sends a stored plan in one piece."""
+    monkeypatch.setattr(settings, "plan_precompute_rate", 1e6)
+    _add_task(client, admin_headers, "Write the report")
+    _precompute()
+
+    response = client.post(
+        "/ai/suggest/stream", json={"mode": "plan"}, headers=admin_headers
+    )
+
+    *_, done = response.text.strip().split("\n\n")
+    assert done.startswith("event: done")
+    data = json.loads(done.split("data: ", 1)[1])
+    assert data == {"source": "precomputed", "text": fake_gemini.text}
+    assert fake_gemini.calls == 1
+
+
+def test_daily_job_waits_for_its_hour():
+    """Test the next run is today's hour if still ahead, else tomorrow's."""
+    job = DailyJob("plans", 3, None)
+    before = datetime(2026, 10, 18, 1, 30, tzinfo=timezone.utc)
+    after = datetime(2026, 10, 18, 3, 0, tzinfo=timezone.utc)
+
+    assert job.seconds_until_next_run(before) == 90 * 60
+    assert job.seconds_until_next_run(after) == 24 * 3600
+
+
+def test_plan_requests_hold_no_connection(client, admin_headers, fake_gemini):
+    """Test no pooled connection is held while Gemini writes a plan."""
+    checked_out = []
+
+    def respond(prompt):
+        checked_out.append(engine.pool.checkedout())
+        return "Plan written without a connection."
+
+    fake_gemini.respond = respond
+    _add_task(client, admin_headers, "Write the report")
+    _plan(client, admin_headers)
+    _add_task(client, admin_headers, "Review PRs", status="in_progress")
+    client.post(
+        "/ai/suggest/stream", json={"mode": "plan"}, headers=admin_headers
+    )
+
+    assert checked_out == [0, 0]
+    assert _plan(client, admin_headers).json()["suggestion"] == (
+        "Plan written without a connection."
+    )
+    assert fake_gemini.calls == 2
+
+
+def test_only_one_worker_claims_a_run(client):
+    """Test a day's run is claimed once across workers."""
+    day = date(2026, 10, 18)
+    assert claim_run(TestingSessionLocal, "daily_plans", day) is True
+    assert claim_run(TestingSessionLocal, "daily_plans", day) is False
+    assert claim_run(TestingSessionLocal, "other_job", day) is True
+    assert claim_run(TestingSessionLocal, "daily_plans", date(2026, 10, 19))
+
+
+def test_daily_job_skips_run_claimed_elsewhere(client):
+    """Test the second worker's job does not run the day's job."""
+
+    async def claims():
+        jobs = [
+            DailyJob("plans", 3, None, session_factory=TestingSessionLocal)
+            for _ in range(3)
+        ]
+        return [await job.claim() for job in jobs]
+
+    assert asyncio.run(claims()) == [True, False, False]
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.core import database
+from app.core.config import settings
+from app.core.database import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    apply_sqlite_pragmas,
+    engine_options,
+    get_async_engine,
+    pool_stats,
+)
+
+
+def test_engine_options_by_backend():
+    """Test pool sizing applies to file and server databases only."""
+    memory = engine_options("sqlite://")
+    assert "pool_size" not in memory
+    assert memory["connect_args"] == {"check_same_thread": False}
+
+    sqlite_file = engine_options("sqlite:///./app.db")
+    assert sqlite_file["poolclass"] is InstrumentedQueuePool
+    assert sqlite_file["pool_pre_ping"] is True
+
+    postgres = engine_options("postgresql://u:p@db/sprintsync")
+    assert "connect_args" not in postgres
+    assert postgres["pool_size"] == 5
+    assert postgres["max_overflow"] == 10
+
+
+def test_sqlite_pragmas_applied(tmp_path):
+    """Test new SQLite connections get WAL and the tuning pragmas."""
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine)
+
+    with engine.connect() as connection:
+
+        def pragma(name):
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("cache_size") == -64000
+    engine.dispose()
+
+
+def test_pool_records_checkouts_and_timeouts(tmp_path):
+    """Test the instrumented pool counts checkouts and timeouts."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    checkouts = pool_stats["checkouts"]
+    timeouts = pool_stats["timeouts"]
+
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+
+    assert pool_stats["checkouts"] == checkouts + 1
+    assert pool_stats["timeouts"] == timeouts + 1
+    assert pool_stats["wait_seconds_max"] >= 0.05
+    engine.dispose()
+
+
+def test_async_engine_checks_out_connections(tmp_path, monkeypatch):
+    """Test the shared async engine's pool works on a file database."""
+    monkeypatch.setattr(
+        settings, "database_url", f"sqlite:///{tmp_path / 'async.db'}"
+    )
+    monkeypatch.setattr(database, "_async_engine", None)
+    checkouts = pool_stats["checkouts"]
+
+    async def scenario():
+        async_engine = get_async_engine()
+        try:
+            async with async_engine.connect() as connection:
+                value = await connection.scalar(text("SELECT 1"))
+            return value, async_engine.pool
+        finally:
+            await async_engine.dispose()
+
+    value, pool = asyncio.run(scenario())
+    assert value == 1
+    assert isinstance(pool, InstrumentedAsyncQueuePool)
+    assert pool_stats["checkouts"] == checkouts + 1
+
+
+def test_metrics_export_pool_gauges(client):
+    """Test /metrics includes the connection pool metrics."""
+    body = client.get("/metrics").text
+    assert "db_pool_checkouts_total" in body
+    assert 'db_pool_capacity{engine="sync"} 15' in body
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from sqlalchemy import event
+from app.core import database, health
+from app.core.config import settings
+from app.core.health import HealthChecker
+from app.core.loop_monitor import loop_stats
+
+
+def _check(status):
+    return lambda: {
+        "status": status,
+        "latency_ms": 0.0,
+        "error": None,
+        "checked_at": time.time(),
+    }
+
+
+def test_liveness(client):
+    """Test the liveness probe always answers."""
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_reports_cached_checks(client):
+    """Test readiness includes the startup check results."""
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+
+    report = response.json()
+    assert report["status"] == "ready"
+    assert report["checks"]["database"]["status"] == "up"
+    assert report["checks"]["ai"]["status"] == "disabled"
+
+
+def test_probes_do_not_query_the_database(client):
+    """Test probe traffic is served from the cached results."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        for path in ("/health", "/health/live", "/health/ready"):
+            assert client.get(path).status_code == 200
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+    assert statements == []
+
+
+def test_saturated_pool_is_not_ready(client, monkeypatch):
+    """Test a full connection pool takes the worker out of rotation."""
+    monkeypatch.setattr(
+        health,
+        "get_pool_status",
+        lambda: {"sync": {"checked_out": 15, "capacity": 15}},
+    )
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["db_pool sync saturated"]
+    assert client.get("/health").json()["status"] == "unhealthy"
+
+
+def test_thread_pool_backlog_threshold(monkeypatch):
+    """Test a small threadpool backlog stays ready; a long one does not."""
+    monkeypatch.setattr(settings, "readiness_thread_pool_waiting", 20)
+    monkeypatch.setattr(health, "get_pool_status", lambda: {})
+    checker = HealthChecker({"database": (_check("up"), 5, True)}, 1)
+    asyncio.run(checker.run_due_checks())
+
+    monkeypatch.setitem(loop_stats, "thread_pool_waiting", 3)
+    assert checker.readiness()["status"] == "ready"
+
+    monkeypatch.setitem(loop_stats, "thread_pool_waiting", 20)
+    report = checker.readiness()
+    assert report["status"] == "not_ready"
+    assert report["reasons"] == ["thread pool saturated"]
+
+
+def test_critical_and_optional_failures():
+    """Test a down database fails readiness but a down AI only degrades."""
+    checker = HealthChecker(
+        {
+            "database": (_check("up"), 5, True),
+            "ai": (_check("down"), 60, False),
+        },
+        timeout=1,
+    )
+    asyncio.run(checker.run_due_checks())
+    assert checker.readiness()["status"] == "degraded"
+
+    checker.checks["database"] = (_check("down"), 5, True)
+    checker._due["database"] = 0.0
+    asyncio.run(checker.run_due_checks())
+    report = checker.readiness()
+    assert report["status"] == "not_ready"
+    assert report["reasons"] == ["database: down"]
+
+
+def test_slow_check_times_out():
+    """Test a hung dependency is reported down instead of blocking."""
+
+    def hang():
+        time.sleep(0.5)
+
+    checker = HealthChecker({"database": (hang, 5, True)}, timeout=0.05)
+    asyncio.run(checker.run_due_checks())
+    assert checker.results["database"]["error"] == "timed out"
@@ -0,0 +1,74 @@
+import json
+import logging
+import queue
+import pytest
+import structlog
+from app.core.config import settings
+from app.middleware import logging as app_logging
+from app.middleware import observability
+from tests.conftest import RecordingLogger
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """Route logging to a temporary file, restoring the default after."""
+    path = tmp_path / "app.log"
+    monkeypatch.setattr(settings, "log_file", str(path))
+    app_logging.configure_logging()
+    yield path
+    monkeypatch.undo()
+    app_logging.configure_logging()
+
+
+def test_writer_thread_renders_json_and_tracebacks(log_file):
+    """Test queued events are written as JSON, tracebacks included."""
+    logger = structlog.get_logger("test")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.error("Request failed", path="/boom", exc_info=True)
+    app_logging.stop_logging()
+
+    (record,) = [
+        json.loads(line) for line in log_file.read_text().splitlines()
+    ]
+    assert record["event"] == "Request failed"
+    assert record["path"] == "/boom"
+    assert "RuntimeError: boom" in record["exception"]
+
+
+def test_full_queue_drops_and_counts():
+    """Test a full queue drops records instead of blocking the caller."""
+    handler = app_logging.DroppingQueueHandler(queue.Queue(maxsize=1))
+    dropped = app_logging.log_stats["dropped"]
+    for _ in range(3):
+        handler.handle(
+            logging.LogRecord("test", logging.INFO, "", 0, "msg", None, None)
+        )
+    assert app_logging.log_stats["dropped"] == dropped + 2
+
+
+def test_successful_requests_are_sampled(client, admin_headers, monkeypatch):
+    """Test sampling skips fast successes but keeps errors."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+    monkeypatch.setattr(settings, "log_sample_rate", 0.0)
+
+    client.get("/tasks/", headers=admin_headers)
+    client.get("/tasks/99999", headers=admin_headers)
+
+    ((_, fields),) = recorder.events
+    assert fields["status_code"] == 404
+    assert fields["sample_rate"] == 1.0
+
+
+def test_slow_requests_are_always_logged(client, admin_headers, monkeypatch):
+    """Test requests over the slow threshold bypass sampling."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+    monkeypatch.setattr(settings, "log_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "log_slow_request_ms", 0)
+
+    client.get("/tasks/", headers=admin_headers)
+
+    assert len(recorder.events) == 1
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from anyio import to_thread
+from app.core import loop_monitor
+from app.core.loop_monitor import LoopMonitor, event_loop_lag, loop_stats
+from tests.conftest import RecordingLogger
+
+
+def _blocking_marker():
+    time.sleep(0.3)
+
+
+def test_watchdog_logs_blocking_stack(monkeypatch):
+    """Test a blocked loop is reported with the blocking call's stack."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(loop_monitor, "logger", recorder)
+    event_loop_lag.clear()
+    blocked_before = loop_stats["blocked_total"]
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        _blocking_marker()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    ((event, fields),) = recorder.events
+    assert event == "Event loop blocked"
+    assert "_blocking_marker" in fields["stack"]
+    assert loop_stats["blocked_total"] == blocked_before + 1
+    ((_, _, total, _),) = event_loop_lag.snapshot()
+    assert total >= 0.2
+
+
+def test_probe_samples_thread_pool_load():
+    """Test busy default-pool threads show up in the load gauges."""
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=10)
+        monitor.start()
+        worker = asyncio.create_task(to_thread.run_sync(time.sleep, 0.2))
+        await asyncio.sleep(0.1)
+        busy = loop_stats["thread_pool_busy"]
+        await worker
+        await monitor.stop()
+        return busy
+
+    assert asyncio.run(scenario()) >= 1
+
+
+def test_metrics_export_loop_and_load_gauges(client):
+    """Test /metrics exposes lag, pool load and in-flight requests."""
+    body = client.get("/metrics").text
+    assert "# TYPE event_loop_lag_seconds histogram" in body
+    assert "event_loop_blocked_total " in body
+    assert "thread_pool_waiting_tasks " in body
+    # The /metrics request itself is in flight
+    assert "http_requests_in_flight 1" in body
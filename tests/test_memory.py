@@ -0,0 +1,120 @@
+import tracemalloc
+import pytest
+from app.core import memory
+from app.core.memory import RssGuard
+from tests.conftest import RecordingLogger
+
+
+@pytest.fixture
+def tracing_allocations():
+    """Run a test with tracemalloc on, restoring the previous state."""
+    was_tracing = tracemalloc.is_tracing()
+    memory.start_tracemalloc(1)
+    yield
+    if not was_tracing:
+        memory.stop_tracemalloc()
+
+
+def _user_headers(client, username="memory_user"):
+    client.post(
+        "/auth/signup", json={"username": username, "password": "secret123"}
+    )
+    response = client.post(
+        "/auth/login", json={"username": username, "password": "secret123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_memory_report(client, admin_headers):
+    """Test the report shows RSS, GC generations and object types."""
+    response = client.get(
+        "/auth/admin/memory?types=true&limit=5", headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    report = response.json()
+    assert report["rss_bytes"] > 0
+    assert report["peak_rss_bytes"] >= report["rss_bytes"] // 2
+    assert [g["generation"] for g in report["gc"]] == [0, 1, 2]
+    assert len(report["object_types"]) == 5
+
+
+def test_memory_endpoints_require_admin(client):
+    """Test non-admin users cannot inspect or trace the worker."""
+    headers = _user_headers(client)
+    assert client.get("/auth/admin/memory", headers=headers).status_code == 403
+    response = client.post("/auth/admin/memory/tracemalloc", headers=headers)
+    assert response.status_code == 403
+
+
+def test_snapshot_requires_tracemalloc(client, admin_headers):
+    """Test diffs are refused until allocations are being traced."""
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already running")
+    response = client.post(
+        "/auth/admin/memory/snapshot", headers=admin_headers
+    )
+    assert response.status_code == 409
+
+
+def test_snapshot_diff_finds_growth(
+    client, admin_headers, tracing_allocations
+):
+    """Test memory kept alive between snapshots is attributed to its line."""
+    first = client.post("/auth/admin/memory/snapshot", headers=admin_headers)
+    assert first.json()["baseline"] is True
+
+    leak = [bytearray(1000) for _ in range(1000)]
+    second = client.post(
+        "/auth/admin/memory/snapshot?limit=100", headers=admin_headers
+    ).json()
+
+    assert second["baseline"] is False
+    site = next(g for g in second["growth"] if "test_memory.py" in g["site"])
+    assert site["size_diff_bytes"] >= 1000 * 1000
+    del leak
+
+
+def test_tracemalloc_toggle(client, admin_headers):
+    """Test admins can start and stop allocation tracing."""
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already running")
+    started = client.post(
+        "/auth/admin/memory/tracemalloc?frames=2", headers=admin_headers
+    ).json()
+    stopped = client.delete(
+        "/auth/admin/memory/tracemalloc", headers=admin_headers
+    ).json()
+    assert (started["tracing"], started["frames"]) == (True, 2)
+    assert stopped["tracing"] is False
+
+
+def test_rss_guard_warns_once_per_crossing(monkeypatch):
+    """Test the guard logs when RSS passes the ceiling, then re-arms."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(memory, "logger", recorder)
+    monkeypatch.setitem(memory.memory_stats, "rss_warnings", 0)
+    rss = [2000]
+    monkeypatch.setattr(memory, "rss_bytes", lambda: rss[0])
+    guard = RssGuard(1000, interval=0)
+
+    guard.check()
+    guard.check()
+    rss[0] = 500
+    guard.check()
+    rss[0] = 3000
+    guard.check()
+
+    assert [event for event, _ in recorder.events] == [
+        "Memory above threshold",
+        "Memory above threshold",
+    ]
+    assert memory.memory_stats["rss_warnings"] == 2
+
+
+def test_memory_metrics_exported(client):
+    """Test /metrics carries RSS and garbage collector counters."""
+    body = client.get("/metrics").text
+    assert "process_resident_memory_bytes " in body
+    assert 'python_gc_collections_total{generation="0"}' in body
+    assert "memory_rss_warnings_total" in body
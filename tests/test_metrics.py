@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from app.core.config import settings
+from app.middleware.metrics import (
+    ARCHIVE_NAME,
+    Histogram,
+    SnapshotWriter,
+    write_snapshot,
+)
+from app.middleware.observability import (
+    collect_snapshot,
+    metrics,
+    request_duration,
+)
+
+DEAD_PID = 2**31 - 1
+
+
+def _worker_snapshot(pid, requests):
+    """A snapshot as another worker would write it."""
+    return {
+        "pid": pid,
+        "counters": {
+            "requests_total": requests,
+            "errors_total": 0,
+            "db_pool_checkouts_total": 0,
+            "db_pool_checkout_timeouts_total": 0,
+            "db_pool_checkout_wait_seconds_sum": 0.0,
+        },
+        "gauges_max": {"app_uptime_seconds": 1.0},
+        "gauges_sum": {"size": {"sync": settings.db_pool_size}},
+        "histograms": {
+            "http_request_duration_seconds": [
+                [
+                    ["GET", "/worker-only", "2xx"],
+                    [requests] + [0] * len(request_duration.buckets),
+                    0.001 * requests,
+                    requests,
+                ]
+            ]
+        },
+    }
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket counts accumulate and end with +Inf."""
+    histogram = Histogram("demo_seconds", "Demo", ("op",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, "read")
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{op="read",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{op="read",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{op="read"} 4' in lines
+    assert 'demo_seconds_sum{op="read"} 6.05' in lines
+
+
+def test_metrics_content_type(client):
+    """Test /metrics is served as Prometheus text, not JSON."""
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith(
+        "text/plain; version=0.0.4"
+    )
+    assert response.text.startswith("# HELP requests_total")
+
+
+def test_request_latency_by_route_template(client, admin_headers):
+    """Test latency is labelled by route template and status class."""
+    request_duration.clear()
+    for task_id in (101, 102, 103):
+        client.get(f"/tasks/{task_id}", headers=admin_headers)
+
+    body = client.get("/metrics").text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/tasks/{task_id}",status="4xx"} 3'
+    ) in body
+    assert "/tasks/101" not in body
+
+
+def test_unmatched_paths_share_one_series(client):
+    """Test unknown paths do not create a series each."""
+    request_duration.clear()
+    for i in range(20):
+        client.get(f"/no-such-page-{i}")
+
+    body = client.get("/metrics").text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="<unmatched>",status="4xx"} 20'
+    ) in body
+    assert "no-such-page" not in body
+
+
+def test_multiprocess_metrics_merge_workers(client, tmp_path, monkeypatch):
+    """Test /metrics sums every worker's snapshot in multiprocess mode."""
+    monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+    write_snapshot(str(tmp_path), _worker_snapshot(os.getppid(), 100))
+    write_snapshot(str(tmp_path), _worker_snapshot(DEAD_PID, 50))
+
+    body = client.get("/metrics").text
+
+    # Counters include exited workers; gauges only live ones
+    assert f"requests_total {150 + metrics['requests']}" in body
+    assert f'db_pool_size{{engine="sync"}} {2 * settings.db_pool_size}' in body
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/worker-only",status="2xx"} 150'
+    ) in body
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+
+
+def _age(path, seconds):
+    """Backdate a file's modification time."""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_stale_worker_gauges_are_ignored(client, tmp_path, monkeypatch):
+    """Test a worker that stopped writing no longer adds to the gauges."""
+    monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+    write_snapshot(str(tmp_path), _worker_snapshot(os.getppid(), 100))
+    _age(tmp_path / f"metrics_{os.getppid()}.json", 3600)
+
+    body = client.get("/metrics").text
+
+    assert f"requests_total {100 + metrics['requests']}" in body
+    assert f'db_pool_size{{engine="sync"}} {settings.db_pool_size}' in body
+
+
+def test_exited_workers_are_archived(client, tmp_path, monkeypatch):
+    """Test old files of exited workers are folded into one archive."""
+    monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+    for pid in (DEAD_PID, DEAD_PID - 1):
+        write_snapshot(str(tmp_path), _worker_snapshot(pid, 50))
+        _age(tmp_path / f"metrics_{pid}.json", 3600)
+
+    first = client.get("/metrics").text
+    second = client.get("/metrics").text
+
+    assert {p.name for p in tmp_path.glob("metrics_*.json")} == {
+        ARCHIVE_NAME,
+        f"metrics_{os.getpid()}.json",
+    }
+    assert f"requests_total {100 + metrics['requests'] - 1}" in first
+    assert f"requests_total {100 + metrics['requests']}" in second
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/worker-only",status="2xx"} 100'
+    ) in second
+
+
+def test_snapshot_writer_flushes_on_stop(tmp_path):
+    """Test the writer leaves a final snapshot for this process."""
+    writer = SnapshotWriter(str(tmp_path), collect_snapshot, interval=60)
+    writer.start()
+    writer.stop()
+
+    snapshot = json.loads(
+        (tmp_path / f"metrics_{os.getpid()}.json").read_text()
+    )
+    assert snapshot["counters"]["requests_total"] == metrics["requests"]
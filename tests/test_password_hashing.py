@@ -0,0 +1,67 @@
+import pytest
+from passlib.context import CryptContext
+from app.core import security
+from app.core.concurrency import hash_pool
+from app.core.config import settings
+from app.models.user import User
+from tests.conftest import TestingSessionLocal
+
+
+def _stored_hash(username):
+    db = TestingSessionLocal()
+    hashed = (
+        db.query(User.hashed_password)
+        .filter(User.username == username)
+        .scalar()
+    )
+    db.close()
+    return hashed
+
+
+def _credentials(username="hash_user"):
+    return {"username": username, "password": "secret123"}
+
+
+def test_hash_uses_configured_bcrypt_rounds():
+    """Test new hashes use the bcrypt cost from settings."""
+    hashed = security.get_password_hash("secret123")
+    assert hashed.startswith(f"$2b${settings.bcrypt_rounds:02d}$")
+
+
+def test_invalid_hash_scheme_rejected(monkeypatch):
+    """Test an unknown password_hash_scheme fails at startup."""
+    monkeypatch.setattr(settings, "password_hash_scheme", "md5")
+    with pytest.raises(ValueError):
+        security.build_password_context()
+
+
+def test_login_rehashes_when_cost_changes(client, monkeypatch):
+    """Test a login upgrades a hash made with an outdated cost."""
+    monkeypatch.setattr(
+        security,
+        "pwd_context",
+        CryptContext(schemes=["bcrypt"], bcrypt__rounds=4),
+    )
+    client.post("/auth/signup", json=_credentials())
+    assert _stored_hash("hash_user").startswith("$2b$04$")
+
+    monkeypatch.setattr(
+        security,
+        "pwd_context",
+        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5),
+    )
+    assert client.post("/auth/login", json=_credentials()).status_code == 200
+    assert _stored_hash("hash_user").startswith("$2b$05$")
+    assert client.post("/auth/login", json=_credentials()).status_code == 200
+
+
+def test_full_hash_pool_returns_503(client, monkeypatch):
+    """Test signup and login fail fast when the hash pool is saturated."""
+    client.post("/auth/signup", json=_credentials())
+    monkeypatch.setattr(hash_pool, "limit", 0)
+
+    signup = client.post("/auth/signup", json=_credentials("other_user"))
+    login = client.post("/auth/login", json=_credentials())
+    for response in (signup, login):
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
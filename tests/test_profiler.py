@@ -0,0 +1,103 @@
+import threading
+import time
+from app.core.profiler import StackSampler, profiler_lock
+from app.models.user import User
+from tests.conftest import TestingSessionLocal
+
+
+def _marker_busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _user_headers(client, username="profile_user"):
+    client.post(
+        "/auth/signup", json={"username": username, "password": "secret123"}
+    )
+    response = client.post(
+        "/auth/login", json={"username": username, "password": "secret123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_sampler_collects_collapsed_stacks():
+    """Test a busy thread shows up in collapsed-stack output."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_marker_busy_loop, args=(stop,))
+    worker.start()
+    try:
+        with StackSampler(interval=0.001) as sampler:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sampler.samples > 0
+    lines = sampler.collapsed().splitlines()
+    marker = [line for line in lines if "_marker_busy_loop" in line]
+    assert marker
+    stack, count = marker[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert ";" in stack
+
+
+def test_profile_endpoint_requires_admin(client):
+    """Test non-admin users cannot profile the worker."""
+    response = client.get(
+        "/auth/admin/profile?seconds=0.1", headers=_user_headers(client)
+    )
+    assert response.status_code == 403
+
+
+def test_profile_endpoint_returns_stacks(client, admin_headers):
+    """Test an admin gets collapsed stacks for the whole worker."""
+    response = client.get(
+        "/auth/admin/profile?seconds=0.2&interval_ms=5",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.strip()
+    assert all(
+        line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines()
+    )
+
+
+def test_concurrent_profiles_conflict(client, admin_headers):
+    """Test a second profile is refused while one is running."""
+    with profiler_lock:
+        response = client.get(
+            "/auth/admin/profile?seconds=0.1", headers=admin_headers
+        )
+    assert response.status_code == 409
+
+
+def test_profile_header_profiles_admin_request(client, admin_headers):
+    """Test X-Profile swaps the body for stacks, for admins only."""
+    response = client.get(
+        "/tasks/", headers={**admin_headers, "X-Profile": "1"}
+    )
+    assert response.headers["x-profiled-status"] == "200"
+    assert response.headers["content-type"].startswith("text/plain")
+
+    response = client.get(
+        "/tasks/", headers={**_user_headers(client), "X-Profile": "1"}
+    )
+    assert "x-profiled-status" not in response.headers
+    assert response.json() == []
+
+
+def test_profile_header_checks_current_admin_status(client, admin_headers):
+    """Test a demoted admin's still-valid token cannot profile."""
+    db = TestingSessionLocal()
+    db.query(User).filter(User.username == "admin_fixture").update(
+        {"is_admin": False}
+    )
+    db.commit()
+    db.close()
+
+    response = client.get(
+        "/tasks/", headers={**admin_headers, "X-Profile": "1"}
+    )
+    assert "x-profiled-status" not in response.headers
+    assert response.status_code == 200
@@ -0,0 +1,148 @@
+"""
+Query-plan checks: every TaskService read on tasks must use an index.
+
+SQLite runs against the test database. Set TEST_POSTGRES_URL to also
+check the Postgres plans (sequential scans disabled so the planner picks
+an index whenever one applies, regardless of table size).
+"""
+import os
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.task import TaskCreate, TaskUpdate
+from app.models.user import User
+from app.services.task_service import TaskService
+from tests.conftest import engine as sqlite_engine
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _sqlite_plan(connection, statement, parameters):
+    rows = connection.exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + statement, parameters
+    ).all()
+    return [row[3] for row in rows]
+
+
+def _postgres_plan(connection, statement, parameters):
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+    return [row[0] for row in rows]
+
+
+def _uses_table_scan(plan):
+    """Return True if a plan reads tasks without an index."""
+    for line in plan:
+        if line.strip() == "SCAN tasks" or "Seq Scan on tasks" in line:
+            return True
+    return False
+
+
+@pytest.fixture(
+    params=[
+        "sqlite",
+        pytest.param(
+            "postgresql",
+            marks=pytest.mark.skipif(
+                not POSTGRES_URL, reason="TEST_POSTGRES_URL not set"
+            ),
+        ),
+    ]
+)
+def plan_db(request):
+    """Yield (session, explain) for a database with a few users' tasks."""
+    if request.param == "sqlite":
+        engine, explain = sqlite_engine, _sqlite_plan
+    else:
+        engine, explain = create_engine(POSTGRES_URL), _postgres_plan
+
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    users = [User(username=f"plan_user_{i}") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    task_service = TaskService(db)
+    for user in users:
+        for status in ("todo", "in_progress", "done"):
+            task_service.create_task(
+                TaskCreate(title="Planned", status=status), user
+            )
+
+    yield db, explain
+
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+    if engine is not sqlite_engine:
+        engine.dispose()
+
+
+def _cursor(task_service, user_id):
+    return task_service.list_tasks(user_id, limit=1)[1]
+
+
+# (name, call) pairs exercising every TaskService read path
+TASK_SERVICE_CALLS = [
+    ("get_user_tasks", lambda ts, uid: ts.get_user_tasks(uid)),
+    ("get_task_by_id", lambda ts, uid: ts.get_task_by_id(1, uid)),
+    ("list_tasks", lambda ts, uid: ts.list_tasks(uid)),
+    (
+        "list_tasks_status",
+        lambda ts, uid: ts.list_tasks(uid, status="done"),
+    ),
+    (
+        "list_tasks_ascending",
+        lambda ts, uid: ts.list_tasks(uid, sort="created_at"),
+    ),
+    (
+        "list_tasks_cursor",
+        lambda ts, uid: ts.list_tasks(uid, cursor=_cursor(ts, uid)),
+    ),
+    (
+        "list_tasks_updated_since",
+        lambda ts, uid: ts.list_tasks(uid, updated_since=datetime(2000, 1, 1)),
+    ),
+    ("list_tasks_admin", lambda ts, uid: ts.list_tasks(None)),
+    (
+        "update_task",
+        lambda ts, uid: ts.update_task(1, uid, TaskUpdate(status="done")),
+    ),
+    (
+        "update_task_status",
+        lambda ts, uid: ts.update_task_status(1, uid, "in_progress"),
+    ),
+    ("delete_task", lambda ts, uid: ts.delete_task(2, uid)),
+    ("delete_task_admin", lambda ts, uid: ts.delete_task_admin(3)),
+    ("assign_task_to_user", lambda ts, uid: ts.assign_task_to_user(4, uid)),
+]
+
+
+@pytest.mark.parametrize(
+    "call",
+    [call for _, call in TASK_SERVICE_CALLS],
+    ids=[name for name, _ in TASK_SERVICE_CALLS],
+)
+def test_task_service_reads_use_indexes(plan_db, call):
+    """Test each TaskService query on tasks avoids a full table scan."""
+    db, explain = plan_db
+    engine = db.get_bind()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and (
+            "FROM tasks" in statement
+        ):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        call(TaskService(db), 1)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = explain(connection, statement, parameters)
+            assert not _uses_table_scan(plan), (statement, plan)
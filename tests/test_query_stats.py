@@ -0,0 +1,59 @@
+from app.core import database
+from app.core.config import settings
+from app.middleware import observability
+from app.models.task import Task
+from tests.conftest import RecordingLogger, TestingSessionLocal
+
+
+def test_normalize_sql_replaces_literals():
+    """Test statements differing only in values share a fingerprint."""
+    statement = (
+        "SELECT *  FROM tasks\n WHERE title = 'it''s' "
+        "AND id IN (?, ?, ?) LIMIT 10"
+    )
+    assert database.normalize_sql(statement) == (
+        "SELECT * FROM tasks WHERE title = ? AND id IN (?) LIMIT ?"
+    )
+
+
+def test_request_log_includes_query_stats(
+    client, admin_headers, count_queries, monkeypatch
+):
+    """Test the request log line carries query count and DB time."""
+    client.get("/tasks/", headers=admin_headers)  # warm auth cache
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+    count_queries.clear()
+
+    client.get("/tasks/", headers=admin_headers)
+
+    ((event, fields),) = recorder.events
+    assert event == "Request processed"
+    assert fields["db_queries"] == len(count_queries) > 0
+    assert fields["db_time_ms"] >= 0
+
+
+def test_metrics_export_statement_histograms(client, admin_headers):
+    """Test /metrics has a latency histogram per normalized statement."""
+    client.get("/tasks/", headers=admin_headers)
+    body = client.get("/metrics").text
+    assert "# TYPE db_query_duration_seconds histogram" in body
+    assert 'db_query_duration_seconds_count{statement="SELECT tasks.' in body
+
+
+def test_slow_query_logged_with_plan(client, monkeypatch):
+    """Test statements over the threshold are logged with their plan."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(database, "logger", recorder)
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0)
+
+    db = TestingSessionLocal()
+    db.query(Task).filter(Task.user_id == 42).all()
+    db.close()
+
+    slow = [
+        fields for event, fields in recorder.events if event == "Slow query"
+    ]
+    (fields,) = [f for f in slow if "FROM tasks" in f["statement"]]
+    assert "tasks.user_id = ?" in fields["statement"]
+    assert any("ix_tasks_user_id" in line for line in fields["plan"])
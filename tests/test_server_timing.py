@@ -0,0 +1,55 @@
+from app.core.timing import request_timings, timed
+from app.middleware import observability
+from tests.conftest import RecordingLogger
+
+
+def _phases(response):
+    """Parse the Server-Timing header into {phase: milliseconds}."""
+    phases = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, duration = entry.split(";dur=")
+        phases[name] = float(duration)
+    return phases
+
+
+def test_api_response_breaks_down_latency(client, admin_headers):
+    """Test a JSON endpoint reports auth, db and serialization time."""
+    response = client.get("/tasks/", headers=admin_headers)
+
+    phases = _phases(response)
+    assert {"auth", "db", "serialization", "total"} <= set(phases)
+    assert phases["total"] >= phases["db"]
+
+
+def test_html_response_reports_template_time(client, admin_headers):
+    """Test template rendering is timed on HTMX endpoints."""
+    response = client.get("/web/tasks/", headers=admin_headers)
+    assert "template" in _phases(response)
+
+
+def test_ai_time_is_attributed(client, admin_headers, fake_gemini):
+    """Test async Gemini calls count towards the request."""
+    response = client.post(
+        "/ai/suggest",
+        json={"title": "Timing", "mode": "draft"},
+        headers=admin_headers,
+    )
+    assert "ai" in _phases(response)
+
+
+def test_request_log_includes_timings(client, admin_headers, monkeypatch):
+    """Test the log record carries the same per-phase breakdown."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+
+    client.get("/tasks/", headers=admin_headers)
+
+    ((_, fields),) = recorder.events
+    assert {"auth", "db", "serialization"} <= set(fields["timings_ms"])
+
+
+def test_timed_outside_request_is_noop():
+    """Test timers do nothing when no request is being timed."""
+    with timed("db"):
+        pass
+    assert request_timings.get() is None
@@ -0,0 +1,119 @@
+from app.models.task import Task
+from app.models.user import User
+from app.services.counter_service import TaskCounterService
+from tests.conftest import TestingSessionLocal
+
+
+def _seed_users(count, tasks_per_user):
+    """Insert users with a mix of done and todo tasks directly."""
+    db = TestingSessionLocal()
+    for i in range(count):
+        user = User(username=f"stats_user_{i}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        for j in range(tasks_per_user):
+            db.add(
+                Task(
+                    title=f"Task {j}",
+                    status="done" if j % 2 == 0 else "todo",
+                    user_id=user.id,
+                )
+            )
+    db.commit()
+    TaskCounterService(db).rebuild()
+    db.close()
+
+
+def test_admin_stats_requires_admin(client):
+    """Test admin stats endpoint rejects regular users."""
+    client.post(
+        "/auth/signup",
+        json={"username": "stats_regular", "password": "testpass123"},
+    )
+    login_response = client.post(
+        "/auth/login",
+        json={"username": "stats_regular", "password": "testpass123"},
+    )
+    token = login_response.json()["access_token"]
+
+    response = client.get(
+        "/auth/admin/stats", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+
+def test_admin_stats_totals(client, admin_headers):
+    """Test admin stats aggregates tasks per user."""
+    _seed_users(3, 4)
+
+    response = client.get("/auth/admin/stats", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    overview = data["system_overview"]
+    assert overview["total_users"] == 4
+    assert overview["total_tasks"] == 12
+    assert overview["completed_tasks"] == 6
+    assert overview["active_tasks"] == 6
+    assert overview["completion_rate"] == 50.0
+
+    activity = {user["username"]: user for user in data["user_activity"]}
+    assert activity["stats_user_0"]["total_tasks"] == 4
+    assert activity["stats_user_0"]["completed_tasks"] == 2
+    assert activity["stats_user_0"]["completion_rate"] == 50.0
+    assert activity["admin_fixture"]["total_tasks"] == 0
+    assert activity["admin_fixture"]["completion_rate"] == 0
+
+
+def test_admin_stats_paging_and_sorting(client, admin_headers):
+    """Test user activity paging and sorting parameters."""
+    _seed_users(5, 2)
+
+    response = client.get(
+        "/auth/admin/stats?limit=2&offset=1&sort_by=username&order=desc",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["username"] for user in data["user_activity"]] == [
+        "stats_user_3",
+        "stats_user_2",
+    ]
+    assert data["pagination"] == {
+        "limit": 2,
+        "offset": 1,
+        "total": 6,
+        "has_more": True,
+    }
+
+    response = client.get(
+        "/auth/admin/stats?limit=2&offset=4", headers=admin_headers
+    )
+    assert len(response.json()["user_activity"]) == 2
+    assert response.json()["pagination"]["has_more"] is False
+
+    response = client.get(
+        "/auth/admin/stats?sort_by=password", headers=admin_headers
+    )
+    assert response.status_code == 422
+
+
+def test_admin_stats_query_count_is_constant(
+    client, admin_headers, count_queries
+):
+    """Test admin stats issues the same number of queries at any size."""
+    _seed_users(2, 3)
+    client.get("/auth/admin/stats", headers=admin_headers)  # warm auth cache
+    count_queries.clear()
+    client.get("/auth/admin/stats", headers=admin_headers)
+    small = len(count_queries)
+
+    db = TestingSessionLocal()
+    for i in range(2, 40):
+        db.add(User(username=f"stats_user_{i}", hashed_password="x"))
+    db.commit()
+    db.close()
+
+    count_queries.clear()
+    client.get("/auth/admin/stats", headers=admin_headers)
+    assert len(count_queries) == small
@@ -0,0 +1,148 @@
+import threading
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.models.task import Task
+from app.models.user import User
+from app.services.counter_service import TaskCounterService
+from tests.conftest import TestingSessionLocal
+
+
+def _login(client, username):
+    """Create a user and return its Authorization header."""
+    client.post(
+        "/auth/signup", json={"username": username, "password": "testpass123"}
+    )
+    login_response = client.post(
+        "/auth/login", json={"username": username, "password": "testpass123"}
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _counters():
+    """Return (user counts by username, global counts, drift)."""
+    db = TestingSessionLocal()
+    counter_service = TaskCounterService(db)
+    users = {user.username: user.id for user in db.query(User).all()}
+    user_counts = {
+        username: counter_service.get_user_counts(user_id)
+        for username, user_id in users.items()
+    }
+    result = (
+        user_counts,
+        counter_service.get_global_counts(),
+        counter_service.verify(),
+    )
+    db.close()
+    return result
+
+
+def test_counters_follow_task_lifecycle(client, admin_headers):
+    """Test counters stay in sync through create, update, assign, delete."""
+    headers = _login(client, "counter_user")
+    other_headers = _login(client, "counter_other")
+
+    task_ids = []
+    for status in ("todo", "todo", "in_progress"):
+        response = client.post(
+            "/tasks/",
+            json={"title": "Counted", "status": status},
+            headers=headers,
+        )
+        task_ids.append(response.json()["id"])
+
+    client.post(
+        f"/tasks/{task_ids[0]}/status",
+        json={"status": "done"},
+        headers=headers,
+    )
+    client.put(
+        f"/tasks/{task_ids[1]}",
+        json={"title": "Counted", "status": "in_progress"},
+        headers=headers,
+    )
+    client.delete(f"/tasks/{task_ids[2]}", headers=headers)
+
+    client.post(
+        "/tasks/",
+        json={"title": "Other", "status": "todo"},
+        headers=other_headers,
+    )
+    other_id = client.get("/tasks/", headers=other_headers).json()[0][
+        "user_id"
+    ]
+    client.post(
+        f"/tasks/{task_ids[0]}/assign",
+        json={"user_id": other_id},
+        headers=admin_headers,
+    )
+
+    user_counts, global_counts, drift = _counters()
+    assert drift == []
+    assert user_counts["counter_user"].get("in_progress") == 1
+    assert user_counts["counter_user"].get("done", 0) == 0
+    assert user_counts["counter_other"] == {"todo": 1, "done": 1}
+    assert global_counts == {"todo": 1, "in_progress": 1, "done": 1}
+
+
+def test_counters_verify_and_rebuild(client):
+    """Test verify reports drift from direct writes and rebuild fixes it."""
+    _login(client, "drift_user")
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "drift_user").first()
+    db.add(Task(title="Bypassed service", status="todo", user_id=user.id))
+    db.commit()
+
+    counter_service = TaskCounterService(db)
+    drift = counter_service.verify()
+    assert {
+        "user_id": user.id,
+        "status": "todo",
+        "expected": 1,
+        "stored": 0,
+    } in drift
+
+    counter_service.rebuild()
+    assert counter_service.verify() == []
+    assert counter_service.get_user_counts(user.id) == {"todo": 1}
+    db.close()
+
+
+def test_concurrent_first_writes_are_counted(client):
+    """Test simultaneous first increments of a counter row both land."""
+    barrier = threading.Barrier(4)
+
+    def record():
+        db = TestingSessionLocal()
+        try:
+            barrier.wait()
+            TaskCounterService(db).record(42, "todo", 1)
+            db.commit()
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = TestingSessionLocal()
+    counts = TaskCounterService(db).get_user_counts(42)
+    db.close()
+    assert counts == {"todo": 4}
+
+
+def test_record_is_a_postgresql_upsert():
+    """Test the counter write compiles to ON CONFLICT on PostgreSQL."""
+    statements = []
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()),
+        execute=statements.append,
+    )
+
+    TaskCounterService(db).record(1, "todo", 1)
+
+    assert len(statements) == 2
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, status) DO UPDATE" in sql
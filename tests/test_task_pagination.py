@@ -0,0 +1,120 @@
+def _headers(client, username):
+    """Create a user and return its Authorization header."""
+    client.post(
+        "/auth/signup", json={"username": username, "password": "testpass123"}
+    )
+    login_response = client.post(
+        "/auth/login", json={"username": username, "password": "testpass123"}
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _create_tasks(client, headers, count, status="todo"):
+    """Create count tasks and return their IDs."""
+    return [
+        client.post(
+            "/tasks/",
+            json={"title": f"Paged {i}", "status": status},
+            headers=headers,
+        ).json()["id"]
+        for i in range(count)
+    ]
+
+
+def test_list_tasks_keyset_pages(client):
+    """Test following X-Next-Cursor visits every task exactly once."""
+    headers = _headers(client, "pager_unique")
+    task_ids = _create_tasks(client, headers, 5)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(task_ids, reverse=True)
+
+
+def test_list_tasks_filters_and_sort(client):
+    """Test status, updated_since and ascending sort parameters."""
+    headers = _headers(client, "filter_unique")
+    todo_ids = _create_tasks(client, headers, 2)
+    done_ids = _create_tasks(client, headers, 2, status="done")
+
+    response = client.get(
+        "/tasks/",
+        params={"status": "done", "sort": "created_at"},
+        headers=headers,
+    )
+    assert [task["id"] for task in response.json()] == done_ids
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(
+        "/tasks/",
+        params={"updated_since": "2999-01-01T00:00:00"},
+        headers=headers,
+    )
+    assert response.json() == []
+
+    response = client.get(
+        "/tasks/",
+        params={"updated_since": "2000-01-01T00:00:00Z"},
+        headers=headers,
+    )
+    assert len(response.json()) == len(todo_ids + done_ids)
+
+
+def test_list_tasks_rejects_bad_parameters(client):
+    """Test invalid cursor, status and sort values return 422."""
+    headers = _headers(client, "badparams_unique")
+    for params in (
+        {"cursor": "not-a-cursor"},
+        {"status": "archived"},
+        {"sort": "title"},
+        {"limit": 0},
+    ):
+        response = client.get("/tasks/", params=params, headers=headers)
+        assert response.status_code == 422
+
+
+def test_web_tasks_load_more_fragment(client):
+    """Test the HTMX list renders a load-more trigger and card fragments."""
+    headers = _headers(client, "webpager_unique")
+    _create_tasks(client, headers, 3)
+
+    response = client.get("/web/tasks/?limit=2", headers=headers)
+    assert response.status_code == 200
+    assert 'id="task-grid"' in response.text
+    assert response.text.count("Paged ") == 2
+    assert "Load more" in response.text
+    assert 'hx-get="/web/tasks/?limit=2&amp;cursor=' in response.text
+
+    response = client.get("/tasks/?limit=2", headers=headers)
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/web/tasks/", params={"limit": 2, "cursor": cursor}, headers=headers
+    )
+    assert 'id="task-grid"' not in response.text
+    assert response.text.count("Paged ") == 1
+    assert "Load more" not in response.text
+
+
+def test_web_tasks_rejects_bad_cursor(client):
+    """Test a bad cursor or filter gets a 422 fragment, not a logout."""
+    headers = _headers(client, "webbadcursor_unique")
+    _create_tasks(client, headers, 1)
+
+    for params in ({"cursor": "garbage"}, {"status": "bogus"}):
+        response = client.get("/web/tasks/", params=params, headers=headers)
+        assert response.status_code == 422
+        assert "Not authenticated" not in response.text
+        assert "Please login" not in response.text
@@ -0,0 +1,200 @@
+import json
+import pytest
+from app.core import tracing
+from app.core.config import settings
+from app.core.tracing import (
+    FileExporter,
+    InMemoryExporter,
+    parse_traceparent,
+    span,
+    start_trace,
+)
+from app.middleware import observability
+from tests.conftest import RecordingLogger
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Collect traces in memory, following inbound sampling flags."""
+    monkeypatch.setattr(settings, "trace_trust_inbound_sampled", True)
+    exporter = InMemoryExporter(50)
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    return exporter
+
+
+def _traceparent(flags="01"):
+    return f"00-{TRACE_ID}-{PARENT_ID}-{flags}"
+
+
+def _last_trace(exporter):
+    """Return the newest trace's spans keyed by name."""
+    return {s["name"]: s for s in exporter.traces[-1]}
+
+
+def test_parse_traceparent_rejects_invalid_values():
+    """Test malformed or all-zero ids start a new trace."""
+    assert parse_traceparent(_traceparent()) == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(_traceparent("00"))[2] is False
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+
+
+def test_inbound_trace_is_continued(client, admin_headers, exporter):
+    """Test the response carries the caller's trace id and our span id."""
+    response = client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent()}
+    )
+
+    version, trace_id, span_id, flags = response.headers["traceparent"].split(
+        "-"
+    )
+    assert (version, trace_id, flags) == ("00", TRACE_ID, "01")
+    spans = _last_trace(exporter)
+    root = spans["GET /tasks/"]
+    assert root["span_id"] == span_id
+    assert root["parent_id"] == PARENT_ID
+    assert root["attributes"]["http_status_code"] == 200
+
+
+def test_spans_are_nested(client, admin_headers, exporter):
+    """Test auth, SQL and serialization spans hang off the request."""
+    client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent()}
+    )
+
+    trace = exporter.traces[-1]
+    root = trace[0]
+    assert root["name"] == "GET /tasks/"
+    names = {s["name"] for s in trace}
+    assert {"auth", "db.query", "serialization"} <= names
+    children = {s["name"] for s in trace if s["parent_id"] == root["span_id"]}
+    assert {"auth", "serialization"} <= children
+    query = next(s for s in trace if s["name"] == "db.query")
+    assert query["attributes"]["db_statement"].startswith("SELECT")
+
+
+def test_template_and_ai_spans(client, admin_headers, exporter, fake_gemini):
+    """Test template rendering and Gemini calls are traced."""
+    headers = {**admin_headers, "traceparent": _traceparent()}
+
+    client.get("/web/tasks/", headers=headers)
+    assert "template" in _last_trace(exporter)
+
+    client.post(
+        "/ai/suggest",
+        json={"title": "Tracing", "mode": "draft"},
+        headers=headers,
+    )
+    ai_span = _last_trace(exporter)["ai"]
+    assert ai_span["attributes"]["model"] == "gemini-2.5-flash"
+
+
+def test_streamed_ai_call_is_timed_and_traced(
+    client, admin_headers, exporter, fake_gemini, monkeypatch
+):
+    """Test a streamed suggestion shows up like a buffered one."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+
+    client.post(
+        "/ai/suggest/stream",
+        json={"title": "Tracing", "mode": "draft"},
+        headers={**admin_headers, "traceparent": _traceparent()},
+    )
+
+    trace = _last_trace(exporter)
+    assert trace["ai"]["attributes"]["model"] == "gemini-2.5-flash"
+    assert (
+        trace["ai"]["parent_id"] == trace["POST /ai/suggest/stream"]["span_id"]
+    )
+    ((_, fields),) = recorder.events
+    assert "ai" in fields["timings_ms"]
+
+
+def test_unsampled_requests_record_nothing(
+    client, admin_headers, exporter, monkeypatch
+):
+    """Test the head sampling decision, inbound or local, is honoured."""
+    monkeypatch.setattr(settings, "trace_sample_rate", 0.0)
+
+    response = client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent("00")}
+    )
+    assert response.headers["traceparent"].endswith("-00")
+
+    response = client.get("/tasks/", headers=admin_headers)
+    _, trace_id, _, flags = response.headers["traceparent"].split("-")
+    assert trace_id != TRACE_ID and flags == "00"
+    assert len(exporter.traces) == 0
+
+
+def test_inbound_sampled_flag_is_untrusted_by_default(
+    client, admin_headers, exporter, monkeypatch
+):
+    """Test clients cannot force recording past the sample rate."""
+    monkeypatch.setattr(settings, "trace_trust_inbound_sampled", False)
+    monkeypatch.setattr(settings, "trace_sample_rate", 0.0)
+
+    response = client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent()}
+    )
+
+    _, trace_id, _, flags = response.headers["traceparent"].split("-")
+    assert (trace_id, flags) == (TRACE_ID, "00")
+    assert len(exporter.traces) == 0
+
+
+def test_correlation_id_is_trace_id(client, admin_headers, monkeypatch):
+    """Test request logs can be joined to the propagated trace."""
+    recorder = RecordingLogger()
+    monkeypatch.setattr(observability, "logger", recorder)
+
+    client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent()}
+    )
+
+    ((_, fields),) = recorder.events
+    assert fields["correlation_id"] == TRACE_ID
+
+
+def test_admin_traces_endpoint(client, admin_headers, exporter):
+    """Test recent traces can be looked up by trace id."""
+    client.get(
+        "/tasks/", headers={**admin_headers, "traceparent": _traceparent()}
+    )
+
+    response = client.get(
+        f"/auth/admin/traces?trace_id={TRACE_ID}", headers=admin_headers
+    )
+    assert response.status_code == 200
+    (trace,) = response.json()["traces"]
+    assert trace[0]["name"] == "GET /tasks/"
+
+
+def test_file_exporter_writes_json_lines(tmp_path, monkeypatch):
+    """Test finished traces are appended to the trace file."""
+    monkeypatch.setattr(settings, "trace_trust_inbound_sampled", True)
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    root = start_trace(_traceparent(), "job")
+    token = tracing.current_span.set(root)
+    with span("step", attempt=1):
+        pass
+    tracing.current_span.reset(token)
+    root.end()
+    exporter.export(sorted(root._finished, key=lambda s: s.start_ns))
+    exporter.close()
+
+    (line,) = path.read_text().splitlines()
+    names = [s["name"] for s in json.loads(line)]
+    assert names == ["job", "step"]
+
+
+def test_span_outside_trace_is_noop():
+    """Test spans cost nothing when there is no current trace."""
+    with span("orphan") as current:
+        assert current is None